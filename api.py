@@ -0,0 +1,103 @@
+import json
+from datetime import datetime
+
+from flask import Blueprint, Response, abort, jsonify, request
+
+from genres import mask_to_genres
+from models.Artist import Artist
+from models.Show import Show
+from models.Venue import Venue
+from pagination import paginate
+from queries import artist_detail, row_etag, show_listing, venue_detail
+
+# ----------------------------------------------------------------------------#
+# Read-only JSON API.
+#
+# Every response carries a strong ETag, and a request whose If-None-Match
+# matches gets a bare 304 without anything being serialized. Listings compute
+# it from the ids and version_id of the rows of their page. Detail endpoints
+# use the ETag computed with the page data when it was cached (cache.py,
+# queries.detail_data), so a 304 for a cached page runs no query at all, and
+# the ETag describes exactly what a client was sent.
+# ----------------------------------------------------------------------------#
+
+api = Blueprint('api', __name__, url_prefix='/api/v1')
+
+
+def _default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(repr(value))
+
+
+def conditional(etag, build):
+    # 304 if the client already holds etag, else the JSON of build()
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        response = Response(json.dumps(build(), default=_default), mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+def _detail(data):
+    if data is None:
+        abort(404)
+    return conditional(data["etag"], lambda: {k: v for k, v in data.items() if k not in ("genre_mask", "etag")})
+
+
+def _listing(name, page, serialize, versions):
+    etag = row_etag(name, page.prev, page.next, [versions(row) for row in page.items])
+    return conditional(etag, lambda: {"data": [serialize(row) for row in page.items],
+                                      "next": page.next,
+                                      "prev": page.prev})
+
+
+def _entity(row):
+    return {"id": row.id, "name": row.name, "city": row.city, "state": row.state,
+            "genres": mask_to_genres(row.genre_mask), "image_link": row.image_link}
+
+
+@api.route('/artists')
+def artists():
+    data = Artist.query.with_entities(Artist.id, Artist.name, Artist.city, Artist.state, Artist.genre_mask,
+                                      Artist.image_link, Artist.version_id).filter(Artist.archived_at.is_(None))
+    page = paginate(data, [Artist.name, Artist.id])
+    return _listing('artists', page, _entity, lambda row: (row.id, row.version_id))
+
+
+@api.route('/artists/<int:artist_id>')
+def artist(artist_id):
+    return _detail(artist_detail(artist_id))
+
+
+@api.route('/venues')
+def venues():
+    data = Venue.query.with_entities(Venue.id, Venue.name, Venue.city, Venue.state, Venue.genre_mask,
+                                     Venue.image_link, Venue.version_id).filter(Venue.archived_at.is_(None))
+    page = paginate(data, [Venue.name, Venue.id])
+    return _listing('venues', page, _entity, lambda row: (row.id, row.version_id))
+
+
+@api.route('/venues/<int:venue_id>')
+def venue(venue_id):
+    return _detail(venue_detail(venue_id))
+
+
+@api.route('/shows')
+def shows():
+    data = show_listing().add_columns(Show.version_id,
+                                      Artist.version_id.label("artist_version_id"),
+                                      Venue.version_id.label("venue_version_id"))
+    page = paginate(data, [Show.start_time, Show.id])
+    fields = ("id", "artist_id", "artist_name", "artist_image_link", "venue_id", "venue_name",
+              "venue_image_link", "start_time")
+    return _listing('shows', page, lambda row: {f: getattr(row, f) for f in fields},
+                    lambda row: (row.id, row.version_id, row.artist_version_id, row.venue_version_id))
+
+
+@api.errorhandler(400)
+@api.errorhandler(404)
+def api_error(error):
+    return jsonify(error=error.name, status=error.code), error.code
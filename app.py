@@ -3,45 +3,168 @@
 # ----------------------------------------------------------------------------#
 
 import logging
-import re
+from functools import lru_cache
+from itertools import groupby
 from logging import Formatter, FileHandler
 
-import babel
 import dateutil.parser
-from flask import render_template, request, flash, redirect, url_for, abort
-from sqlalchemy import and_
+from babel import Locale
+from babel.dates import parse_pattern
+from flask import render_template, request, flash, redirect, url_for, abort, jsonify
 
 from config import *
 from forms import *
 from models.Artist import Artist
 from models.Show import Show
 from models.Venue import Venue
+import search
+from pagination import paginate
+from genres import GENRE_BITS, has_genres, mask_to_genres
+from queries import artist_detail, venue_detail, escape_like, show_listing, show_search, shows_at, invalidate_pages
+from feed import feed
+from typeahead import names, typeahead
+from api import api
+from export import export
+from importer import import_command
+from pool import pool_status
+from instrumentation import init_instrumentation
+from counters import init_counters
+from assets import init_assets
+from partitions import init_partitions
+from replicas import init_replicas, replica_binds
+from gazetteer import geocode
+from geocode import geocode_command, within
+from tours import double_bookings, tours, tours_command
+from archive import delete_listing, init_archive
 
 # ----------------------------------------------------------------------------#
 # Filters.
 # ----------------------------------------------------------------------------#
 
+DATETIME_FORMATS = {
+    'full': parse_pattern("EEEE MMMM, d, y 'at' h:mma"),
+    'medium': parse_pattern("EE MM, dd, y h:mma"),
+}
+DATETIME_LOCALE = Locale.parse('en')
+
+
+@lru_cache(maxsize=4096)
+def _format_datetime(value, format):
+    # pages repeat the same timestamps a lot (one per show tile), so formatted strings are memoized
+    pattern = DATETIME_FORMATS.get(format) or parse_pattern(format)
+    return pattern.apply(value, DATETIME_LOCALE)
+
+
 def format_datetime(value, format='medium'):
-    date = dateutil.parser.parse(value)
-    if format == 'full':
-        format = "EEEE MMMM, d, y 'at' h:mma"
-    elif format == 'medium':
-        format = "EE MM, dd, y h:mma"
-    return babel.dates.format_datetime(date, format, locale='en')
+    # takes the datetime straight from the row, strings are still parsed for older callers
+    if not isinstance(value, datetime):
+        value = dateutil.parser.parse(value)
+    return _format_datetime(value, format)
 
 
 app.jinja_env.filters['datetime'] = format_datetime
 
 
+# ----------------------------------------------------------------------------#
+# Listing filters.
+# ----------------------------------------------------------------------------#
+
+def requested_genres():
+    # ?genre= values of the request, 400 for a genre outside the forms' vocabulary
+    genres = request.args.getlist('genre')
+    if any(genre not in GENRE_BITS for genre in genres):
+        abort(400)
+    return genres
+
+
+def requested_time(name):
+    # datetime of the ?name= argument ("21:00" is today at 21:00), None if absent, 400 if unparsable
+    value = request.args.get(name, '').strip()
+    if not value:
+        return None
+    try:
+        return dateutil.parser.parse(value)
+    except (ValueError, OverflowError):
+        abort(400)
+
+
+def requested_number(name, low, high):
+    # float of the ?name= argument within [low, high], None if absent, 400 otherwise
+    value = request.args.get(name, '').strip()
+    if not value:
+        return None
+    try:
+        number = float(value)
+    except ValueError:
+        abort(400)
+    if not low <= number <= high:
+        abort(400)
+    return number
+
+
+def requested_point():
+    # (latitude, longitude) of ?lat=&lng= or of the ?near= "City, ST", None if neither is given.
+    # 400 for a half given or out of range point and for a place the gazetteer doesn't know
+    lat, lng = requested_number('lat', -90, 90), requested_number('lng', -180, 180)
+    if lat is not None and lng is not None:
+        return lat, lng
+    if lat is not None or lng is not None:
+        abort(400)
+    near = request.args.get('near', '').split(',')
+    if len(near) == 2:
+        point = geocode(*near)
+        if point is not None:
+            return point
+    if near != ['']:
+        abort(400)
+    return None
+
+
+def after_commit(*updates):
+    # bring the page cache, the home page feed and the typeahead in line with a committed write. the write
+    # stands whatever happens here, so a failing update is logged and left to their timeouts and reloads
+    for update in updates:
+        try:
+            update()
+        except Exception:
+            app.logger.exception('updating after a write failed')
+
+
 # ----------------------------------------------------------------------------#
 # Controllers.
 # ----------------------------------------------------------------------------#
 
+# read-only JSON API under /api/v1, see api.py
+app.register_blueprint(api)
+# streaming CSV/NDJSON dumps under /export, see export.py
+app.register_blueprint(export)
+# /typeahead?q= over artist and venue names, see typeahead.py
+app.register_blueprint(typeahead)
+# `flask import artists|venues|shows FILE`, see importer.py
+app.cli.add_command(import_command)
+# POST /shows/bulk and `flask tours book FILE`, see tours.py
+app.register_blueprint(tours)
+app.cli.add_command(tours_command)
+# `flask geocode venues`, see geocode.py
+app.cli.add_command(geocode_command)
+# query counts and timings per request when SQL_INSTRUMENTATION=1, see instrumentation.py
+init_instrumentation(app)
+# upcoming/past show counters rolled forward before requests, `flask counters roll|reconcile`, see counters.py
+init_counters(app)
+# fingerprinted, precompressed bundles under /assets, `flask assets build`, see assets.py
+init_assets(app)
+# monthly partitions of "Show" on PostgreSQL created ahead of time, `flask partitions ensure`, see partitions.py
+init_partitions(app)
+# reads of GET requests on DATABASE_REPLICA_URLS, writers pinned to the primary for a while, see replicas.py
+init_replicas(app)
+# deleted venues and artists cascade to their shows or are archived (DELETE_MODE), `flask archive run`,
+# see archive.py
+init_archive(app)
+
+
 @app.route('/')
 def index():
-    venues= Venue.query.order_by(Venue.created_at.desc()).limit(10).all()
-    artists = Artist.query.order_by(Artist.created_at.desc()).limit(10).all()
-    return render_template('pages/home.html', artists= artists, venues=venues)
+    return render_template('pages/home.html', artists=feed.get(Artist), venues=feed.get(Venue))
 
 
 #  Venues
@@ -49,39 +172,39 @@ def index():
 
 @app.route('/venues')
 def venues():
-    # replace with real venues data.
-    #       num_upcoming_shows should be aggregated based on number of upcoming shows per venue.
-    data = Venue.query.with_entities(Venue.city, Venue.state).distinct().all()
-    data = [dict(x) for x in data]
-    for area in data:
-        venues = Venue.query.with_entities(Venue.id, Venue.name).filter_by(city=area["city"], state=area["state"]).all()
-        venues = [dict(v) for v in venues]
-        for venue in venues:
-            num = Show.query.filter_by(venue_id=venue["id"]).filter(Show.start_time>datetime.utcnow()).count()
-            venue["num_upcoming_show"] = num
-        area["venues"] = venues
-    return render_template('pages/venues.html', areas=data)
+    # one single-table query with the maintained upcoming show counts (see counters.py), grouped by area in python
+    # optional ?state= and ?city= narrow the directory down to a single area, ?genre= to venues with that genre
+    data = Venue.query.with_entities(Venue.city, Venue.state, Venue.id, Venue.name,
+                                     Venue.upcoming_shows_count.label("num_upcoming_show")) \
+        .filter(Venue.archived_at.is_(None))
+    state = request.args.get('state', '').strip()
+    city = request.args.get('city', '').strip()
+    genres = requested_genres()
+    if genres:
+        data = data.filter(has_genres(Venue.genre_mask, genres))
+    if state:
+        data = data.filter(Venue.state.ilike(escape_like(state), escape='\\'))
+    if city:
+        data = data.filter(Venue.city.ilike(escape_like(city), escape='\\'))
+    data = data.order_by(Venue.state, Venue.city, Venue.id).all()
+
+    areas = []
+    for (area_city, area_state), venues in groupby(data, key=lambda v: (v.city, v.state)):
+        areas.append({"city": area_city,
+                      "state": area_state,
+                      "venues": [{"id": v.id, "name": v.name, "num_upcoming_show": v.num_upcoming_show}
+                                 for v in venues]})
+    return render_template('pages/venues.html', areas=areas)
 
 
 @app.route('/venues/search', methods=['POST'])
 def search_venues():
-    #  implement search on artists with partial string search. Ensure it is case-insensitive.
-    # seach for Hop should return "The Musical Hop".
+    # ranked full-text search on name, city, genres and description (see search.py), case-insensitive.
+    # search for "Hop" should return "The Musical Hop".
     # search for "Music" should return "The Musical Hop" and "Park Square Live Music & Coffee"
     # extra search by city and state
     term = request.form.get('search_term', '')
-    state = term.split(",")
-    data = Venue.query.filter(Venue.name.ilike("%{}%".format(term)))
-    if (len(state) == 2):
-        data = data.union_all(
-            Venue.query.filter(Venue.city.ilike(state[0].strip()), Venue.state.ilike(state[1].strip())))
-
-    data = data.with_entities(Venue.id, Venue.name).all()
-    print(data)
-    data = [dict(v) for v in data]
-    for artist in data:
-        num = Show.query.filter_by(venue_id=artist["id"]).filter(Show.start_time > datetime.utcnow()).count()
-        artist["num_upcoming_show"] = num
+    data = search.search(Venue, term)
     response = {"count": len(data),
                 "data": data}
     return render_template('pages/search_venues.html', results=response,
@@ -91,29 +214,9 @@ def search_venues():
 @app.route('/venues/<int:venue_id>')
 def show_venue(venue_id):
     # shows the venue page with the given venue_id
-    # replace with real venue data from the venues table, using venue_id
-    data = Venue.query.get(venue_id)
-    data = data.__dict__
-    past_shows = Show.query.filter_by(venue_id=venue_id).filter(Show.start_time<datetime.utcnow()).with_entities(Show.artist_id,
-                                                                 Artist.name.label("artist_name"),
-                                                                 Artist.image_link.label("artist_image_link"),
-                                                                 Show.start_time).join(Artist).all()
-    past_shows = [dict(s) for s in past_shows]
-    for s in past_shows:
-        s["start_time"] = str(s["start_time"])
-    data["past_shows"] = past_shows
-
-    upcoming_shows = Show.query.filter_by(venue_id=venue_id).filter(Show.start_time>datetime.utcnow()).with_entities(Show.artist_id,
-                                                                 Artist.name.label("artist_name"),
-                                                                 Artist.image_link.label("artist_image_link"),
-                                                                 Show.start_time).join(Artist).all()
-    upcoming_shows = [dict(s) for s in upcoming_shows]
-    for s in upcoming_shows:
-        s["start_time"] = str(s["start_time"])
-    data["upcoming_shows"] = upcoming_shows
-    data["genres"] = data["genres"].split(",")
-    data["upcoming_shows_count"] = len(data["upcoming_shows"])
-    data["past_shows_count"] = len(data["past_shows"])
+    data = venue_detail(venue_id)
+    if data is None:
+        abort(404)
     return render_template('pages/show_venue.html', venue=data)
 
 
@@ -152,6 +255,8 @@ def create_venue_submission():
         except:
             db.session.rollback()
             flash('An error occurred. Venue ' + form.name.data + ' could not be listed.')
+        else:
+            after_commit(lambda: feed.add(Venue, venue), lambda: names.put(Venue, venue))
         finally:
             db.session.close()
     else:
@@ -163,54 +268,56 @@ def create_venue_submission():
 
 
 
-@app.route('/venues/<venue_id>', methods=['DELETE'])
+@app.route('/venues/<int:venue_id>', methods=['DELETE'])
 def delete_venue(venue_id):
     # Complete this endpoint for taking a venue_id, and using
     # SQLAlchemy ORM to delete a record. Handle cases where the session commit could fail.
+    # the database cascades the delete to the venue's shows, or the venue is archived (DELETE_MODE), see archive.py
+    return delete_submission(Venue, venue_id)
+    #  Implement a button to delete a Venue on a Venue Page, have it so that
+    # clicking that button delete it from the db then redirect the user to the homepage
+
+
+def delete_submission(model, entity_id):
     try:
-        venue = Venue.query.get(venue_id)
-        name = venue.name
-        db.session.delete(venue)
-        db.session.commit()
-        flash('Venue ' + name + ' was successfully deleted!')
+        name = delete_listing(model, entity_id)
+        if name is None:
+            flash('{} {} was not found.'.format(model.__name__, entity_id))
+        else:
+            flash('{} {} was successfully deleted!'.format(model.__name__, name))
     except:
-        flash('An error occurred. Venue ' + name + ' could not be deleted.')
         db.session.rollback()
+        flash('An error occurred. {} {} could not be deleted.'.format(model.__name__, entity_id))
     finally:
         db.session.close()
-    #  Implement a button to delete a Venue on a Venue Page, have it so that
-    # clicking that button delete it from the db then redirect the user to the homepage
-        return redirect(url_for("index"))
+    return redirect(url_for("index"))
 
 
 #  Artists
 #  ----------------------------------------------------------------
 @app.route('/artists')
 def artists():
-    #  replace with real data returned from querying the database
-    data = Artist.query.with_entities(Artist.id, Artist.name).all()
-    return render_template('pages/artists.html', artists=data)
+    # one page of artists ordered by (name, id), see pagination.py
+    # optional ?genre= (repeatable) keeps only artists having every given genre,
+    # ?available_at= only those whose availability covers that time
+    data = Artist.query.with_entities(Artist.id, Artist.name).filter(Artist.archived_at.is_(None))
+    genres = requested_genres()
+    if genres:
+        data = data.filter(has_genres(Artist.genre_mask, genres))
+    available_at = requested_time('available_at')
+    if available_at is not None:
+        data = data.filter(Artist.available_at(available_at))
+    page = paginate(data, [Artist.name, Artist.id])
+    return render_template('pages/artists.html', artists=page.items, page=page)
 
 
 @app.route('/artists/search', methods=['POST'])
 def search_artists():
-    #  implement search on artists with partial string search. Ensure it is case-insensitive.
-    # seach for "A" should return "Guns N Petals", "Matt Quevado", and "The Wild Sax Band".
-    # search for "band" should return "The Wild Sax Band".
+    # ranked full-text search on name, city, genres and description (see search.py), case-insensitive.
+    # words match by prefix: search for "band" should return "The Wild Sax Band".
     # extra search by city and state
     term = request.form.get('search_term', '')
-    state = term.split(",")
-    data = Artist.query.filter(Artist.name.ilike("%{}%".format(term)))
-    if (len(state) == 2):
-        data = data.union_all(
-            Artist.query.filter(Artist.city.ilike(state[0].strip()), Artist.state.ilike(state[1].strip())))
-
-    data = data.with_entities(Artist.id, Artist.name).all()
-    print(data)
-    data = [dict(v) for v in data]
-    for artist in data:
-        num = Show.query.filter_by(artist_id=artist["id"]).filter(Show.start_time > datetime.utcnow()).count()
-        artist["num_upcoming_show"] = num
+    data = search.search(Artist, term)
     response = {"count": len(data),
                 "data": data}
     return render_template('pages/search_artists.html', results=response,
@@ -220,47 +327,27 @@ def search_artists():
 @app.route('/artists/<int:artist_id>')
 def show_artist(artist_id):
     # shows the artist page with the given artist_id
-    #  replace with real artist data from the artist table, using artist_id
-    data = Artist.query.get(artist_id)
+    data = artist_detail(artist_id)
     if (data is None):
         abort(404)
-    data = data.__dict__
-    past_shows = Show.query.filter_by(artist_id=artist_id).filter(Show.start_time<datetime.utcnow()).with_entities(Show.venue_id,
-                                                                                         Venue.name.label("venue_name"),
-                                                                                         Venue.image_link.label(
-                                                                                             "venue_image_link"),
-                                                                                         Show.start_time).join(Venue).all()
-    past_shows = [dict(s) for s in past_shows]
-    for s in past_shows:
-        s["start_time"] = str(s["start_time"])
-    data["past_shows"] = past_shows
-
-    upcoming_shows = Show.query.filter_by(artist_id=artist_id).filter(Show.start_time>datetime.utcnow()).with_entities(Show.venue_id,
-                                                                                            Venue.name.label(
-                                                                                                "venue_name"),
-                                                                                            Venue.image_link.label(
-                                                                                                "venue_image_link"),
-                                                                                            Show.start_time).join(
-        Venue).all()
-    upcoming_shows = [dict(s) for s in upcoming_shows]
-    for s in upcoming_shows:
-        s["start_time"] = str(s["start_time"])
-    data["past_shows"] = past_shows
-    data["upcoming_shows"] = upcoming_shows
-    data["genres"] = data["genres"].split(",")
-    data["upcoming_shows_count"] = len(data["upcoming_shows"])
-    data["past_shows_count"] = len(data["past_shows"])
     return render_template('pages/show_artist.html', artist=data)
 
 
+@app.route('/artists/<int:artist_id>', methods=['DELETE'])
+def delete_artist(artist_id):
+    # like delete_venue: the artist's shows and availability windows go with it, or it is archived
+    return delete_submission(Artist, artist_id)
+
+
 #  Update
 #  ----------------------------------------------------------------
 @app.route('/artists/<int:artist_id>/edit', methods=['GET'])
 def edit_artist(artist_id):
     artist = Artist.query.get(artist_id)
-    if (artist is None):
+    if (artist is None or artist.archived_at is not None):
         abort(404)
     form = ArtistForm(obj=artist)
+    form.genres.data = mask_to_genres(artist.genre_mask)
     #populate form with fields from artist with ID <artist_id>
     return render_template('forms/edit_artist.html', form=form, artist=artist)
 
@@ -269,10 +356,12 @@ def edit_artist(artist_id):
 def edit_artist_submission(artist_id):
     #  take values from the form submitted, and update existing
     # artist record with ID <artist_id> using the new attributes
+    artist = Artist.query.get(artist_id)
+    if artist is None or artist.archived_at is not None:
+        abort(404)
     form = ArtistForm(request.form)
     if form.validate():
         try:
-            artist = Artist.query.get(artist_id)
             artist.name=form.name.data.strip()
             artist.city=form.city.data.strip()
             artist.state=form.state.data.strip()
@@ -291,6 +380,11 @@ def edit_artist_submission(artist_id):
         except:
             db.session.rollback()
             flash('An error occurred. Artist ' + form.name.data + ' could not be edited.')
+        else:
+            # venue pages list the artist's name and image next to its shows
+            after_commit(lambda: invalidate_pages([artist_id], [v for (v,) in db.session.query(Show.venue_id)
+                                                                .filter_by(artist_id=artist_id).distinct()]),
+                         lambda: feed.discard(Artist), lambda: names.put(Artist, artist))
         finally:
             db.session.close()
     else:
@@ -302,9 +396,10 @@ def edit_artist_submission(artist_id):
 @app.route('/venues/<int:venue_id>/edit', methods=['GET'])
 def edit_venue(venue_id):
     venue = Venue.query.get(venue_id)
-    if venue is None:
+    if venue is None or venue.archived_at is not None:
         abort(404)
     form = VenueForm(obj=venue)
+    form.genres.data = mask_to_genres(venue.genre_mask)
     #  populate form with values from venue with ID <venue_id>
     return render_template('forms/edit_venue.html', form=form, venue=venue)
 
@@ -313,10 +408,12 @@ def edit_venue(venue_id):
 def edit_venue_submission(venue_id):
     #  take values from the form submitted, and update existing
     # venue record with ID <venue_id> using the new attributes
+    venue = Venue.query.get(venue_id)
+    if venue is None or venue.archived_at is not None:
+        abort(404)
     form = VenueForm(request.form)
     if form.validate():
         try:
-            venue = Venue.query.get(venue_id)
             venue.name=form.name.data.strip()
             venue.city=form.city.data.strip()
             venue.state=form.state.data.strip()
@@ -336,6 +433,11 @@ def edit_venue_submission(venue_id):
         except:
             db.session.rollback()
             flash('An error occurred. Venue ' + form.name.data + ' could not be edited.')
+        else:
+            # artist pages list the venue's name and image next to its shows
+            after_commit(lambda: invalidate_pages([a for (a,) in db.session.query(Show.artist_id)
+                                                   .filter_by(venue_id=venue_id).distinct()], [venue_id]),
+                         lambda: feed.discard(Venue), lambda: names.put(Venue, venue))
         finally:
             db.session.close()
     else:
@@ -381,6 +483,8 @@ def create_artist_submission():
         except:
             db.session.rollback()
             flash('An error occurred. Artist ' + form.name.data + ' could not be listed.')
+        else:
+            after_commit(lambda: feed.add(Artist, artist), lambda: names.put(Artist, artist))
         finally:
             db.session.close()
     else:
@@ -397,18 +501,31 @@ def create_artist_submission():
 
 @app.route('/shows')
 def shows():
-    # displays list of shows at /shows
-    #  replace with real venues data.
-    data = Show.query.with_entities(Show.artist_id, Show.venue_id, Artist.name.label("artist_name"),
-                                    Artist.image_link.label("artist_image_link"), Show.start_time,
-                                    Venue.name.label("venue_name"), Venue.image_link.label("venue_image_link")).join(
-        Artist).join(Venue).all()
+    # displays one page of shows at /shows, ordered by (start_time, id), see pagination.py.
+    # ?from= / ?to= limit it to shows starting in [from, to)
+    page = paginate(show_listing(requested_time('from'), requested_time('to')), [Show.start_time, Show.id])
+
+    data = [dict(x) for x in page.items]
+
+    return render_template('pages/shows.html', shows=data, page=page)
+
+
+@app.route('/shows/near')
+def shows_near():
+    # upcoming shows at the venues within ?radius= miles of ?lat=&lng= or of ?near=City, ST, one page
+    # ordered by (start_time, id) like /shows. the venues come from the (latitude, longitude) index
+    # with an exact distance check, see geocode.py
+    point = requested_point()
+    radius = requested_number('radius', 0, app.config['NEAR_MAX_RADIUS']) or app.config['NEAR_RADIUS']
+    if point is None:
+        return render_template('pages/shows_near.html', shows=[], page=None, radius=radius)
+    distances = within(Venue, point[0], point[1], radius)
+    page = paginate(shows_at(distances, requested_time('from') or datetime.utcnow(), requested_time('to')),
+                    [Show.start_time, Show.id])
 
-    data = [dict(x) for x in data]
-    for x in data:
-        x["start_time"] = str(x["start_time"])
+    data = [dict(x, distance=distances[x.venue_id]) for x in page.items]
 
-    return render_template('pages/shows.html', shows=data)
+    return render_template('pages/shows_near.html', shows=data, page=page, radius=radius)
 
 
 @app.route('/shows/create')
@@ -423,23 +540,29 @@ def create_show_submission():
     # called to create new shows in the db, upon submitting new show listing form
     # insert form data as a new Show record in the db, instead
     form = ShowForm(request.form)
-    artist= Artist.query.get(form.artist_id.data)
-    if artist is not None:
-        error = False
-        if (artist.availability is not None):
-            s = "(0[0-9]|1[0-9]|2[0-3]):([0-5][0-9])"
-            s = s + "-" + s
-            times = re.findall(s, artist.availability)
-            start= form.start_time.data
-            for time in times:
-                begin = datetime.replace(start, hour=int(time[0]), minute=int(time[1]))
-                end = datetime.replace(start, hour=int(time[2]), minute=int(time[3]))
-                if start > begin and start < end:
-                    error=True
-            if error==False:
-                flash("The artist isn't available at that time")
-                return(redirect(url_for('create_shows')))
+    # archived artists and venues take no new shows, see archive.py
+    if str(form.artist_id.data).isdigit() and form.start_time.data is not None:
+        # one indexed query against the artist's parsed availability windows, None if there is no such artist
+        available = db.session.query(Artist.available_at(form.start_time.data)) \
+            .filter(Artist.id == int(form.artist_id.data), Artist.archived_at.is_(None)).first()
+        if available is None:
+            flash('Artist {} was not found.'.format(form.artist_id.data))
+            return(redirect(url_for('create_shows')))
+        if not available[0]:
+            flash("The artist isn't available at that time")
+            return(redirect(url_for('create_shows')))
+    if str(form.venue_id.data).isdigit() and db.session.query(Venue.id) \
+            .filter(Venue.id == int(form.venue_id.data), Venue.archived_at.is_(None)).first() is None:
+        flash('Venue {} was not found.'.format(form.venue_id.data))
+        return(redirect(url_for('create_shows')))
     if form.validate():
+        if str(form.artist_id.data).isdigit() and str(form.venue_id.data).isdigit():
+            clashes = double_bookings({'artist_id': int(form.artist_id.data), 'venue_id': int(form.venue_id.data),
+                                       'start_time': form.start_time.data})
+            if clashes:
+                for message in clashes:
+                    flash(message.capitalize())
+                return(redirect(url_for('create_shows')))
         try:
             show= Show(start_time = form.start_time.data,
                 venue_id = form.venue_id.data,
@@ -450,9 +573,16 @@ def create_show_submission():
             flash('Show was successfully listed!')
     # on unsuccessful db insert, flash an error instead.
         except:
+            db.session.rollback()
             flash('An error occurred. Show could not be listed.')
     # e.g., flash('An error occurred. Show could not be listed.')
     # see: http://flask.pocoo.org/docs/1.0/patterns/flashing/
+        else:
+            artist_id, venue_id = int(form.artist_id.data), int(form.venue_id.data)
+            after_commit(lambda: invalidate_pages([artist_id], [venue_id]))
+            if form.start_time.data > datetime.utcnow():
+                # typeahead ranks by upcoming shows
+                after_commit(lambda: names.count(Artist, artist_id, 1), lambda: names.count(Venue, venue_id, 1))
         finally:
             db.session.close()
     else:
@@ -467,34 +597,27 @@ def search_shows():
     # search for 2020-07-06 gives all shows during that date
 
     term = request.form.get('search_term', '')
-
-    try:
-        day = datetime.strptime(term, '%Y-%m-%d')
-        new_day = day.replace(hour=23, minute=59)
-        data = Show.query.filter(and_(Show.start_time > day, Show.start_time < new_day))
-    except ValueError:
-        loc = term.split(",")
-        if (len(loc)==2):
-            data = Show.query.filter(Venue.city.ilike(loc[0].strip()), Venue.state.ilike(loc[1].strip()))
-        else:
-            data= []
-
-    if not isinstance(data, list):
-        data = data.join(Artist).join(Venue).with_entities(Show.artist_id, Show.venue_id, Artist.name.label("artist_name"),
-                                                       Artist.image_link.label("artist_image_link"), Show.start_time,
-                                                       Venue.name.label("venue_name"),
-                                                       Venue.image_link.label("venue_image_link")).all()
-
-        data = [dict(v) for v in data]
-        for v in data:
-            v["start_time"]= str(v["start_time"])
-        response = {"count": len(data),
+    statement = show_search(term)
+    data = [dict(v) for v in db.session.execute(statement)] if statement is not None else []
+    response = {"count": len(data),
                 "data": data}
 
     return render_template('pages/show.html', results=response,
                            search_term=request.form.get('search_term', ''))
 
 
+#  Metrics
+#  ----------------------------------------------------------------
+
+@app.route('/metrics/pool')
+def pool_metrics():
+    # connection pool usage of this worker process, see pool.py
+    data = pool_status(db.engine)
+    if replica_binds(app):
+        data["replicas"] = {bind: pool_status(db.get_engine(app, bind=bind)) for bind in replica_binds(app)}
+    return jsonify(data)
+
+
 @app.errorhandler(404)
 def not_found_error(error):
     return render_template('errors/404.html'), 404
@@ -0,0 +1,148 @@
+import threading
+import time
+from datetime import datetime
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import or_, select
+
+from config import app, db
+from counters import count_shows, discount_shows
+from feed import feed
+from models.Artist import Artist
+from models.Show import Show
+from models.ShowArchive import ShowArchive
+from models.Venue import Venue
+from queries import DETAIL_SHOWS, invalidate_pages
+from typeahead import names
+
+# ----------------------------------------------------------------------------#
+# Deleting venues and artists.
+#
+# DELETE_MODE picks what DELETE /venues/<id> and /artists/<id> do:
+#   cascade -- (default) a single DELETE of the venue or artist row; the
+#              database drops its shows (and an artist's availability
+#              windows) through ON DELETE CASCADE foreign keys, after one
+#              aggregate query took those shows off the other side's show
+#              counters. Nothing is loaded row by row into the ORM.
+#   archive -- the row only gets archived_at set, which hides it from the
+#              listings, searches, detail pages, feeds and exports at once.
+#              A background thread of the worker then moves its shows to
+#              ShowArchive, ARCHIVE_BATCH per transaction, so no transaction
+#              holds a busy venue's shows for long. Every worker also checks
+#              for shows left to move at most once per ARCHIVE_INTERVAL
+#              seconds before a request (0 turns that off), and
+#              `flask archive run` moves them from a scheduler.
+# ----------------------------------------------------------------------------#
+
+MODES = ('cascade', 'archive')
+
+
+def archived_shows():
+    # predicate of the shows whose venue or artist is archived
+    return or_(Show.venue_id.in_(select([Venue.id]).where(Venue.archived_at.isnot(None))),
+               Show.artist_id.in_(select([Artist.id]).where(Artist.archived_at.isnot(None))))
+
+
+def archive_batch(connection, size):
+    # move up to size shows of archived venues and artists to ShowArchive, returns how many moved
+    statement = select([Show.id, Show.start_time, Show.venue_id, Show.artist_id]).where(archived_shows()).limit(size)
+    if connection.dialect.name == 'postgresql':
+        # two workers draining at once take different shows
+        statement = statement.with_for_update(skip_locked=True)
+    shows = [dict(row) for row in connection.execute(statement)]
+    if not shows:
+        return 0
+    now = datetime.utcnow()
+    connection.execute(ShowArchive.__table__.insert(), [dict(show, archived_at=now) for show in shows])
+    connection.execute(Show.__table__.delete().where(Show.id.in_([show['id'] for show in shows])))
+    count_shows(connection, shows, -1)
+    return len(shows)
+
+
+def archive_shows(size):
+    # move every show of archived venues and artists, a transaction per batch, returns how many moved
+    moved = 0
+    while True:
+        with db.engine.begin() as connection:
+            n = archive_batch(connection, size)
+        if not n:
+            return moved
+        moved += n
+
+
+class Archiver(object):
+    # per worker mover of the shows of archived listings, in a background thread
+
+    def __init__(self, interval, size):
+        self.interval = interval
+        self.size = size
+        self.next_check = 0.0
+        self._running = threading.Lock()
+
+    def __call__(self):
+        # before requests: pick up listings archived through other workers, or left half moved
+        if not self.interval or time.monotonic() < self.next_check:
+            return
+        self.next_check = time.monotonic() + self.interval
+        self.wake()
+
+    def wake(self):
+        if self._running.acquire(False):
+            threading.Thread(target=self._run, daemon=True).start()
+
+    def _run(self):
+        try:
+            with app.app_context():
+                archive_shows(self.size)
+        finally:
+            self._running.release()
+
+
+archiver = Archiver(app.config['ARCHIVE_INTERVAL'], app.config['ARCHIVE_BATCH'])
+
+
+def delete_listing(model, entity_id):
+    # delete or archive (DELETE_MODE) a venue or artist. Returns its name, None when there is no such listing
+    column, _, other_id, _ = DETAIL_SHOWS[model.__name__]
+    table = model.__table__
+    row = db.session.query(model.name).filter(model.id == entity_id, model.archived_at.is_(None)).first()
+    if row is None:
+        return None
+    # the detail pages listing shows with it
+    others = [i for (i,) in db.session.query(other_id).filter(column == entity_id).distinct()]
+    archiving = app.config['DELETE_MODE'] == 'archive'
+    if archiving:
+        db.session.execute(table.update().where(table.c.id == entity_id)
+                           .values(archived_at=datetime.utcnow(), version_id=table.c.version_id + 1))
+    else:
+        discount_shows(db.session.connection(), column, [entity_id])
+        db.session.execute(table.delete().where(table.c.id == entity_id))
+    db.session.commit()
+    if model is Artist:
+        invalidate_pages([entity_id], others)
+    else:
+        invalidate_pages(others, [entity_id])
+    feed.discard(model)
+    names.remove(model, entity_id)
+    if archiving:
+        archiver.wake()
+    return row.name or ''
+
+
+def init_archive(app):
+    if app.config['DELETE_MODE'] not in MODES:
+        raise ValueError('Unknown DELETE_MODE {!r}'.format(app.config['DELETE_MODE']))
+    app.before_request(archiver)
+    app.cli.add_command(archive_command)
+
+
+archive_command = AppGroup('archive', help='Move the shows of archived venues and artists to ShowArchive.')
+
+
+@archive_command.command('run')
+@click.option('--batch-size', type=int, help='shows per transaction, default ARCHIVE_BATCH')
+def run_command(batch_size):
+    """Move every show of archived venues and artists to ShowArchive."""
+    moved = archive_shows(batch_size or app.config['ARCHIVE_BATCH'])
+    click.echo('{} shows archived'.format(moved))
@@ -0,0 +1,301 @@
+import asyncio
+import contextvars
+import functools
+import io
+import random
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from flask import g, render_template, request
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+from werkzeug.exceptions import HTTPException
+
+import app as wsgi  # every route, filter and hook of the Flask app
+import search
+from cache import artist_key, venue_key
+from config import app, cache
+from models.Artist import Artist
+from models.Show import Show
+from models.Venue import Venue
+from pagination import keyset
+from feed import feed
+from queries import detail_data, detail_statements, rollover_timeout, show_listing, show_search
+from replicas import reads_from_replica
+
+# ----------------------------------------------------------------------------#
+# Async serving mode: `uvicorn asgi:application --workers 4`.
+#
+# An ASGI application serving the read routes (/, /artists/<id>,
+# /venues/<id>, /shows and the three searches) on an async SQLAlchemy engine
+# (asyncpg on PostgreSQL, aiosqlite on SQLite), so a worker keeps serving
+# other requests while it waits on the database. Independent queries of one
+# page, such as a detail page's entity, past shows and upcoming shows, run
+# concurrently on separate pooled connections. They share their statements,
+# templates and page cache with the Flask views. The blocking parts of a
+# request (the Flask app's before and after request hooks, the page cache
+# and template rendering) run in a thread of the default executor, never on
+# the event loop. Every other route is handed to the Flask app in a thread,
+# so one server can take all of the traffic. Reads go to
+# DATABASE_REPLICA_URLS like the Flask app's, see replicas.py.
+# ----------------------------------------------------------------------------#
+
+ASYNC_DRIVERS = {'postgresql': 'postgresql+asyncpg', 'sqlite': 'sqlite+aiosqlite'}
+
+
+def async_engine_options(config, uri=None):
+    # the DB_* settings of config.py for the async drivers, see pool.py for the sync ones.
+    # uri defaults to the primary database
+    url = make_url(uri or config['SQLALCHEMY_DATABASE_URI'])
+    backend = url.get_backend_name()
+    url = url.set(drivername=ASYNC_DRIVERS[backend])
+    if backend != 'postgresql':
+        return url, {}
+    options = {"pool_pre_ping": config['DB_POOL_PRE_PING'], "pool_recycle": config['DB_POOL_RECYCLE']}
+    if config['DB_POOL_SIZE'] == 0:
+        options["poolclass"] = NullPool
+    else:
+        options.update(pool_size=config['DB_POOL_SIZE'], max_overflow=config['DB_MAX_OVERFLOW'],
+                       pool_timeout=config['DB_POOL_TIMEOUT'])
+    connect_args = {}
+    if config['DB_PGBOUNCER']:
+        # transaction pooling hands each transaction any server connection, prepared statements can't be cached
+        connect_args["statement_cache_size"] = 0
+        url = url.update_query_dict({"prepared_statement_cache_size": "0"})
+    elif config['DB_STATEMENT_TIMEOUT_MS']:
+        connect_args["server_settings"] = {"statement_timeout": str(config['DB_STATEMENT_TIMEOUT_MS'])}
+    if connect_args:
+        options["connect_args"] = connect_args
+    return url, options
+
+
+_url, _options = async_engine_options(app.config)
+engine = create_async_engine(_url, **_options)
+# DATABASE_REPLICA_URLS, picked from like replicas.py does for db.session
+replicas = [create_async_engine(url, **options) for url, options in
+            [async_engine_options(app.config, uri) for uri in app.config['DATABASE_REPLICA_URLS']]]
+
+
+def reader():
+    # the engine serving the current request: one of the replicas unless the client wrote recently
+    if 'async_reader' not in g:
+        g.async_reader = random.choice(replicas) if reads_from_replica(app) else engine
+    return g.async_reader
+
+
+async def in_thread(func, *args, **kwargs):
+    # func(*args, **kwargs) in a thread of the default executor, inside the current request context
+    call = functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+    return await asyncio.get_running_loop().run_in_executor(None, call)
+
+
+async def fetch(statement):
+    # every row of statement, on a connection of its own; None stands for a statement that does not apply
+    if statement is None:
+        return []
+    async with reader().connect() as connection:
+        return (await connection.execute(statement)).fetchall()
+
+
+async def fetch_all(*statements):
+    # the rows of each statement, run concurrently
+    return await asyncio.gather(*[fetch(s) for s in statements])
+
+
+#  Views
+#  ----------------------------------------------------------------
+
+async def index():
+    venues, artists = await in_thread(feed.cached, Venue), await in_thread(feed.cached, Artist)
+    if venues is None or artists is None:
+        rows = await fetch_all(feed.statement(Venue), feed.statement(Artist))
+        venues, artists = await in_thread(feed.fill, Venue, rows[0]), await in_thread(feed.fill, Artist, rows[1])
+    return await in_thread(render_template, 'pages/home.html', artists=artists, venues=venues)
+
+
+async def _detail(model, key, entity_id):
+    # queries.artist_detail / venue_detail with the three statements in flight at once
+    data = await in_thread(cache.get, key)
+    if data is None:
+        entity, past, upcoming = await fetch_all(*detail_statements(model, entity_id, datetime.utcnow()))
+        if not entity:
+            return None
+        data = detail_data(entity[0], past, upcoming)
+        await in_thread(cache.set, key, data, rollover_timeout(data["upcoming_shows"]))
+    return data
+
+
+async def show_artist(artist_id):
+    data = await _detail(Artist, artist_key(artist_id), artist_id)
+    if data is None:
+        return await in_thread(render_template, 'errors/404.html'), 404
+    return await in_thread(render_template, 'pages/show_artist.html', artist=data)
+
+
+async def show_venue(venue_id):
+    data = await _detail(Venue, venue_key(venue_id), venue_id)
+    if data is None:
+        return await in_thread(render_template, 'errors/404.html'), 404
+    return await in_thread(render_template, 'pages/show_venue.html', venue=data)
+
+
+async def shows():
+    listing = show_listing(wsgi.requested_time('from'), wsgi.requested_time('to'))
+    query, page = keyset(listing, [Show.start_time, Show.id])
+    page = page(await fetch(query.statement))
+    return await in_thread(render_template, 'pages/shows.html', shows=[dict(x) for x in page.items], page=page)
+
+
+async def _search(model, template):
+    term = request.form.get('search_term', '')
+    ranked, located = await fetch_all(*search.search_statements(model, term, engine.dialect.name))
+    substring = await fetch(search.substring_statement(model, term)) if not ranked else []
+    data = search.search_results(ranked, located, substring)
+    return await in_thread(render_template, template, results={"count": len(data), "data": data},
+                           search_term=term)
+
+
+async def search_venues():
+    return await _search(Venue, 'pages/search_venues.html')
+
+
+async def search_artists():
+    return await _search(Artist, 'pages/search_artists.html')
+
+
+async def search_shows():
+    term = request.form.get('search_term', '')
+    data = [dict(v) for v in await fetch(show_search(term))]
+    return await in_thread(render_template, 'pages/show.html', results={"count": len(data), "data": data},
+                           search_term=term)
+
+
+# Flask endpoint -> async view; requests are matched against the Flask app's own url map
+VIEWS = {
+    'index': index,
+    'show_artist': show_artist,
+    'show_venue': show_venue,
+    'shows': shows,
+    'search_venues': search_venues,
+    'search_artists': search_artists,
+    'search_shows': search_shows,
+}
+
+
+#  ASGI
+#  ----------------------------------------------------------------
+
+def environ(scope, body):
+    # the WSGI environ of an ASGI http scope, for Flask's request context
+    env = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf8').decode('latin1'),
+        'PATH_INFO': scope['path'].encode('utf8').decode('latin1'),
+        'QUERY_STRING': scope['query_string'].decode('latin1'),
+        'SERVER_PROTOCOL': 'HTTP/' + scope['http_version'],
+        'SERVER_NAME': (scope.get('server') or ('localhost', 80))[0],
+        'SERVER_PORT': str((scope.get('server') or ('localhost', 80))[1]),
+        'REMOTE_ADDR': (scope.get('client') or ('', 0))[0],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope['headers']:
+        name = name.decode('latin1').upper().replace('-', '_')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = 'HTTP_' + name
+        value = value.decode('latin1')
+        env[name] = env[name] + ',' + value if name in env else value
+    return env
+
+
+def _start(status, headers):
+    return {'type': 'http.response.start', 'status': status,
+            'headers': [(k.lower().encode('latin1'), v.encode('latin1')) for k, v in headers]}
+
+
+async def call_wsgi(env, send):
+    # serve env with the Flask app, sending its body chunk by chunk (e.g. /export streams).
+    # the whole response runs on one thread of its own: a streamed body keeps using the connection it opened
+    started = {}
+
+    def start_response(status, headers, exc_info=None):
+        started['status'] = int(status.split(' ', 1)[0])
+        started['headers'] = headers
+
+    loop = asyncio.get_running_loop()
+    with ThreadPoolExecutor(max_workers=1) as thread:
+        chunks = await loop.run_in_executor(thread, app, env, start_response)
+        try:
+            iterator = iter(chunks)
+            chunk = await loop.run_in_executor(thread, next, iterator, None)
+            await send(_start(started['status'], started['headers']))
+            while chunk is not None:
+                if chunk:
+                    await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+                chunk = await loop.run_in_executor(thread, next, iterator, None)
+            await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            if hasattr(chunks, 'close'):
+                await loop.run_in_executor(thread, chunks.close)
+
+
+async def dispatch(env):
+    # an async view's response, or None when the Flask app has to serve env
+    adapter = app.url_map.bind_to_environ(env)
+    try:
+        endpoint, args = adapter.match()
+    except HTTPException:
+        return None
+    view = VIEWS.get(endpoint)
+    if view is None:
+        return None
+    with app.request_context(env):
+        # what Flask's full_dispatch_request does around a view, its hooks in a thread
+        try:
+            try:
+                # before_request hooks, e.g. rolling the counters forward; a hook's response replaces the view's
+                rv = await in_thread(app.preprocess_request)
+                if rv is None:
+                    rv = await view(**args)
+            except Exception as e:
+                rv = await in_thread(app.handle_user_exception, e)
+            # after_request hooks and the session cookie, e.g. consumed flash messages
+            response = await in_thread(lambda: app.process_response(app.make_response(rv)))
+        except Exception as e:
+            response = app.make_response(await in_thread(app.handle_exception, e))
+        # a HEAD response keeps the GET's headers, Content-Length included, without the body
+        body = b'' if env['REQUEST_METHOD'] == 'HEAD' else response.get_data()
+        return response.status_code, list(response.headers.items()), body
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                for e in [engine] + replicas:
+                    await e.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+    body = b''
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            break
+    env = environ(scope, body)
+    result = await dispatch(env)
+    if result is None:
+        return await call_wsgi(env, send)
+    status, headers, body = result
+    await send(_start(status, headers))
+    await send({'type': 'http.response.body', 'body': body})
@@ -0,0 +1,207 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import shutil
+
+import click
+from flask import Blueprint, Response, abort, current_app, request, send_from_directory, url_for
+from flask.cli import AppGroup
+
+try:
+    import brotli
+except ImportError:  # optional, only gzip variants are built without it
+    brotli = None
+
+# ----------------------------------------------------------------------------#
+# Static asset pipeline.
+#
+# `flask assets build` concatenates each bundle of BUNDLES, names the result
+# after a hash of its content (main.3f9c1a2b7e41.css), copies the fonts and
+# images the CSS points at the same way, and writes .gz/.br variants next to
+# them in static/dist, with a manifest of logical -> built names; FILES are
+# fingerprinted on their own. Templates reference assets through
+# static_url('main.css') or static_url('img/front-splash.jpg'); /assets
+# serves the built files precompressed to the client's Accept-Encoding and
+# cacheable forever, so a repeat page load makes no asset requests. Without
+# a build the bundles are concatenated on the fly and not cached, for
+# development.
+# ----------------------------------------------------------------------------#
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+STATIC = os.path.join(ROOT, 'static')
+DIST = os.path.join(STATIC, 'dist')
+MANIFEST = os.path.join(DIST, 'manifest.json')
+
+# bundle -> source files, relative to the repository root, in load order
+BUNDLES = {
+    'main.css': ['static/css/bootstrap.min.css', 'static/css/font-awesome.css', 'static/css/layout.main.css',
+                 'static/css/main.css', 'static/css/main.responsive.css', 'static/css/main.quickfix.css'],
+    'form.css': ['static/css/bootstrap.min.css', 'static/css/font-awesome.css', 'static/css/layout.main.css',
+                 'static/css/layout.forms.css', 'static/css/main.css', 'static/css/main.responsive.css',
+                 'static/css/main.quickfix.css'],
+    # loaded synchronously in <head>
+    'head.js': ['static/js/libs/modernizr-2.8.2.min.js', 'static/js/libs/moment.min.js'],
+    # deferred; bootstrap.js of the npm package matches the 3.4.1 stylesheet
+    'main.js': ['static/js/libs/jquery-1.11.1.min.js', 'node_modules/bootstrap/dist/js/bootstrap.min.js',
+                'static/js/plugins.js', 'static/js/script.js'],
+}
+# single files under static/ templates reference through static_url(), fingerprinted as they are
+FILES = ['img/front-splash.jpg', 'js/libs/respond-1.4.2.min.js']
+# compressing these again gains nothing
+COMPRESSED = ('.woff', '.woff2', '.png', '.jpg', '.jpeg', '.gif', '.webp')
+CSS_URL = re.compile(r'''url\(\s*(['"]?)([^'")]+)\1\s*\)''')
+SOURCE_MAP = re.compile(r'^\s*//[#@] sourceMappingURL=.*$|/\*# sourceMappingURL=.*?\*/', re.M)
+ONE_YEAR = 365 * 24 * 3600
+
+assets = Blueprint('assets', __name__, url_prefix='/assets')
+
+
+def fingerprint(name, data):
+    # main.css -> main.<12 hex digits of its sha256>.css
+    stem, ext = os.path.splitext(name)
+    return '{}.{}{}'.format(stem, hashlib.sha256(data).hexdigest()[:12], ext)
+
+
+def _read(path):
+    with open(os.path.join(ROOT, path), 'rb') as f:
+        return f.read()
+
+
+def _local(css_path, url):
+    # (file under the repository root, ?query/#fragment) a url() of a stylesheet points at, None if not local
+    if url.startswith(('data:', 'http:', 'https:', '//', '#', '/')):
+        return None
+    path, suffix = re.match(r'([^?#]*)(.*)', url).groups()
+    source = os.path.normpath(os.path.join(os.path.dirname(css_path), path))
+    if not os.path.isfile(os.path.join(ROOT, source)):
+        return None
+    return source, suffix
+
+
+def concatenate(name, locate):
+    # the bundle's sources joined into one file, the local url()s of CSS replaced by locate(file)
+    def rewrite(path, match):
+        local = _local(path, match.group(2))
+        url = locate(local[0]) + local[1] if local else match.group(2)
+        return 'url({0}{1}{0})'.format(match.group(1), url)
+
+    parts = []
+    for path in BUNDLES[name]:
+        text = SOURCE_MAP.sub('', _read(path).decode('utf-8'))
+        if name.endswith('.css'):
+            text = CSS_URL.sub(lambda m: rewrite(path, m), text)
+        parts.append(text)
+    # a statement left unterminated at the end of one script must not run into the next
+    return (';\n' if name.endswith('.js') else '\n').join(parts).encode('utf-8')
+
+
+def _write(name, data):
+    with open(os.path.join(DIST, name), 'wb') as f:
+        f.write(data)
+    if name.endswith(COMPRESSED):
+        return
+    variants = [('.gz', gzip.compress(data, 9, mtime=0))]
+    if brotli is not None:
+        variants.append(('.br', brotli.compress(data, quality=11)))
+    for suffix, compressed in variants:
+        if len(compressed) < len(data):
+            with open(os.path.join(DIST, name + suffix), 'wb') as f:
+                f.write(compressed)
+
+
+def build():
+    # rebuild static/dist from scratch, returns the manifest
+    shutil.rmtree(DIST, ignore_errors=True)
+    os.makedirs(DIST)
+    manifest = {}
+
+    def add_file(source):
+        # fingerprint a file, keyed by its path under static/ like static_url() names it; returns the built name
+        key = os.path.relpath(source, 'static').replace(os.sep, '/')
+        if key not in manifest:
+            data = _read(source)
+            manifest[key] = fingerprint(os.path.basename(source), data)
+            _write(manifest[key], data)
+        return manifest[key]
+
+    for name in FILES:
+        add_file(os.path.join('static', name))
+    for name in BUNDLES:
+        # built files all sit in static/dist, so a stylesheet refers to the fonts and images by bare name
+        data = concatenate(name, add_file)
+        manifest[name] = fingerprint(name, data)
+        _write(manifest[name], data)
+    with open(MANIFEST, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+def load_manifest():
+    try:
+        with open(MANIFEST) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def static_url(name):
+    # URL of a bundle or of a file under static/
+    built = current_app.extensions['assets'].get(name)
+    if built is not None:
+        return url_for('assets.asset', filename=built)
+    if name in BUNDLES:
+        return url_for('assets.asset', filename=name)
+    return url_for('static', filename=name)
+
+
+def _encoding(filename):
+    # (Content-Encoding, file suffix) of the best precompressed variant the client accepts
+    for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+        if request.accept_encodings[encoding] and os.path.isfile(os.path.join(DIST, filename + suffix)):
+            return encoding, suffix
+    return None, ''
+
+
+@assets.route('/<filename>')
+def asset(filename):
+    if filename in current_app.extensions['assets'].values():
+        encoding, suffix = _encoding(filename)
+        response = send_from_directory(DIST, filename + suffix, mimetype=mimetypes.guess_type(filename)[0],
+                                       download_name=filename, max_age=ONE_YEAR)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
+    if filename in BUNDLES:
+        # not built: development
+        data = concatenate(filename, lambda source: url_for('static', filename=os.path.relpath(source, 'static')))
+        response = Response(data, mimetype=mimetypes.guess_type(filename)[0])
+        response.cache_control.no_cache = True
+        return response
+    abort(404)
+
+
+def init_assets(app):
+    app.extensions['assets'] = load_manifest()
+    app.register_blueprint(assets)
+    app.add_template_global(static_url)
+    app.cli.add_command(assets_command)
+
+
+assets_command = AppGroup('assets', help='Build the fingerprinted, precompressed static bundles.')
+
+
+@assets_command.command('build')
+def build_command():
+    """Bundle, fingerprint and precompress the static assets into static/dist."""
+    manifest = build()
+    current_app.extensions['assets'] = manifest
+    for name in sorted(BUNDLES):
+        click.echo('{} -> {}'.format(name, manifest[name]))
+    if brotli is None:
+        click.echo('brotli is not installed, only gzip variants were written')
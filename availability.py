@@ -0,0 +1,58 @@
+import re
+
+# ----------------------------------------------------------------------------#
+# Artist availability windows.
+#
+# Artist.availability is free text of space separated HH:mm-HH:mm windows,
+# each optionally prefixed with a weekday ("Fri 20:00-23:59"), an empty
+# string meaning available at all times. It is parsed once when written into
+# ArtistAvailability rows of (artist_id, weekday, start_minute, end_minute),
+# weekday None for every day, so bookings check availability with one
+# indexed query instead of parsing strings.
+# ----------------------------------------------------------------------------#
+
+WEEKDAYS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+WINDOW = re.compile(r'(?:({})\s+)?(0[0-9]|1[0-9]|2[0-3]):([0-5][0-9])-(0[0-9]|1[0-9]|2[0-3]):([0-5][0-9])'
+                    .format('|'.join(WEEKDAYS)), re.IGNORECASE)
+SEPARATORS = re.compile(r'[\s,]*')
+
+
+def _window(match):
+    day, start_hour, start_minute, end_hour, end_minute = match.groups()
+    weekday = [d.lower() for d in WEEKDAYS].index(day.lower()) if day else None
+    return weekday, int(start_hour) * 60 + int(start_minute), int(end_hour) * 60 + int(end_minute)
+
+
+def parse_availability(text):
+    # (weekday, start_minute, end_minute) per window of text. Raises ValueError for anything else in text.
+    windows = []
+    position = 0
+    for match in WINDOW.finditer(text):
+        if not SEPARATORS.fullmatch(text, position, match.start()):
+            raise ValueError('unexpected {!r}'.format(text[position:match.start()].strip()))
+        window = _window(match)
+        if window[2] <= window[1]:
+            raise ValueError('{} ends before it starts'.format(match.group(0)))
+        windows.append(window)
+        position = match.end()
+    if not SEPARATORS.fullmatch(text, position):
+        raise ValueError('unexpected {!r}'.format(text[position:].strip()))
+    return windows
+
+
+def availability_windows(text):
+    # the well-formed windows of text, anything else is ignored so legacy strings never fail a write
+    return [w for w in (_window(m) for m in WINDOW.finditer(text or '')) if w[1] < w[2]]
+
+
+def minute_of_day(start):
+    return start.hour * 60 + start.minute
+
+
+def covers(windows, start):
+    # whether a show starting at start falls strictly inside one of windows. No windows: available at all times.
+    if not windows:
+        return True
+    minute = minute_of_day(start)
+    return any((weekday is None or weekday == start.weekday()) and begin < minute < end
+               for weekday, begin, end in windows)
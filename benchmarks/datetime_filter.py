@@ -0,0 +1,68 @@
+"""Per-tile cost of the `datetime` Jinja filter.
+
+Compares the old path (routes stringify start_time, the filter re-parses it
+with dateutil and formats through babel.dates.format_datetime) with the
+current one (native datetime, precompiled pattern, memoized result), on a
+page of show tiles where timestamps repeat the way real listings do.
+
+    python benchmarks/datetime_filter.py --tiles 5000
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import babel.dates
+import dateutil.parser
+
+from app import _format_datetime, format_datetime
+
+
+def old_format_datetime(value, format='medium'):
+    date = dateutil.parser.parse(value)
+    if format == 'full':
+        format = "EEEE MMMM, d, y 'at' h:mma"
+    elif format == 'medium':
+        format = "EE MM, dd, y h:mma"
+    return babel.dates.format_datetime(date, format, locale='en')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tiles', type=int, default=5000)
+    parser.add_argument('--distinct', type=int, default=500, help='distinct start times among the tiles')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    rnd = random.Random(7)
+    base = datetime(2026, 1, 1, 20, 0)
+    times = [base + timedelta(days=rnd.randint(0, 365), minutes=30 * rnd.randint(0, 8)) for _ in range(args.distinct)]
+    tiles = [rnd.choice(times) for _ in range(args.tiles)]
+    strings = [str(t) for t in tiles]
+
+    for t, s in zip(tiles[:50], strings[:50]):
+        assert format_datetime(t, 'full') == old_format_datetime(s, 'full')
+        assert format_datetime(t, 'medium') == old_format_datetime(s, 'medium')
+
+    def cold():
+        _format_datetime.cache_clear()
+        for t in tiles:
+            _format_datetime.__wrapped__(t, 'full')
+
+    runs = [
+        ("str + dateutil + babel.format_datetime", lambda: [old_format_datetime(s, 'full') for s in strings]),
+        ("datetime + compiled pattern", cold),
+        ("datetime + compiled pattern, memoized", lambda: [format_datetime(t, 'full') for t in tiles]),
+    ]
+    print("%d tiles, %d distinct start times" % (args.tiles, args.distinct))
+    for name, run in runs:
+        best = min(timeit.repeat(run, number=1, repeat=args.repeat))
+        print("%-42s %8.2f us/tile  %8.1f ms/page" % (name, best * 1e6 / args.tiles, best * 1e3))
+
+
+if __name__ == '__main__':
+    main()
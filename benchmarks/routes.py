@@ -0,0 +1,345 @@
+"""Route load benchmark.
+
+Replays a weighted mix of the site's routes, the pages, searches, forms and
+JSON API, and prints p50/p95/p99 latency per route and overall throughput.
+Requests go through the Flask test client in this process, or over HTTP to
+a running server with --url. The mix is drawn from --seed, so every run
+replays the same requests. Write routes are left out with --read-only and
+always in --url mode, since they need CSRF tokens there; DELETE is never
+replayed. Every route of the app is in the mix; a run through the test
+client lists any it leaves out.
+
+    python benchmarks/dataset.py --artists 100000 --venues 20000 --shows 2000000
+    python benchmarks/routes.py --requests 5000 --concurrency 4 --save-baseline baseline.json
+    python benchmarks/routes.py --requests 5000 --concurrency 4 --baseline baseline.json
+
+With --baseline the run fails (exit status 1) when the chosen percentile of
+a route exceeds its baseline by more than --tolerance and --slack-ms. Set
+CACHE_TYPE=null to measure the detail pages without the page cache.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+import warnings
+from datetime import datetime, timedelta
+from urllib.error import HTTPError
+from urllib.parse import urlencode, urlsplit
+from urllib.request import HTTPRedirectHandler, Request, build_opener
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, func, select
+
+import dataset
+from dataset import CITIES, GENRE_WEIGHTS, Picker, popularity
+
+
+class Context(object):
+    # what the request builders draw ids and search terms from
+
+    def __init__(self, rnd, db):
+        from models.Artist import Artist
+        from models.Show import Show
+        from models.Venue import Venue
+        with create_engine(db).connect() as conn:
+            self.artists = conn.execute(select([func.max(Artist.__table__.c.id)])).scalar() or 1
+            self.venues = conn.execute(select([func.max(Venue.__table__.c.id)])).scalar() or 1
+            first, last = conn.execute(select([func.min(Show.__table__.c.start_time),
+                                               func.max(Show.__table__.c.start_time)])).first()
+        self.rnd = rnd
+        self.first_show, self.last_show = first, last
+        # dataset.py makes low ids the popular ones, so popular pages get most of the traffic
+        self.artist_id = Picker(rnd, range(1, self.artists + 1), popularity(self.artists))
+        self.venue_id = Picker(rnd, range(1, self.venues + 1), popularity(self.venues, 0.8))
+        self.now = datetime.utcnow()
+
+    def city(self):
+        city, state, _ = self.rnd.choice(CITIES)
+        return city, state
+
+    def day(self):
+        if self.first_show is None:
+            return self.now.strftime('%Y-%m-%d')
+        span = (self.last_show - self.first_show).days
+        return (self.first_show + timedelta(days=self.rnd.randint(0, max(span, 0)))).strftime('%Y-%m-%d')
+
+    def word(self):
+        return self.rnd.choice(dataset.ADJECTIVES + dataset.NOUNS + dataset.LAST_NAMES + dataset.VENUE_KINDS)
+
+
+def _artist_form(ctx):
+    record = next(dataset.artists(ctx.rnd, 1, ctx.now))
+    return {"name": record["name"], "city": record["city"], "state": record["state"], "phone": record["phone"],
+            "genres": record["genres"].split(","), "image_link": record["image_link"],
+            "facebook_link": record["facebook_link"], "website_link": "", "seeking_description": "",
+            "availability": record["availability"], "seeking_venue": "y" if record["seeking_venue"] else ""}
+
+
+def _venue_form(ctx):
+    from gazetteer import geocode
+    record = next(dataset.venues(ctx.rnd, 1, ctx.now, geocode))
+    return {"name": record["name"], "city": record["city"], "state": record["state"],
+            "address": record["address"], "phone": record["phone"], "genres": record["genres"].split(","),
+            "image_link": record["image_link"], "facebook_link": record["facebook_link"], "website_link": "",
+            "seeking_description": "", "seeking_talent": "y" if record["seeking_talent"] else ""}
+
+
+def _show_form(ctx):
+    day = datetime.strptime(ctx.day(), '%Y-%m-%d').replace(hour=21)
+    return {"artist_id": str(ctx.artist_id()[0]), "venue_id": str(ctx.venue_id()[0]),
+            "start_time": day.strftime('%Y-%m-%d %H:%M:%S')}
+
+
+def _location(ctx):
+    return '%s, %s' % ctx.city()
+
+
+def _tour(ctx):
+    # a week of shows for one artist, a JSON list
+    day = datetime.strptime(ctx.day(), '%Y-%m-%d').replace(hour=21)
+    artist_id = ctx.artist_id()[0]
+    return [{"artist_id": artist_id, "venue_id": ctx.venue_id()[0],
+             "start_time": (day + timedelta(days=i)).strftime('%Y-%m-%d %H:%M:%S')} for i in range(7)]
+
+
+# (name, weight, method, write, build(ctx) -> (url, form data, a JSON list or None))
+ROUTES = [
+    ('GET /', 10, 'GET', False, lambda ctx: ('/', None)),
+    ('GET /venues', 2, 'GET', False, lambda ctx: ('/venues', None)),
+    ('GET /venues?state=', 4, 'GET', False, lambda ctx: ('/venues?' + urlencode({"state": ctx.city()[1]}), None)),
+    ('GET /venues?genre=', 2, 'GET', False,
+     lambda ctx: ('/venues?' + urlencode({"genre": ctx.rnd.choice(list(GENRE_WEIGHTS)),
+                                          "state": ctx.city()[1]}), None)),
+    ('GET /venues/<id>', 12, 'GET', False, lambda ctx: ('/venues/%d' % ctx.venue_id()[0], None)),
+    ('POST /venues/search', 4, 'POST', False,
+     lambda ctx: ('/venues/search', {"search_term": ctx.word() if ctx.rnd.random() < 0.7 else _location(ctx)})),
+    ('GET /artists', 8, 'GET', False, lambda ctx: ('/artists', None)),
+    ('GET /artists?genre=', 3, 'GET', False,
+     lambda ctx: ('/artists?' + urlencode({"genre": ctx.rnd.choice(list(GENRE_WEIGHTS))}), None)),
+    ('GET /artists/<id>', 15, 'GET', False, lambda ctx: ('/artists/%d' % ctx.artist_id()[0], None)),
+    ('POST /artists/search', 4, 'POST', False,
+     lambda ctx: ('/artists/search', {"search_term": ctx.word() if ctx.rnd.random() < 0.7 else _location(ctx)})),
+    ('GET /shows', 8, 'GET', False, lambda ctx: ('/shows', None)),
+    ('POST /shows/search', 3, 'POST', False,
+     lambda ctx: ('/shows/search', {"search_term": ctx.day() if ctx.rnd.random() < 0.5 else _location(ctx)})),
+    ('GET /venues/create', 1, 'GET', False, lambda ctx: ('/venues/create', None)),
+    ('GET /artists/create', 1, 'GET', False, lambda ctx: ('/artists/create', None)),
+    ('GET /shows/create', 1, 'GET', False, lambda ctx: ('/shows/create', None)),
+    ('GET /artists/<id>/edit', 1, 'GET', False, lambda ctx: ('/artists/%d/edit' % ctx.artist_id()[0], None)),
+    ('GET /venues/<id>/edit', 1, 'GET', False, lambda ctx: ('/venues/%d/edit' % ctx.venue_id()[0], None)),
+    ('GET /api/v1/artists', 2, 'GET', False, lambda ctx: ('/api/v1/artists', None)),
+    ('GET /api/v1/artists/<id>', 3, 'GET', False, lambda ctx: ('/api/v1/artists/%d' % ctx.artist_id()[0], None)),
+    ('GET /api/v1/venues', 2, 'GET', False, lambda ctx: ('/api/v1/venues', None)),
+    ('GET /api/v1/venues/<id>', 2, 'GET', False, lambda ctx: ('/api/v1/venues/%d' % ctx.venue_id()[0], None)),
+    ('GET /api/v1/shows', 2, 'GET', False, lambda ctx: ('/api/v1/shows', None)),
+    ('GET /shows?from=', 3, 'GET', False,
+     lambda ctx: ('/shows?' + urlencode({"from": ctx.day(), "to": ctx.day()}), None)),
+    ('GET /shows/near', 4, 'GET', False,
+     lambda ctx: ('/shows/near?' + urlencode({"near": _location(ctx), "radius": ctx.rnd.choice([5, 25, 100])}),
+                  None)),
+    ('GET /typeahead', 6, 'GET', False,
+     lambda ctx: ('/typeahead?' + urlencode({"q": ctx.word()[:ctx.rnd.randint(1, 4)]}), None)),
+    ('GET /export/<name>.<fmt>', 1, 'GET', False,
+     lambda ctx: ('/export/%s.%s?%s' % (ctx.rnd.choice(['shows', 'artists', 'venues']),
+                                        ctx.rnd.choice(['csv', 'ndjson']),
+                                        urlencode({"since": ctx.day(), "until": ctx.day()})), None)),
+    ('GET /assets/<bundle>', 1, 'GET', False,
+     lambda ctx: ('/assets/' + ctx.rnd.choice(['main.css', 'form.css', 'head.js', 'main.js']), None)),
+    ('GET /static/<path>', 1, 'GET', False, lambda ctx: ('/static/img/front-splash.jpg', None)),
+    ('GET /metrics/pool', 1, 'GET', False, lambda ctx: ('/metrics/pool', None)),
+    ('POST /artists/create', 1, 'POST', True, lambda ctx: ('/artists/create', _artist_form(ctx))),
+    ('POST /venues/create', 1, 'POST', True, lambda ctx: ('/venues/create', _venue_form(ctx))),
+    ('POST /shows/create', 1, 'POST', True, lambda ctx: ('/shows/create', _show_form(ctx))),
+    ('POST /shows/bulk', 1, 'POST', True, lambda ctx: ('/shows/bulk', _tour(ctx))),
+    ('POST /artists/<id>/edit', 1, 'POST', True,
+     lambda ctx: ('/artists/%d/edit' % ctx.artist_id()[0], _artist_form(ctx))),
+    ('POST /venues/<id>/edit', 1, 'POST', True,
+     lambda ctx: ('/venues/%d/edit' % ctx.venue_id()[0], _venue_form(ctx))),
+]
+
+
+def schedule(ctx, count, read_only, names=None):
+    # count (name, method, url, data) requests drawn from the weighted mix, or from the routes in names
+    routes = [r for r in ROUTES if not (read_only and r[3]) and (names is None or r[0] in names)]
+    pick = Picker(ctx.rnd, routes, [r[1] for r in routes])
+    requests = []
+    for name, _, method, _, build in pick(count):
+        url, data = build(ctx)
+        requests.append((name, method, url, data))
+    return requests
+
+
+def unlisted(app, ctx):
+    # (rule, method) of the app's routes no ROUTES entry requests, DELETE aside
+    adapter = app.url_map.bind('localhost')
+    listed = set()
+    for _, _, method, _, build in ROUTES:
+        endpoint, _ = adapter.match(urlsplit(build(ctx)[0]).path, method)
+        listed.add((endpoint, method))
+    return sorted((rule.rule, method) for rule in app.url_map.iter_rules()
+                  for method in rule.methods - {'HEAD', 'OPTIONS', 'DELETE'} if (rule.endpoint, method) not in listed)
+
+
+class TestClientTarget(object):
+
+    def __init__(self):
+        from config import app
+        import app as _routes  # registers the routes on app
+        app.config['WTF_CSRF_ENABLED'] = False
+        # render errors as 500 pages like a server would, instead of raising them into the benchmark
+        app.config['PROPAGATE_EXCEPTIONS'] = False
+        self.app = app
+        self.local = threading.local()
+
+    def __call__(self, method, url, data):
+        if not hasattr(self.local, 'client'):
+            self.local.client = self.app.test_client()
+        if isinstance(data, list):
+            return self.local.client.open(url, method=method, json=data).status_code
+        return self.local.client.open(url, method=method, data=data).status_code
+
+
+class _NoRedirect(HTTPRedirectHandler):
+
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class HTTPTarget(object):
+
+    def __init__(self, base):
+        self.base = base.rstrip('/')
+        self.opener = build_opener(_NoRedirect)
+
+    def __call__(self, method, url, data):
+        headers = {}
+        if isinstance(data, list):
+            body = json.dumps(data).encode()
+            headers['Content-Type'] = 'application/json'
+        else:
+            body = urlencode(data, doseq=True).encode() if data is not None else None
+        try:
+            with self.opener.open(Request(self.base + url, data=body, headers=headers, method=method)) as response:
+                response.read()
+                return response.status
+        except HTTPError as error:
+            return error.code
+
+
+def run(target, requests, concurrency):
+    # (per route latencies in seconds, per route error count, wall time)
+    timings, errors = {}, {}
+    lock = threading.Lock()
+
+    def worker(share):
+        for name, method, url, data in share:
+            start = time.perf_counter()
+            status = target(method, url, data)
+            elapsed = time.perf_counter() - start
+            with lock:
+                timings.setdefault(name, []).append(elapsed)
+                errors[name] = errors.get(name, 0) + (status >= 500)
+
+    threads = [threading.Thread(target=worker, args=(requests[i::concurrency],)) for i in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return timings, errors, time.perf_counter() - start
+
+
+def percentile(ordered, p):
+    # nearest-rank percentile of an ascending list
+    return ordered[max(int(round(p / 100.0 * len(ordered))) - 1, 0)]
+
+
+def summarize(timings, errors):
+    summary = {}
+    for name, values in timings.items():
+        ordered = sorted(values)
+        summary[name] = {"count": len(ordered), "errors": errors[name],
+                         "p50": percentile(ordered, 50) * 1000,
+                         "p95": percentile(ordered, 95) * 1000,
+                         "p99": percentile(ordered, 99) * 1000}
+    return summary
+
+
+def regressions(summary, baseline, metric, tolerance, slack_ms):
+    found = []
+    for name, stats in sorted(summary.items()):
+        base = baseline.get(name)
+        if base is not None and stats[metric] > base[metric] * (1 + tolerance) + slack_ms:
+            found.append((name, base[metric], stats[metric]))
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', default='sqlite:///bench.db', help='database the app (or --url server) reads')
+    parser.add_argument('--url', help='benchmark a running server instead of the test client')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--warmup', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=1)
+    parser.add_argument('--read-only', action='store_true')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--generate', action='store_true',
+                        help='recreate --db with dataset.py first, using --artists, --venues and --shows')
+    parser.add_argument('--artists', type=int, default=2000)
+    parser.add_argument('--venues', type=int, default=400)
+    parser.add_argument('--shows', type=int, default=40000)
+    parser.add_argument('--save-baseline', metavar='FILE')
+    parser.add_argument('--baseline', metavar='FILE')
+    parser.add_argument('--metric', choices=['p50', 'p95', 'p99'], default='p95')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed relative slowdown')
+    parser.add_argument('--slack-ms', type=float, default=2.0, help='allowed absolute slowdown')
+    args = parser.parse_args()
+
+    # keep library deprecation warnings out of the report
+    warnings.simplefilter('ignore', DeprecationWarning)
+    # config.py reads DATABASE_URL on import
+    os.environ['DATABASE_URL'] = args.db
+    if args.generate:
+        dataset.generate(create_engine(args.db), args.artists, args.venues, args.shows, args.seed)
+
+    rnd = random.Random(args.seed)
+    ctx = Context(rnd, args.db)
+    target = HTTPTarget(args.url) if args.url else TestClientTarget()
+    read_only = args.read_only or bool(args.url)
+    run(target, schedule(ctx, args.warmup, read_only), args.concurrency)
+    timings, errors, wall = run(target, schedule(ctx, args.requests, read_only), args.concurrency)
+    summary = summarize(timings, errors)
+
+    print("%-28s %7s %7s %9s %9s %9s" % ("route", "count", "errors", "p50 ms", "p95 ms", "p99 ms"))
+    for name, stats in sorted(summary.items()):
+        print("%-28s %7d %7d %9.2f %9.2f %9.2f"
+              % (name, stats["count"], stats["errors"], stats["p50"], stats["p95"], stats["p99"]))
+    print("\n%d requests in %.1fs, %.1f requests/s, concurrency %d"
+          % (args.requests, wall, args.requests / wall, args.concurrency))
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(summary, f, indent=2, sort_keys=True)
+        print("baseline written to %s" % args.save_baseline)
+
+    if isinstance(target, TestClientTarget):
+        for rule, method in unlisted(target.app, ctx):
+            print("not benchmarked: %s %s" % (method, rule))
+
+    failed = sum(stats["errors"] for stats in summary.values()) > 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        for name, before, after in regressions(summary, baseline, args.metric, args.tolerance, args.slack_ms):
+            print("REGRESSION %s %s: %.2f ms -> %.2f ms" % (name, args.metric, before, after))
+            failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# ----------------------------------------------------------------------------#
+# Page data cache.
+#
+# Detail pages cache the dict they hand to their template under
+# `artist:<id>` / `venue:<id>`. Every route that writes an artist, venue or
+# show deletes exactly the keys whose pages display the changed rows, and
+# entries also expire when their next upcoming show starts, so shows move
+# from upcoming to past on time. The backend is picked by CACHE_TYPE:
+#   lru    -- per-process LRU dict (default)
+#   sqlite -- a sqlite file shared by every worker on the host
+#   null   -- caching disabled
+# ----------------------------------------------------------------------------#
+
+
+def artist_key(artist_id):
+    return 'artist:{}'.format(artist_id)
+
+
+def venue_key(venue_id):
+    return 'venue:{}'.format(venue_id)
+
+
+class NullCache(object):
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, timeout=None):
+        pass
+
+    def delete(self, *keys):
+        pass
+
+    def clear(self):
+        pass
+
+
+class LRUCache(NullCache):
+
+    def __init__(self, size=1024, default_timeout=300):
+        self.size = size
+        self.default_timeout = default_timeout
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires <= time.time():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout=None):
+        timeout = self.default_timeout if timeout is None else timeout
+        if timeout <= 0:
+            return
+        with self._lock:
+            self._items[key] = (time.time() + timeout, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._items.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+class SQLiteCache(NullCache):
+
+    def __init__(self, path, default_timeout=300):
+        self.path = path
+        self.default_timeout = default_timeout
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, expires REAL, value BLOB)')
+
+    def _connect(self):
+        # a short-lived connection per call keeps this safe across threads and processes
+        return sqlite3.connect(self.path, timeout=5)
+
+    def get(self, key):
+        with self._connect() as conn:
+            row = conn.execute('SELECT expires, value FROM cache WHERE key = ?', (key,)).fetchone()
+        if row is None or row[0] <= time.time():
+            return None
+        return pickle.loads(row[1])
+
+    def set(self, key, value, timeout=None):
+        timeout = self.default_timeout if timeout is None else timeout
+        if timeout <= 0:
+            return
+        with self._connect() as conn:
+            conn.execute('INSERT OR REPLACE INTO cache (key, expires, value) VALUES (?, ?, ?)',
+                         (key, time.time() + timeout, pickle.dumps(value, pickle.HIGHEST_PROTOCOL)))
+            conn.execute('DELETE FROM cache WHERE expires <= ?', (time.time(),))
+
+    def delete(self, *keys):
+        if keys:
+            with self._connect() as conn:
+                conn.executemany('DELETE FROM cache WHERE key = ?', [(key,) for key in keys])
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute('DELETE FROM cache')
+
+
+def make_cache(config):
+    kind = config.get('CACHE_TYPE', 'lru')
+    timeout = config.get('CACHE_DEFAULT_TIMEOUT', 300)
+    if kind == 'lru':
+        return LRUCache(config.get('CACHE_LRU_SIZE', 1024), timeout)
+    if kind == 'sqlite':
+        return SQLiteCache(config.get('CACHE_SQLITE_PATH', os.path.abspath('cache.sqlite3')), timeout)
+    if kind == 'null':
+        return NullCache()
+    raise ValueError('Unknown CACHE_TYPE {!r}'.format(kind))
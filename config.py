@@ -3,9 +3,13 @@ import os
 from flask import Flask
 from flask_migrate import Migrate
 from flask_moment import Moment
-from flask_sqlalchemy import SQLAlchemy
 
-SECRET_KEY = os.urandom(32)
+from cache import make_cache
+from pool import engine_options, use_local_statement_timeout
+from replicas import RoutingSQLAlchemy
+
+# set SECRET_KEY when running several workers, so they all accept each other's session cookies
+SECRET_KEY = os.getenv('SECRET_KEY') or os.urandom(32)
 # Grabs the folder where the script runs.
 basedir = os.path.abspath(os.path.dirname(__file__))
 
@@ -21,9 +25,96 @@ DB_NAME = os.getenv('DB_NAME', 'fyuurdb')
 DB_PATH = 'postgresql+psycopg2://{}:{}@{}/{}'.format(DB_USER, DB_PASSWORD, DB_HOST, DB_NAME)
 
 #  IMPLEMENT DATABASE URL
-SQLALCHEMY_DATABASE_URI= DB_PATH
+# DATABASE_URL overrides the DB_* settings with a full SQLAlchemy URL
+SQLALCHEMY_DATABASE_URI= os.getenv('DATABASE_URL', DB_PATH)
 SQLALCHEMY_TRACK_MODIFICATIONS = True
 
+# Connection pool, see pool.py. DB_POOL_SIZE=0 turns client side pooling off.
+# DB_PGBOUNCER=1 when connecting through PgBouncer in transaction pooling mode.
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '10'))
+DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', '30'))
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '1800'))
+DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', '1') == '1'
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', '0'))
+DB_PGBOUNCER = os.getenv('DB_PGBOUNCER', '0') == '1'
+
+SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI,
+                                           pool_size=DB_POOL_SIZE,
+                                           max_overflow=DB_MAX_OVERFLOW,
+                                           pool_timeout=DB_POOL_TIMEOUT,
+                                           pool_recycle=DB_POOL_RECYCLE,
+                                           pre_ping=DB_POOL_PRE_PING,
+                                           statement_timeout_ms=DB_STATEMENT_TIMEOUT_MS,
+                                           pgbouncer=DB_PGBOUNCER)
+
+# Read replicas, see replicas.py: comma separated SQLAlchemy URLs, each a bind serving reads of GET requests.
+# A client that wrote reads from the primary for REPLICA_STICKY_SECONDS
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv('DATABASE_REPLICA_URLS', '').split(',') if url.strip()]
+SQLALCHEMY_BINDS = {'replica{}'.format(i): url for i, url in enumerate(DATABASE_REPLICA_URLS)}
+REPLICA_BINDS = sorted(SQLALCHEMY_BINDS)
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', '5'))
+
+# Listing pages (/shows, /artists) are cursor paginated, ?size= can ask for up to MAX_PAGE_SIZE rows
+PAGE_SIZE = int(os.getenv('PAGE_SIZE', '30'))
+MAX_PAGE_SIZE = int(os.getenv('MAX_PAGE_SIZE', '200'))
+
+# Per-request SQL instrumentation, see instrumentation.py
+SQL_INSTRUMENTATION = os.getenv('SQL_INSTRUMENTATION', '0') == '1'
+SQL_DEBUG_FOOTER = os.getenv('SQL_DEBUG_FOOTER', '0') == '1'
+SQL_SLOW_QUERY_MS = float(os.getenv('SQL_SLOW_QUERY_MS', '100'))
+SQL_SLOW_QUERY_LOG = os.getenv('SQL_SLOW_QUERY_LOG', os.path.join(basedir, 'slow_queries.log'))
+SQL_REPEAT_THRESHOLD = int(os.getenv('SQL_REPEAT_THRESHOLD', '10'))
+SQL_SLOWEST = int(os.getenv('SQL_SLOWEST', '5'))
+
+# Seconds between roll-forwards of the upcoming/past show counters in each worker, 0 leaves it to
+# `flask counters roll`, see counters.py
+COUNTER_ROLL_INTERVAL = int(os.getenv('COUNTER_ROLL_INTERVAL', '60'))
+
+# Rows fetched from the database at a time by the /export streams, see export.py
+EXPORT_BATCH = int(os.getenv('EXPORT_BATCH', '1000'))
+
+# Monthly partitions of "Show" kept ready ahead of time on PostgreSQL, and seconds between checks in each
+# worker (0 leaves it to `flask partitions ensure`), see partitions.py
+PARTITION_MONTHS_AHEAD = int(os.getenv('PARTITION_MONTHS_AHEAD', '3'))
+PARTITION_CHECK_INTERVAL = int(os.getenv('PARTITION_CHECK_INTERVAL', '3600'))
+
+# /shows/near radius in miles, default and largest accepted, see geocode.py
+NEAR_RADIUS = float(os.getenv('NEAR_RADIUS', '25'))
+NEAR_MAX_RADIUS = float(os.getenv('NEAR_MAX_RADIUS', '250'))
+# venues in the radius from which shows are looked up by start time rather than venue by venue
+NEAR_SCAN_VENUES = int(os.getenv('NEAR_SCAN_VENUES', '2000'))
+
+# /typeahead matches returned at most, and seconds between reloads of a worker's name index, see typeahead.py
+TYPEAHEAD_LIMIT = int(os.getenv('TYPEAHEAD_LIMIT', '10'))
+TYPEAHEAD_REFRESH = int(os.getenv('TYPEAHEAD_REFRESH', '300'))
+
+# Shows of an artist or at a venue must start at least SHOW_LENGTH_MINUTES apart, and POST /shows/bulk takes
+# up to TOUR_MAX_SHOWS of them at once, see tours.py
+SHOW_LENGTH_MINUTES = int(os.getenv('SHOW_LENGTH_MINUTES', '180'))
+TOUR_MAX_SHOWS = int(os.getenv('TOUR_MAX_SHOWS', '5000'))
+
+# What deleting a venue or artist does, see archive.py: cascade deletes it with its shows, archive hides it
+# and moves its shows to ShowArchive in the background, ARCHIVE_BATCH per transaction. Each worker looks for
+# shows left to move every ARCHIVE_INTERVAL seconds (0 leaves it to `flask archive run`)
+DELETE_MODE = os.getenv('DELETE_MODE', 'cascade')
+ARCHIVE_BATCH = int(os.getenv('ARCHIVE_BATCH', '1000'))
+ARCHIVE_INTERVAL = int(os.getenv('ARCHIVE_INTERVAL', '60'))
+
+# artist and venue search results returned at most, see search.py
+SEARCH_LIMIT = int(os.getenv('SEARCH_LIMIT', '50'))
+
+# Home page feed of the newest venues and artists, see feed.py
+FEED_TYPE = os.getenv('FEED_TYPE', 'memory')
+FEED_SIZE = int(os.getenv('FEED_SIZE', '10'))
+FEED_TIMEOUT = int(os.getenv('FEED_TIMEOUT', '60'))
+
+# Artist and venue detail page cache, see cache.py
+CACHE_TYPE = os.getenv('CACHE_TYPE', 'lru')
+CACHE_DEFAULT_TIMEOUT = int(os.getenv('CACHE_DEFAULT_TIMEOUT', '300'))
+CACHE_LRU_SIZE = int(os.getenv('CACHE_LRU_SIZE', '1024'))
+CACHE_SQLITE_PATH = os.getenv('CACHE_SQLITE_PATH', os.path.join(basedir, 'cache.sqlite3'))
+
 # ----------------------------------------------------------------------------#
 # App Config.
 # ----------------------------------------------------------------------------#
@@ -31,5 +122,8 @@ SQLALCHEMY_TRACK_MODIFICATIONS = True
 app = Flask(__name__)
 moment = Moment(app)
 app.config.from_object('config')
-db = SQLAlchemy(app)
+db = RoutingSQLAlchemy(app)
 migrate = Migrate(app, db)
+if DB_PGBOUNCER and DB_STATEMENT_TIMEOUT_MS:
+    use_local_statement_timeout(DB_STATEMENT_TIMEOUT_MS)
+cache = make_cache(app.config)
@@ -0,0 +1,190 @@
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import and_, bindparam, event, func, select
+
+from config import db
+from models.Artist import Artist
+from models.CounterWatermark import CounterWatermark
+from models.Show import Show
+from models.Venue import Venue
+
+# ----------------------------------------------------------------------------#
+# Maintained show counters.
+#
+# Artist and Venue carry upcoming_shows_count and past_shows_count, so the
+# listings and searches read them instead of counting shows per request.
+# The counters split shows at CounterWatermark.rolled_to, not at "now":
+#   * creating or deleting a Show adjusts its artist's and venue's counters
+#     in the same transaction (ORM events here, importer.py for bulk loads).
+#     Shows the database deletes with their venue or artist (ON DELETE
+#     CASCADE) are taken off with discount_shows() first, see archive.py;
+#   * roll_forward() moves the shows that started since the watermark from
+#     upcoming to past and advances it. Every worker does so at most once per
+#     COUNTER_ROLL_INTERVAL seconds before a request, and
+#     `flask counters roll` does it from a scheduler;
+#   * on PostgreSQL the watermark row is locked until the end of the
+#     transaction reading it: shared by the transactions counting shows
+#     against it, exclusively by the one moving it. A show inserted while the
+#     watermark moves past its start is so either counted at the new
+#     watermark, or committed before the move counts it. SQLite serializes
+#     writing transactions anyway;
+#   * `flask counters reconcile` recounts everything and repairs drift, e.g.
+#     after rows were changed by hand or bypassing the ORM.
+# ----------------------------------------------------------------------------#
+
+COUNTED = ((Artist, Show.artist_id), (Venue, Show.venue_id))
+
+
+def watermark(connection, moving=False):
+    # rolled_to, locked (FOR SHARE, or FOR UPDATE when moving it) until the end of the transaction
+    return connection.execute(select([CounterWatermark.rolled_to]).with_for_update(read=not moving)).scalar()
+
+
+def _adjust(connection, model, deltas, bump=False):
+    # deltas: {(id, upcoming): n}, applied as one executemany; bump also bumps the rows' version_id
+    table = model.__table__
+    statement = table.update().where(table.c.id == bindparam('_id')).values(
+        upcoming_shows_count=table.c.upcoming_shows_count + bindparam('_upcoming'),
+        past_shows_count=table.c.past_shows_count + bindparam('_past'))
+    if bump:
+        statement = statement.values(version_id=table.c.version_id + 1)
+    rows = {}
+    for (entity_id, upcoming), n in deltas.items():
+        if n:
+            row = rows.setdefault(entity_id, {'_id': entity_id, '_upcoming': 0, '_past': 0})
+            row['_upcoming' if upcoming else '_past'] += n
+    if rows:
+        # one row per entity, so a bump counts once
+        connection.execute(statement, list(rows.values()))
+
+
+def count_shows(connection, shows, sign=1):
+    # add (sign=1) or remove (sign=-1) shows, dicts or objects with artist_id, venue_id and start_time
+    rolled_to = watermark(connection)
+    shows = [show if isinstance(show, dict) else
+             {'artist_id': show.artist_id, 'venue_id': show.venue_id, 'start_time': show.start_time}
+             for show in shows]
+    for model, column in COUNTED:
+        deltas = Counter()
+        for show in shows:
+            upcoming = show['start_time'] is not None and show['start_time'] > rolled_to
+            deltas[(show[column.key], upcoming)] += sign
+        _adjust(connection, model, deltas)
+
+
+def discount_shows(connection, column, entity_ids):
+    # take the shows of entity_ids (ids of column, Show.artist_id or Show.venue_id) off the counters, before the
+    # database deletes them without the ORM. One aggregate per counted model instead of loading every show
+    upcoming = (Show.start_time > watermark(connection)).label('upcoming')
+    for model, counted in COUNTED:
+        deltas = Counter()
+        for entity_id, is_upcoming, n in connection.execute(
+                select([counted, upcoming, func.count(Show.id)])
+                .where(column.in_(entity_ids)).group_by(counted, upcoming)):
+            deltas[(entity_id, bool(is_upcoming))] -= n
+        _adjust(connection, model, deltas)
+
+
+@event.listens_for(Show, 'after_insert')
+def count_created_show(mapper, connection, show):
+    count_shows(connection, [show])
+
+
+@event.listens_for(Show, 'before_delete')
+def count_deleted_show(mapper, connection, show):
+    count_shows(connection, [show], -1)
+
+
+def roll_forward(connection, now=None):
+    # move shows that started since the watermark from upcoming to past, returns how many moved.
+    # the lock waits for transactions still counting shows at the old watermark; claiming the new one
+    # first makes concurrent calls from several workers safe: only one moves the shows
+    now = now or datetime.utcnow()
+    rolled_to = watermark(connection, moving=True)
+    if now <= rolled_to:
+        return 0
+    claimed = connection.execute(CounterWatermark.__table__.update()
+                                 .where(CounterWatermark.rolled_to == rolled_to)
+                                 .values(rolled_to=now)).rowcount
+    if not claimed:
+        return 0
+    moved = 0
+    for model, column in COUNTED:
+        started = connection.execute(select([column, func.count(Show.id)])
+                                     .where(and_(Show.start_time > rolled_to, Show.start_time <= now))
+                                     .group_by(column)).fetchall()
+        deltas = Counter()
+        for entity_id, n in started:
+            deltas[(entity_id, True)] -= n
+            deltas[(entity_id, False)] += n
+        # nothing else changes these rows, their version says their counters moved
+        _adjust(connection, model, deltas, bump=True)
+        # every show has one artist and one venue, so both passes move the same shows
+        moved = sum(n for _, n in started)
+    return moved
+
+
+def reconcile(connection, now=None):
+    # recount every artist's and venue's shows at a new watermark, returns the number of rows repaired
+    now = now or datetime.utcnow()
+    watermark(connection, moving=True)
+    connection.execute(CounterWatermark.__table__.update().values(rolled_to=now))
+    repaired = 0
+    for model, column in COUNTED:
+        table = model.__table__
+        shows = select([func.count(Show.id)]).where(column == table.c.id)
+        upcoming = shows.where(Show.start_time > now).scalar_subquery()
+        past = shows.where(Show.start_time <= now).scalar_subquery()
+        repaired += connection.execute(
+            table.update()
+            .where((table.c.upcoming_shows_count != upcoming) | (table.c.past_shows_count != past))
+            .values(upcoming_shows_count=upcoming, past_shows_count=past)).rowcount
+    return repaired
+
+
+class RollForward(object):
+    # per worker throttle for rolling the counters forward before requests
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.next_run = 0.0
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        if not self.interval or time.monotonic() < self.next_run or not self.lock.acquire(False):
+            return
+        try:
+            self.next_run = time.monotonic() + self.interval
+            with db.engine.begin() as connection:
+                roll_forward(connection)
+        finally:
+            self.lock.release()
+
+
+def init_counters(app):
+    app.before_request(RollForward(app.config['COUNTER_ROLL_INTERVAL']))
+    app.cli.add_command(counters_command)
+
+
+counters_command = AppGroup('counters', help='Maintain the upcoming/past show counters of artists and venues.')
+
+
+@counters_command.command('roll')
+def roll_command():
+    """Move shows that started since the last roll from upcoming to past."""
+    with db.engine.begin() as connection:
+        moved = roll_forward(connection)
+    click.echo('{} shows moved from upcoming to past'.format(moved))
+
+
+@counters_command.command('reconcile')
+def reconcile_command():
+    """Recount every artist's and venue's shows and repair drifted counters."""
+    with db.engine.begin() as connection:
+        repaired = reconcile(connection)
+    click.echo('{} artists and venues repaired'.format(repaired))
@@ -0,0 +1,114 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+import dateutil.parser
+from flask import Blueprint, Response, abort, current_app, request, stream_with_context
+from sqlalchemy import select
+
+from config import db
+from models.Artist import Artist
+from models.Show import Show
+from models.Venue import Venue
+from replicas import read_engine
+
+# ----------------------------------------------------------------------------#
+# Streaming exports: /export/<shows|artists|venues>.<csv|ndjson>.
+#
+# Rows are read from a server-side cursor (stream_results) EXPORT_BATCH at a
+# time and written to the response as they arrive, so a dump of any size
+# runs in flat memory on the worker. ?since= and ?until= bound shows by
+# start_time and artists/venues by created_at (since inclusive, until
+# exclusive). Columns are named after the form fields, so an export can be
+# loaded back with `flask import`.
+# ----------------------------------------------------------------------------#
+
+export = Blueprint('export', __name__, url_prefix='/export')
+
+# name -> (columns, column since/until apply to, order)
+EXPORTS = {
+    'shows': ([Show.id, Show.start_time, Show.artist_id, Artist.name.label("artist_name"),
+               Show.venue_id, Venue.name.label("venue_name")],
+              Show.start_time, [Show.start_time, Show.id]),
+    'artists': ([Artist.id, Artist.name, Artist.city, Artist.state, Artist.phone, Artist.genres,
+                 Artist.image_link, Artist.facebook_link, Artist.website.label("website_link"),
+                 Artist.seeking_venue, Artist.seeking_description, Artist.availability, Artist.created_at,
+                 Artist.upcoming_shows_count, Artist.past_shows_count],
+                Artist.created_at, [Artist.id]),
+    'venues': ([Venue.id, Venue.name, Venue.city, Venue.state, Venue.address, Venue.phone, Venue.genres,
+                Venue.image_link, Venue.facebook_link, Venue.website.label("website_link"),
+                Venue.seeking_talent, Venue.seeking_description, Venue.created_at,
+                Venue.upcoming_shows_count, Venue.past_shows_count],
+               Venue.created_at, [Venue.id]),
+}
+FORMATS = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+
+
+def _bound(name):
+    value = request.args.get(name, '').strip()
+    if not value:
+        return None
+    try:
+        return dateutil.parser.parse(value)
+    except (ValueError, OverflowError):
+        abort(400)
+
+
+def export_statement(name, since=None, until=None):
+    columns, column, order = EXPORTS[name]
+    statement = select(columns)
+    if name == 'shows':
+        statement = statement.select_from(Show.__table__.join(Artist.__table__).join(Venue.__table__)) \
+            .where(Artist.archived_at.is_(None)).where(Venue.archived_at.is_(None))
+    else:
+        statement = statement.where(column.class_.archived_at.is_(None))
+    if since is not None:
+        statement = statement.where(column >= since)
+    if until is not None:
+        statement = statement.where(column < until)
+    return statement.order_by(*order)
+
+
+def _value(value):
+    # the form format, which is also what `flask import` reads back
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    return value
+
+
+def stream_rows(statement, batch):
+    # (keys, then lists of rows), batch rows at a time from a server-side cursor, on a replica if there are any
+    with read_engine(db).connect() as connection:
+        result = connection.execution_options(stream_results=True).execute(statement).yield_per(batch)
+        yield list(result.keys())
+        for rows in result.partitions():
+            yield rows
+
+
+def as_csv(batches):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for i, batch in enumerate(batches):
+        writer.writerows([batch] if i == 0 else [[_value(v) for v in row] for row in batch])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def as_ndjson(batches):
+    keys = next(batches)
+    for batch in batches:
+        yield ''.join(json.dumps(dict(zip(keys, map(_value, row)))) + '\n' for row in batch)
+
+
+@export.route('/<name>.<fmt>')
+def export_rows(name, fmt):
+    if name not in EXPORTS or fmt not in FORMATS:
+        abort(404)
+    statement = export_statement(name, _bound('since'), _bound('until'))
+    write = as_csv if fmt == 'csv' else as_ndjson
+    body = write(stream_rows(statement, current_app.config['EXPORT_BATCH']))
+    response = Response(stream_with_context(body), mimetype=FORMATS[fmt])
+    response.headers['Content-Disposition'] = 'attachment; filename={}.{}'.format(name, fmt)
+    return response
@@ -1,14 +1,26 @@
+import os
+
 from fabric.api import local, settings, abort
 from fabric.contrib.console import confirm
 
+# route benchmark against a generated database, see benchmarks/routes.py
+BENCH = "python benchmarks/routes.py --db sqlite:///bench.db --generate --requests 2000"
+BASELINE = "benchmarks/baseline.json"
+
 # prepare for deployment
 
 
 def test():
+    # the unit tests, then the benchmark: its first run records the baseline, later runs fail when a route
+    # got slower than it
+    if os.path.exists(BASELINE):
+        command = BENCH + " --baseline " + BASELINE
+    else:
+        command = BENCH + " --save-baseline " + BASELINE
     with settings(warn_only=True):
-        result = local(
-            "python test_tasks.py -v && python test_users.py -v", capture=True
-        )
+        result = local("python -m pytest -q", capture=True)
+        if not result.failed:
+            result = local(command, capture=True)
     if result.failed and not confirm("Tests failed. Continue?"):
         abort("Aborted at user request.")
 
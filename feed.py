@@ -0,0 +1,87 @@
+import threading
+import time
+
+from cache import LRUCache
+from config import app, cache, db
+from queries import recently_listed
+
+# ----------------------------------------------------------------------------#
+# Recently listed feed of the home page.
+#
+# The newest FEED_SIZE venues and artists are kept as lists of dicts, so a
+# home page hit reads memory instead of the database. Creating a venue or
+# artist adds it to the feed, editing or deleting one drops the feed to be
+# reloaded, and a cold feed falls back to the created_at query. Where the
+# lists live is picked by FEED_TYPE:
+#   memory -- a two-entry LRU in each worker (default). A worker only sees
+#             the listings created through it until its feed expires after
+#             FEED_TIMEOUT seconds and is reloaded
+#   cache  -- the cache.py backend, shared by every worker with
+#             CACHE_TYPE=sqlite
+# ----------------------------------------------------------------------------#
+
+
+def feed_key(model):
+    return 'recent:{}'.format(model.__tablename__)
+
+
+class RecentFeed(object):
+
+    def __init__(self, store, size=10, timeout=60):
+        self.store = store
+        self.size = size
+        self.timeout = timeout
+        self._lock = threading.Lock()
+
+    def cached(self, model):
+        # the feed of model, None when it has to be loaded
+        entry = self.store.get(feed_key(model))
+        return entry[1] if entry is not None else None
+
+    def fill(self, model, rows):
+        # store rows of recently_listed(model) as the feed, returns it
+        items = [dict(row) for row in rows]
+        self.store.set(feed_key(model), (time.time() + self.timeout, items), self.timeout)
+        return items
+
+    def statement(self, model):
+        return recently_listed(model, self.size)
+
+    def get(self, model):
+        items = self.cached(model)
+        if items is None:
+            items = self.fill(model, db.session.execute(self.statement(model)))
+        return items
+
+    def add(self, model, entity):
+        # put a newly created venue or artist at the head of the feed
+        row = {c.key: getattr(entity, c.key) for c in self.statement(model).selected_columns}
+        with self._lock:
+            entry = self.store.get(feed_key(model))
+            if entry is None:
+                # the next get() loads the feed, entity included
+                return
+            expires, items = entry
+            items = [row] + [item for item in items if item['id'] != row['id']]
+            items.sort(key=lambda item: (item['created_at'], item['id']), reverse=True)
+            # keep the original expiry, so a busy worker still picks up listings created elsewhere
+            timeout = expires - time.time()
+            if timeout > 0:
+                self.store.set(feed_key(model), (expires, items[:self.size]), timeout)
+
+    def discard(self, *models):
+        # edited or deleted listings: reload on the next get()
+        self.store.delete(*[feed_key(model) for model in models])
+
+
+def make_feed(config):
+    kind = config.get('FEED_TYPE', 'memory')
+    size, timeout = config.get('FEED_SIZE', 10), config.get('FEED_TIMEOUT', 60)
+    if kind == 'memory':
+        return RecentFeed(LRUCache(2, timeout), size, timeout)
+    if kind == 'cache':
+        return RecentFeed(cache, size, timeout)
+    raise ValueError('Unknown FEED_TYPE {!r}'.format(kind))
+
+
+feed = make_feed(app.config)
@@ -1,9 +1,10 @@
-import re
 from datetime import datetime
 from flask_wtf import Form
 from wtforms import StringField, SelectField, SelectMultipleField, DateTimeField, BooleanField
 from wtforms.validators import DataRequired, AnyOf, URL, Regexp, ValidationError, Optional
 
+from availability import parse_availability
+from genres import GENRES
 
 class ShowForm(Form):
     artist_id = StringField(
@@ -93,27 +94,7 @@ class VenueForm(Form):
     genres = SelectMultipleField(
         # TODO implement enum restriction
         'genres', validators=[DataRequired()],
-        choices=[
-            ('Alternative', 'Alternative'),
-            ('Blues', 'Blues'),
-            ('Classical', 'Classical'),
-            ('Country', 'Country'),
-            ('Electronic', 'Electronic'),
-            ('Folk', 'Folk'),
-            ('Funk', 'Funk'),
-            ('Hip-Hop', 'Hip-Hop'),
-            ('Heavy Metal', 'Heavy Metal'),
-            ('Instrumental', 'Instrumental'),
-            ('Jazz', 'Jazz'),
-            ('Musical Theatre', 'Musical Theatre'),
-            ('Pop', 'Pop'),
-            ('Punk', 'Punk'),
-            ('R&B', 'R&B'),
-            ('Reggae', 'Reggae'),
-            ('Rock n Roll', 'Rock n Roll'),
-            ('Soul', 'Soul'),
-            ('Other', 'Other'),
-        ]
+        choices=[(genre, genre) for genre in GENRES]
     )
     facebook_link = StringField(
         'facebook_link', validators=[Optional(), URL()]
@@ -205,57 +186,14 @@ class ArtistForm(Form):
     )
 
     def validate_availability(self, field):
-        error = False
-        s = "(0[0-9]|1[0-9]|2[0-3]):([0-5][0-9])"
-        s = s + "-" + s
-        list = re.split(s, field.data)
-        list = [x.strip() for x in list]
-        list = [x for x in list if x != '']
         try:
-            for x in list:
-                x = int(x)
-        except:
-            error = True
-
-        if len(list)<4:
-            x = len(list)
-        else:
-            x= len(list)-3
-
-        for i in range(0, x, 4):
-            if list[i + 2] < list[i]:
-                error = True
-
-            if (list[i + 2] == list[i]) and (list[i + 1] > list[i + 3]):
-                print(list[i])
-                error = True
-
-        if error == True:
+            parse_availability(field.data)
+        except ValueError:
             raise ValidationError('Invalid availability time. Please write as HH:mm-HH:mm')
 
     genres = SelectMultipleField(
         'genres', validators=[DataRequired()],
-        choices=[
-            ('Alternative', 'Alternative'),
-            ('Blues', 'Blues'),
-            ('Classical', 'Classical'),
-            ('Country', 'Country'),
-            ('Electronic', 'Electronic'),
-            ('Folk', 'Folk'),
-            ('Funk', 'Funk'),
-            ('Hip-Hop', 'Hip-Hop'),
-            ('Heavy Metal', 'Heavy Metal'),
-            ('Instrumental', 'Instrumental'),
-            ('Jazz', 'Jazz'),
-            ('Musical Theatre', 'Musical Theatre'),
-            ('Pop', 'Pop'),
-            ('Punk', 'Punk'),
-            ('R&B', 'R&B'),
-            ('Reggae', 'Reggae'),
-            ('Rock n Roll', 'Rock n Roll'),
-            ('Soul', 'Soul'),
-            ('Other', 'Other'),
-        ]
+        choices=[(genre, genre) for genre in GENRES]
      )
     facebook_link = StringField(
         # TODO implement enum restriction
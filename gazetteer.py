@@ -0,0 +1,77 @@
+import csv
+import math
+import os
+import re
+
+# ----------------------------------------------------------------------------#
+# The bundled gazetteer.
+#
+# data/gazetteer.csv lists US places (city, state, latitude, longitude), so
+# a venue is placed from its city and state without any network call, and
+# distances between places are computed here. Nothing in this module touches
+# the app or the database: models/Venue.py places venues with it as they are
+# written. Searching venues by distance is geocode.py.
+# ----------------------------------------------------------------------------#
+
+GAZETTEER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'gazetteer.csv')
+EARTH_RADIUS_MILES = 3958.8
+MILES_PER_DEGREE = math.pi * EARTH_RADIUS_MILES / 180
+
+STATES = {
+    'alabama': 'AL', 'alaska': 'AK', 'arizona': 'AZ', 'arkansas': 'AR', 'california': 'CA',
+    'colorado': 'CO', 'connecticut': 'CT', 'delaware': 'DE', 'district of columbia': 'DC', 'florida': 'FL',
+    'georgia': 'GA', 'hawaii': 'HI', 'idaho': 'ID', 'illinois': 'IL', 'indiana': 'IN', 'iowa': 'IA',
+    'kansas': 'KS', 'kentucky': 'KY', 'louisiana': 'LA', 'maine': 'ME', 'maryland': 'MD',
+    'massachusetts': 'MA', 'michigan': 'MI', 'minnesota': 'MN', 'mississippi': 'MS', 'missouri': 'MO',
+    'montana': 'MT', 'nebraska': 'NE', 'nevada': 'NV', 'new hampshire': 'NH', 'new jersey': 'NJ',
+    'new mexico': 'NM', 'new york': 'NY', 'north carolina': 'NC', 'north dakota': 'ND', 'ohio': 'OH',
+    'oklahoma': 'OK', 'oregon': 'OR', 'pennsylvania': 'PA', 'rhode island': 'RI', 'south carolina': 'SC',
+    'south dakota': 'SD', 'tennessee': 'TN', 'texas': 'TX', 'utah': 'UT', 'vermont': 'VT',
+    'virginia': 'VA', 'washington': 'WA', 'west virginia': 'WV', 'wisconsin': 'WI', 'wyoming': 'WY',
+}
+# spellings of the same place name, applied word by word
+ABBREVIATIONS = {'saint': 'st', 'ste': 'st', 'sainte': 'st', 'ft': 'fort', 'mt': 'mount'}
+
+_places = None
+
+
+def place_key(city, state):
+    # ("st louis", "MO") for " Saint Louis", "missouri"; None when either part is empty
+    city = re.sub(r"[.']", '', (city or '').lower())
+    city = ' '.join(ABBREVIATIONS.get(word, word) for word in re.split(r'[\s-]+', city) if word)
+    state = ' '.join((state or '').replace('.', '').lower().split())
+    state = STATES.get(state, state.upper())
+    if not city or not state:
+        return None
+    return city, state
+
+
+def places():
+    # place_key -> (latitude, longitude) of the gazetteer, read once per process
+    global _places
+    if _places is None:
+        with open(GAZETTEER, newline='') as f:
+            _places = {place_key(row['city'], row['state']): (float(row['latitude']), float(row['longitude']))
+                       for row in csv.DictReader(f)}
+    return _places
+
+
+def geocode(city, state):
+    # (latitude, longitude) of a city and state, None when the gazetteer doesn't know it
+    key = place_key(city, state)
+    return places().get(key) if key else None
+
+
+def haversine(lat1, lng1, lat2, lng2):
+    # great-circle distance in miles
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_box(lat, lng, radius):
+    # (min_lat, max_lat, min_lng, max_lng) holding every point within radius miles of (lat, lng)
+    dlat = radius / MILES_PER_DEGREE
+    cos_lat = math.cos(math.radians(min(89.0, abs(lat) + dlat)))
+    dlng = min(180.0, radius / (MILES_PER_DEGREE * cos_lat))
+    return lat - dlat, lat + dlat, lng - dlng, lng + dlng
@@ -0,0 +1,52 @@
+# ----------------------------------------------------------------------------#
+# Genre bitmask.
+#
+# Artists and venues store their genres twice: the comma-joined `genres`
+# string shown by the templates, and `genre_mask`, one bit per entry of
+# GENRES, which listing filters test with a bitwise AND. The bit of a genre
+# is its position in GENRES, so new genres must only ever be appended.
+# ----------------------------------------------------------------------------#
+
+GENRES = [
+    'Alternative',
+    'Blues',
+    'Classical',
+    'Country',
+    'Electronic',
+    'Folk',
+    'Funk',
+    'Hip-Hop',
+    'Heavy Metal',
+    'Instrumental',
+    'Jazz',
+    'Musical Theatre',
+    'Pop',
+    'Punk',
+    'R&B',
+    'Reggae',
+    'Rock n Roll',
+    'Soul',
+    'Other',
+]
+
+GENRE_BITS = {genre: 1 << i for i, genre in enumerate(GENRES)}
+
+
+def genres_to_mask(genres):
+    # unknown names are ignored, so legacy strings never fail a write
+    mask = 0
+    for genre in genres:
+        mask |= GENRE_BITS.get(genre.strip(), 0)
+    return mask
+
+
+def mask_to_genres(mask):
+    return [genre for genre in GENRES if mask & GENRE_BITS[genre]]
+
+
+def has_genres(column, genres):
+    # SQL predicate: column has every genre in genres. Raises KeyError for an unknown genre.
+    mask = 0
+    for genre in genres:
+        mask |= GENRE_BITS[genre]
+    return column.op('&')(mask) == mask
@@ -0,0 +1,68 @@
+import click
+from flask.cli import AppGroup
+from sqlalchemy import select
+
+from config import db
+from feed import feed
+from gazetteer import bounding_box, geocode, haversine
+from models.Venue import Venue
+from queries import invalidate_pages
+
+# ----------------------------------------------------------------------------#
+# Offline geocoding and distances.
+#
+# Venue.latitude/longitude are filled in from the bundled gazetteer (see
+# gazetteer.py) whenever city or state is written, `flask geocode venues`
+# backfills the rows written before that (or after the gazetteer grows).
+# /shows/near looks venues up by a bounding box on the (latitude, longitude)
+# index first, then keeps the candidates within the exact haversine
+# distance. Archived venues are never found.
+# ----------------------------------------------------------------------------#
+
+
+def within(model, lat, lng, radius):
+    # {id: distance in miles} of the rows of model (with latitude and longitude columns) within radius
+    # of (lat, lng), archived rows left out: the bounding box is a range scan of the (latitude, longitude)
+    # index, the haversine check drops the candidates in its corners
+    min_lat, max_lat, min_lng, max_lng = bounding_box(lat, lng, radius)
+    candidates = db.session.execute(select([model.id, model.latitude, model.longitude])
+                                    .where(model.latitude.between(min_lat, max_lat))
+                                    .where(model.longitude.between(min_lng, max_lng))
+                                    .where(model.archived_at.is_(None)))
+    distances = {}
+    for row_id, row_lat, row_lng in candidates:
+        distance = haversine(lat, lng, row_lat, row_lng)
+        if distance <= radius:
+            distances[row_id] = distance
+    return distances
+
+
+geocode_command = AppGroup('geocode', help='Place venues from the bundled gazetteer.')
+
+
+@geocode_command.command('venues')
+@click.option('--all', 'everything', is_flag=True, help='geocode every venue, not only those without coordinates')
+def venues_command(everything):
+    """Fill in Venue.latitude/longitude from the city and state."""
+    table = Venue.__table__
+    query = db.session.query(Venue.id, Venue.city, Venue.state, Venue.latitude, Venue.longitude)
+    if not everything:
+        query = query.filter(Venue.latitude.is_(None))
+    placed, unknown = [], 0
+    for venue_id, city, state, latitude, longitude in query:
+        point = geocode(city, state)
+        if point is None:
+            unknown += 1
+        elif point != (latitude, longitude):
+            placed.append({'_id': venue_id, 'latitude': point[0], 'longitude': point[1]})
+    if placed:
+        # a Core executemany, bumping version_id like the ORM would so the API's ETags change with the coordinates
+        db.session.execute(table.update().where(table.c.id == db.bindparam('_id'))
+                           .values(latitude=db.bindparam('latitude'), longitude=db.bindparam('longitude'),
+                                   version_id=table.c.version_id + 1), placed)
+    db.session.commit()
+    if placed:
+        # the typeahead index only holds names, it is not affected
+        invalidate_pages(venue_ids=[p['_id'] for p in placed])
+        feed.discard(Venue)
+    click.echo('placed {} venues, {} not in the gazetteer'.format(len(placed), unknown))
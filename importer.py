@@ -0,0 +1,257 @@
+import csv
+import io
+import json
+import os
+import time
+from datetime import datetime
+from itertools import islice
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import func, select
+from werkzeug.datastructures import MultiDict
+
+from config import cache, db
+from counters import count_shows
+from feed import feed
+from availability import covers
+from forms import ArtistForm, ShowForm, VenueForm
+from gazetteer import geocode
+from genres import genres_to_mask
+from models.Artist import Artist
+from models.ArtistAvailability import ArtistAvailability
+from models.Show import Show
+from models.Venue import Venue
+
+# ----------------------------------------------------------------------------#
+# Bulk import: `flask import artists|venues|shows FILE`.
+#
+# Rows are read one at a time from a CSV (header row of form field names) or
+# NDJSON file, validated by the same WTForms classes as the HTML forms and
+# inserted in batches of one transaction each: COPY on PostgreSQL,
+# executemany elsewhere, together with the show counters of the artists
+# and venues they touch. Rejected rows go to a dead-letter NDJSON file with
+# their line number and errors, so they can be fixed and re-imported.
+# ----------------------------------------------------------------------------#
+
+FALSE_VALUES = ('', '0', 'false', 'f', 'n', 'no', 'off')
+
+
+def read_rows(path, fmt):
+    # (line number, row dict) per record; an unparsable NDJSON line yields its raw text instead of a dict
+    with open(path, newline='', encoding='utf-8') as f:
+        if fmt == 'csv':
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            for line, text in enumerate(f, 1):
+                if text.strip():
+                    try:
+                        row = json.loads(text)
+                    except ValueError:
+                        row = text
+                    yield line, row
+
+
+def _formdata(row, boolean_fields):
+    data = MultiDict()
+    for key, value in row.items():
+        if key in boolean_fields:
+            value = '' if value is None or str(value).strip().lower() in FALSE_VALUES else 'y'
+        if key == 'genres' and isinstance(value, str):
+            value = [g for g in value.split(',') if g.strip()]
+        if isinstance(value, list):
+            for v in value:
+                data.add(key, str(v).strip())
+        elif value is not None:
+            data.add(key, str(value))
+    return data
+
+
+def _artist(form, now):
+    return dict(name=form.name.data.strip(),
+                city=form.city.data.strip(),
+                state=form.state.data.strip(),
+                genres=",".join(form.genres.data),
+                genre_mask=genres_to_mask(form.genres.data),
+                seeking_venue=form.seeking_venue.data,
+                phone=form.phone.data,
+                image_link=form.image_link.data.strip(),
+                facebook_link=form.facebook_link.data.strip(),
+                website=form.website_link.data.strip(),
+                seeking_description=form.seeking_description.data.strip(),
+                created_at=now,
+                availability=form.availability.data.strip())
+
+
+def _venue(form, now):
+    # Core inserts skip Venue's validators, so the venue is placed here
+    latitude, longitude = geocode(form.city.data, form.state.data) or (None, None)
+    return dict(name=form.name.data.strip(),
+                city=form.city.data.strip(),
+                state=form.state.data.strip(),
+                address=form.address.data.strip(),
+                genres=",".join(form.genres.data),
+                genre_mask=genres_to_mask(form.genres.data),
+                seeking_talent=form.seeking_talent.data,
+                phone=form.phone.data,
+                image_link=form.image_link.data.strip(),
+                facebook_link=form.facebook_link.data.strip(),
+                website=form.website_link.data.strip(),
+                seeking_description=form.seeking_description.data.strip(),
+                latitude=latitude,
+                longitude=longitude,
+                created_at=now)
+
+
+def _show(form, now):
+    return dict(start_time=form.start_time.data,
+                venue_id=int(form.venue_id.data),
+                artist_id=int(form.artist_id.data))
+
+
+KINDS = {
+    'artists': (Artist, ArtistForm, _artist, ('seeking_venue',)),
+    'venues': (Venue, VenueForm, _venue, ('seeking_talent',)),
+    'shows': (Show, ShowForm, _show, ()),
+}
+
+
+def validate_batch(kind, batch):
+    # split a batch of (line, row) into insertable records and (line, row, errors) rejects
+    accepted, rejected = validate_rows(kind, batch)
+    return [r for _, _, r in accepted], rejected
+
+
+def validate_rows(kind, batch):
+    # split a batch of (line, row) into (line, row, record) and (line, row, errors) rejects
+    model, form_class, record, boolean_fields = KINDS[kind]
+    now = datetime.today()
+    accepted, rejected = [], []
+    for line, row in batch:
+        if not isinstance(row, dict):
+            rejected.append((line, row, {'row': ['not a JSON object']}))
+            continue
+        form = form_class(formdata=_formdata(row, boolean_fields), meta={'csrf': False})
+        form.validate()
+        errors = {k: v for k, v in form.errors.items() if v}
+        if kind == 'shows':
+            for name in ('artist_id', 'venue_id'):
+                if not str(getattr(form, name).data).strip().isdigit():
+                    errors[name] = ['must be an integer id']
+        if errors:
+            rejected.append((line, row, errors))
+        else:
+            accepted.append((line, row, record(form, now)))
+    if kind == 'shows' and accepted:
+        accepted, missing = _check_shows(accepted)
+        rejected += missing
+    return accepted, rejected
+
+
+def _check_shows(accepted):
+    # the referenced artists and venues must exist and the artist must be available, three queries per batch
+    artist_ids = set(r['artist_id'] for _, _, r in accepted)
+    venue_ids = set(r['venue_id'] for _, _, r in accepted)
+    # archived artists and venues take no new shows, see archive.py
+    availability = {a: [] for (a,) in db.session.query(Artist.id)
+                    .filter(Artist.id.in_(artist_ids), Artist.archived_at.is_(None))}
+    for window in db.session.query(ArtistAvailability.artist_id, ArtistAvailability.weekday,
+                                   ArtistAvailability.start_minute, ArtistAvailability.end_minute) \
+            .filter(ArtistAvailability.artist_id.in_(artist_ids)):
+        availability[window[0]].append(window[1:])
+    venues = set(v for (v,) in db.session.query(Venue.id)
+                 .filter(Venue.id.in_(venue_ids), Venue.archived_at.is_(None)))
+    ok, rejected = [], []
+    for line, row, r in accepted:
+        if r['artist_id'] not in availability:
+            rejected.append((line, row, {'artist_id': ['no such artist']}))
+        elif r['venue_id'] not in venues:
+            rejected.append((line, row, {'venue_id': ['no such venue']}))
+        elif not covers(availability[r['artist_id']], r['start_time']):
+            rejected.append((line, row, {'start_time': ["the artist isn't available at that time"]}))
+        else:
+            ok.append((line, row, r))
+    return ok, rejected
+
+
+def _copy(conn, table, records):
+    # PostgreSQL COPY ... FROM STDIN in csv format, strings are quoted. QUOTE_NONNUMERIC quotes None as "" too,
+    # which COPY reads as an empty string; FORCE_NULL turns it into NULL in the columns that hold no strings,
+    # e.g. the latitude and longitude of a venue the gazetteer doesn't know
+    columns = list(records[0])
+    nulls = [c for c in columns if any(r[c] is None for r in records)
+             and not any(isinstance(r[c], str) for r in records)]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, quoting=csv.QUOTE_NONNUMERIC)
+    for record in records:
+        writer.writerow([record[c] for c in columns])
+    buffer.seek(0)
+    options = 'FORMAT csv'
+    if nulls:
+        options += ', FORCE_NULL ({})'.format(', '.join('"{}"'.format(c) for c in nulls))
+    cursor = conn.connection.cursor()
+    cursor.copy_expert('COPY "{}" ({}) FROM STDIN WITH ({})'
+                       .format(table.name, ', '.join('"{}"'.format(c) for c in columns), options), buffer)
+
+
+def insert_batch(table, records):
+    if not records:
+        return
+    with db.engine.begin() as conn:
+        if table is Artist.__table__:
+            last_id = conn.execute(select([func.max(table.c.id)])).scalar() or 0
+        if conn.dialect.name == 'postgresql':
+            _copy(conn, table, records)
+        else:
+            conn.execute(table.insert(), records)
+        # bulk inserts bypass the ORM events that maintain the show counters and availability windows
+        if table is Show.__table__:
+            count_shows(conn, records)
+        elif table is Artist.__table__:
+            ArtistAvailability.index_artists(conn, last_id)
+
+
+@click.command('import')
+@click.argument('kind', type=click.Choice(sorted(KINDS)))
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'ndjson']), help='Defaults to the file extension.')
+@click.option('--batch-size', default=5000, show_default=True, help='Rows per transaction.')
+@click.option('--dead-letter', type=click.Path(dir_okay=False),
+              help='Where rejected rows go, defaults to PATH.rejected.ndjson.')
+@with_appcontext
+def import_command(kind, path, fmt, batch_size, dead_letter):
+    """Bulk load artists, venues or shows from a CSV or NDJSON file."""
+    fmt = fmt or ('csv' if path.lower().endswith('.csv') else 'ndjson')
+    dead_letter = dead_letter or path + '.rejected.ndjson'
+    table = KINDS[kind][0].__table__
+    rows = read_rows(path, fmt)
+    read = imported = rejected = 0
+    start = time.perf_counter()
+
+    with open(dead_letter, 'w', encoding='utf-8') as dead:
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            records, rejects = validate_batch(kind, batch)
+            insert_batch(table, records)
+            db.session.remove()
+            for line, row, errors in rejects:
+                dead.write(json.dumps({'line': line, 'errors': errors, 'row': row}) + '\n')
+            read += len(batch)
+            imported += len(records)
+            rejected += len(rejects)
+            rate = read / max(time.perf_counter() - start, 1e-6)
+            click.echo('\r{}: {} read, {} imported, {} rejected ({:.0f} rows/s)'
+                       .format(kind, read, imported, rejected, rate), nl=False, err=True)
+
+    click.echo('', err=True)
+    if rejected:
+        click.echo('{} rejected rows written to {}'.format(rejected, dead_letter), err=True)
+    else:
+        os.remove(dead_letter)
+    # imported rows change what cached detail pages and the home page feed show
+    cache.clear()
+    feed.discard(Artist, Venue)
@@ -0,0 +1,140 @@
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from logging import FileHandler, Formatter
+
+from flask import g, has_request_context, request
+from markupsafe import escape
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# ----------------------------------------------------------------------------#
+# Per-request SQL instrumentation (opt-in with SQL_INSTRUMENTATION=1).
+#
+# Engine events time every statement. Each request then reports its query
+# count and total database time in X-DB-* response headers (and optionally
+# an HTML footer), statements slower than SQL_SLOW_QUERY_MS go to the slow
+# query log, and a statement shape repeated more than SQL_REPEAT_THRESHOLD
+# times in one request is logged as a likely N+1. max_queries() gives tests
+# the same counts.
+# ----------------------------------------------------------------------------#
+
+logger = logging.getLogger('fyyur.sql')
+
+PARAMS_LIST = re.compile(r"\(\s*(?:\?|%\(\w+\)s|%s|:\w+)(?:\s*,\s*(?:\?|%\(\w+\)s|%s|:\w+))*\s*\)")
+LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+SPACES = re.compile(r"\s+")
+
+
+def statement_shape(statement):
+    # the statement with literals and bound parameter lists collapsed, so repeats of one query compare equal
+    shape = PARAMS_LIST.sub('(?)', statement)
+    shape = LITERALS.sub('?', shape)
+    return SPACES.sub(' ', shape).strip()
+
+
+class QueryLog(object):
+
+    def __init__(self, keep=5):
+        self.keep = keep
+        self.count = 0
+        self.total = 0.0
+        self.slowest = []
+        self.shapes = Counter()
+
+    def add(self, statement, elapsed):
+        self.count += 1
+        self.total += elapsed
+        self.shapes[statement_shape(statement)] += 1
+        self.slowest.append((elapsed, statement))
+        self.slowest.sort(key=lambda item: item[0], reverse=True)
+        del self.slowest[self.keep:]
+
+    def repeated(self, threshold):
+        return [(shape, n) for shape, n in self.shapes.most_common() if n > threshold]
+
+
+_watchers = []
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_start'].pop()
+    if has_request_context() and 'sql_log' in g:
+        g.sql_log.add(statement, elapsed)
+        if elapsed * 1000 >= g.sql_slow_ms:
+            logger.warning('%.1f ms %s %s | %s', elapsed * 1000, request.method, request.path, statement)
+    for log in list(_watchers):
+        log.add(statement, elapsed)
+
+
+def _install():
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+def init_instrumentation(app):
+    if not app.config.get('SQL_INSTRUMENTATION'):
+        return
+    _install()
+    handler = FileHandler(app.config['SQL_SLOW_QUERY_LOG'])
+    handler.setFormatter(Formatter('%(asctime)s %(levelname)s: %(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+
+    @app.before_request
+    def start_sql_log():
+        g.sql_log = QueryLog(app.config['SQL_SLOWEST'])
+        g.sql_slow_ms = app.config['SQL_SLOW_QUERY_MS']
+
+    @app.after_request
+    def report_sql_log(response):
+        log = g.pop('sql_log', None)
+        if log is None:
+            return response
+        repeated = log.repeated(app.config['SQL_REPEAT_THRESHOLD'])
+        for shape, n in repeated:
+            logger.warning('N+1: %d x in %s %s | %s', n, request.method, request.path, shape)
+        response.headers['X-DB-Query-Count'] = str(log.count)
+        response.headers['X-DB-Time-Ms'] = '{:.1f}'.format(log.total * 1000)
+        response.headers['X-DB-Repeated-Statements'] = str(len(repeated))
+        if app.config['SQL_DEBUG_FOOTER'] and response.mimetype == 'text/html' and not response.is_streamed:
+            body = response.get_data(as_text=True)
+            if '</body>' in body:
+                response.set_data(body.replace('</body>', _footer(log, repeated) + '</body>', 1))
+        return response
+
+
+def _footer(log, repeated):
+    rows = ''.join('<li>{:.1f} ms <code>{}</code></li>'.format(elapsed * 1000, escape(statement))
+                   for elapsed, statement in log.slowest)
+    rows += ''.join('<li>N+1: {} x <code>{}</code></li>'.format(n, escape(shape)) for shape, n in repeated)
+    return ('<div class="container sql-debug"><p>{} queries, {:.1f} ms</p><ul>{}</ul></div>'
+            .format(log.count, log.total * 1000, rows))
+
+
+@contextmanager
+def max_queries(limit):
+    # fails with an AssertionError listing the statements when the block runs more than limit queries
+    _install()
+    log = QueryLog()
+    _watchers.append(log)
+    try:
+        yield log
+    finally:
+        _watchers.remove(log)
+    assert log.count <= limit, '{} queries, expected at most {}:\n{}'.format(
+        log.count, limit, '\n'.join('{} x {}'.format(n, shape) for shape, n in log.shapes.most_common()))
+
+
+def assert_max_queries(client, url, limit, method='GET', **kwargs):
+    # request url through a Flask test client and assert the route ran at most limit queries
+    with max_queries(limit):
+        response = client.open(url, method=method, **kwargs)
+    return response
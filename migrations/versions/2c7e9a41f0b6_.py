@@ -0,0 +1,43 @@
+"""add ranked full-text search vectors to artist and venue
+
+Revision ID: 2c7e9a41f0b6
+Revises: 8b2f4c1d9e3a
+Create Date: 2026-10-18 11:40:02.583117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2c7e9a41f0b6'
+down_revision = '8b2f4c1d9e3a'
+branch_labels = None
+depends_on = None
+
+# generated columns need PostgreSQL 12+. SQLite databases get their FTS5
+# tables from the after_create hooks in search.py instead.
+SEARCH_VECTOR = """
+    setweight(to_tsvector('simple', coalesce(name, '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce(city, '')), 'B') ||
+    setweight(to_tsvector('simple', coalesce(genres, '')), 'C') ||
+    setweight(to_tsvector('simple', coalesce(seeking_description, '')), 'D')
+"""
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for table in ('Artist', 'Venue'):
+        op.execute('ALTER TABLE "{}" ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ({}) STORED'
+                   .format(table, SEARCH_VECTOR))
+        op.create_index('ix_{}_search_vector'.format(table), table, ['search_vector'],
+                        unique=False, postgresql_using='gin')
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for table in ('Venue', 'Artist'):
+        op.drop_index('ix_{}_search_vector'.format(table), table_name=table)
+        op.drop_column(table, 'search_vector')
@@ -0,0 +1,67 @@
+"""cascade deletes of venues and artists to their shows, archive venues and artists
+
+Revision ID: 3b9d7e2f5c61
+Revises: a4c81e6f3b27
+Create Date: 2026-10-18 23:02:51.331870
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b9d7e2f5c61'
+down_revision = 'a4c81e6f3b27'
+branch_labels = None
+depends_on = None
+
+# table -> its foreign keys to Artist and Venue, (column, referred table)
+FOREIGN_KEYS = {'Show': [('venue_id', 'Venue'), ('artist_id', 'Artist')],
+                'ArtistAvailability': [('artist_id', 'Artist')]}
+# SQLite's foreign keys are unnamed, batch mode names them by this to drop them
+NAMING_CONVENTION = {'fk': 'fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s'}
+
+
+def _on_delete(ondelete):
+    # recreate the foreign keys of FOREIGN_KEYS with ondelete
+    bind = op.get_bind()
+    for table, keys in FOREIGN_KEYS.items():
+        if bind.dialect.name == 'sqlite':
+            # SQLite can't alter constraints, batch mode copies the table into a new one
+            with op.batch_alter_table(table, naming_convention=NAMING_CONVENTION) as batch_op:
+                for column, referred in keys:
+                    name = 'fk_{}_{}_{}'.format(table, column, referred)
+                    batch_op.drop_constraint(name, type_='foreignkey')
+                    batch_op.create_foreign_key(name, referred, [column], ['id'], ondelete=ondelete)
+            continue
+        # on PostgreSQL "Show" is partitioned (d6a2f9b41c58), its constraints are altered on the parent table
+        for key in sa.inspect(bind).get_foreign_keys(table):
+            op.drop_constraint(key['name'], table, type_='foreignkey')
+            op.create_foreign_key(key['name'], table, key['referred_table'], key['constrained_columns'],
+                                  key['referred_columns'], ondelete=ondelete)
+
+
+def upgrade():
+    _on_delete('CASCADE')
+    for table in ('Venue', 'Artist'):
+        op.add_column(table, sa.Column('archived_at', sa.DateTime(), nullable=True))
+        op.create_index('ix_{}_archived_at'.format(table), table, ['archived_at'], unique=False)
+    op.create_table('ShowArchive',
+                    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+                    sa.Column('start_time', sa.DateTime(), nullable=True),
+                    sa.Column('venue_id', sa.Integer(), nullable=False),
+                    sa.Column('artist_id', sa.Integer(), nullable=False),
+                    sa.Column('archived_at', sa.DateTime(), nullable=False),
+                    sa.PrimaryKeyConstraint('id'))
+    op.create_index('ix_ShowArchive_venue_id', 'ShowArchive', ['venue_id'], unique=False)
+    op.create_index('ix_ShowArchive_artist_id', 'ShowArchive', ['artist_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_ShowArchive_artist_id', table_name='ShowArchive')
+    op.drop_index('ix_ShowArchive_venue_id', table_name='ShowArchive')
+    op.drop_table('ShowArchive')
+    for table in ('Artist', 'Venue'):
+        op.drop_index('ix_{}_archived_at'.format(table), table_name=table)
+        op.drop_column(table, 'archived_at')
+    _on_delete(None)
@@ -0,0 +1,46 @@
+"""maintain upcoming and past show counters on artists and venues
+
+Revision ID: 4f8a2d6c1e97
+Revises: b3f7c2e85a14
+Create Date: 2026-10-18 19:26:04.118342
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4f8a2d6c1e97'
+down_revision = 'b3f7c2e85a14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('CounterWatermark',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('rolled_to', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    for table in ('Artist', 'Venue'):
+        op.add_column(table, sa.Column('upcoming_shows_count', sa.Integer(), server_default='0', nullable=False))
+        op.add_column(table, sa.Column('past_shows_count', sa.Integer(), server_default='0', nullable=False))
+
+    # backfill the counters at the initial watermark
+    now = datetime.utcnow()
+    op.execute(sa.text('INSERT INTO "CounterWatermark" (id, rolled_to) VALUES (1, :now)').bindparams(now=now))
+    for table, column in (('Artist', 'artist_id'), ('Venue', 'venue_id')):
+        op.execute(sa.text('UPDATE "{table}" SET '
+                           'upcoming_shows_count = (SELECT count(*) FROM "Show" '
+                           'WHERE "Show".{column} = "{table}".id AND "Show".start_time > :now), '
+                           'past_shows_count = (SELECT count(*) FROM "Show" '
+                           'WHERE "Show".{column} = "{table}".id AND "Show".start_time <= :now)'
+                           .format(table=table, column=column)).bindparams(now=now))
+
+def downgrade():
+    for table in ('Venue', 'Artist'):
+        op.drop_column(table, 'past_shows_count')
+        op.drop_column(table, 'upcoming_shows_count')
+    op.drop_table('CounterWatermark')
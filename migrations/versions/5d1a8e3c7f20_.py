@@ -0,0 +1,29 @@
+"""add keyset pagination indexes for shows and artists
+
+Revision ID: 5d1a8e3c7f20
+Revises: 2c7e9a41f0b6
+Create Date: 2026-10-18 14:05:51.902334
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d1a8e3c7f20'
+down_revision = '2c7e9a41f0b6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # (start_time, id) also serves every lookup ix_Show_start_time did
+    op.create_index('ix_Show_start_time_id', 'Show', ['start_time', 'id'], unique=False)
+    op.drop_index(op.f('ix_Show_start_time'), table_name='Show')
+    op.create_index('ix_Artist_name_id', 'Artist', ['name', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_Artist_name_id', table_name='Artist')
+    op.create_index(op.f('ix_Show_start_time'), 'Show', ['start_time'], unique=False)
+    op.drop_index('ix_Show_start_time_id', table_name='Show')
@@ -0,0 +1,57 @@
+"""parse artist availability into an interval table
+
+Revision ID: 7c3e5b9a2d41
+Revises: 4f8a2d6c1e97
+Create Date: 2026-10-18 19:58:41.630275
+
+"""
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c3e5b9a2d41'
+down_revision = '4f8a2d6c1e97'
+branch_labels = None
+depends_on = None
+
+# the HH:mm-HH:mm windows of availability.py as of this revision, existing strings carry no weekdays
+WINDOW = re.compile('(0[0-9]|1[0-9]|2[0-3]):([0-5][0-9])-(0[0-9]|1[0-9]|2[0-3]):([0-5][0-9])')
+BATCH = 5000
+
+
+def upgrade():
+    windows = op.create_table('ArtistAvailability',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('artist_id', sa.Integer(), nullable=False),
+    sa.Column('weekday', sa.SmallInteger(), nullable=True),
+    sa.Column('start_minute', sa.SmallInteger(), nullable=False),
+    sa.Column('end_minute', sa.SmallInteger(), nullable=False),
+    sa.ForeignKeyConstraint(['artist_id'], ['Artist.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_ArtistAvailability_artist_id_start_minute', 'ArtistAvailability',
+                    ['artist_id', 'start_minute'], unique=False)
+    op.create_index('ix_ArtistAvailability_start_minute_end_minute', 'ArtistAvailability',
+                    ['start_minute', 'end_minute'], unique=False)
+
+    # backfill from the existing strings, malformed or empty windows are skipped like is_available() did
+    artists = op.get_bind().execute(sa.text('SELECT id, availability FROM "Artist" '
+                                            "WHERE availability IS NOT NULL AND availability != ''"))
+    rows = []
+    for artist_id, availability in artists:
+        for window in WINDOW.findall(availability):
+            start = int(window[0]) * 60 + int(window[1])
+            end = int(window[2]) * 60 + int(window[3])
+            if start < end:
+                rows.append({'artist_id': artist_id, 'weekday': None, 'start_minute': start, 'end_minute': end})
+    for i in range(0, len(rows), BATCH):
+        op.bulk_insert(windows, rows[i:i + BATCH])
+
+
+def downgrade():
+    op.drop_index('ix_ArtistAvailability_start_minute_end_minute', table_name='ArtistAvailability')
+    op.drop_index('ix_ArtistAvailability_artist_id_start_minute', table_name='ArtistAvailability')
+    op.drop_table('ArtistAvailability')
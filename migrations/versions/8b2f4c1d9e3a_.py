@@ -0,0 +1,36 @@
+"""add indexes for the show, artist and venue hot paths
+
+Revision ID: 8b2f4c1d9e3a
+Revises: 13aa9fa24302
+Create Date: 2026-10-18 09:12:40.118205
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b2f4c1d9e3a'
+down_revision = '13aa9fa24302'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_Show_venue_id_start_time', 'Show', ['venue_id', 'start_time'], unique=False)
+    op.create_index('ix_Show_artist_id_start_time', 'Show', ['artist_id', 'start_time'], unique=False)
+    op.create_index(op.f('ix_Show_start_time'), 'Show', ['start_time'], unique=False)
+    op.create_index(op.f('ix_Artist_created_at'), 'Artist', ['created_at'], unique=False)
+    op.create_index('ix_Artist_city_state', 'Artist', ['city', 'state'], unique=False)
+    op.create_index(op.f('ix_Venue_created_at'), 'Venue', ['created_at'], unique=False)
+    op.create_index('ix_Venue_city_state', 'Venue', ['city', 'state'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_Venue_city_state', table_name='Venue')
+    op.drop_index(op.f('ix_Venue_created_at'), table_name='Venue')
+    op.drop_index('ix_Artist_city_state', table_name='Artist')
+    op.drop_index(op.f('ix_Artist_created_at'), table_name='Artist')
+    op.drop_index(op.f('ix_Show_start_time'), table_name='Show')
+    op.drop_index('ix_Show_artist_id_start_time', table_name='Show')
+    op.drop_index('ix_Show_venue_id_start_time', table_name='Show')
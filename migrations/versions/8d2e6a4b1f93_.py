@@ -0,0 +1,34 @@
+"""make artist and venue names not null, they are pagination keys
+
+Revision ID: 8d2e6a4b1f93
+Revises: 3b9d7e2f5c61
+Create Date: 2026-10-19 09:12:40.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d2e6a4b1f93'
+down_revision = '3b9d7e2f5c61'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    sqlite = op.get_bind().dialect.name == 'sqlite'
+    for table in ('Artist', 'Venue'):
+        # rows without a name would drop out of the (name, id) keyset pages, they sort first as '' instead
+        op.execute(sa.text('UPDATE "{}" SET name = \'\' WHERE name IS NULL'.format(table)))
+        if not sqlite:
+            # SQLite would have to copy the table, and dropping the old one cascades to its shows
+            # (3b9d7e2f5c61) and takes the full-text triggers with it; the forms require a name anyway
+            op.alter_column(table, 'name', existing_type=sa.String(), nullable=False)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        return
+    for table in ('Venue', 'Artist'):
+        op.alter_column(table, 'name', existing_type=sa.String(), nullable=True)
@@ -0,0 +1,36 @@
+"""add genre bitmask to artist and venue
+
+Revision ID: 9e4b6d2a1c85
+Revises: 5d1a8e3c7f20
+Create Date: 2026-10-18 16:22:19.470311
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9e4b6d2a1c85'
+down_revision = '5d1a8e3c7f20'
+branch_labels = None
+depends_on = None
+
+# frozen copy of genres.GENRES at this revision, bit i is GENRES[i]
+GENRES = ['Alternative', 'Blues', 'Classical', 'Country', 'Electronic', 'Folk', 'Funk', 'Hip-Hop',
+          'Heavy Metal', 'Instrumental', 'Jazz', 'Musical Theatre', 'Pop', 'Punk', 'R&B', 'Reggae',
+          'Rock n Roll', 'Soul', 'Other']
+
+
+def upgrade():
+    for table in ('Artist', 'Venue'):
+        op.add_column(table, sa.Column('genre_mask', sa.BigInteger(), server_default='0', nullable=False))
+        # one set-based UPDATE per genre, matching whole entries of the comma-joined string
+        for bit, genre in enumerate(GENRES):
+            op.execute(sa.text('UPDATE "{}" SET genre_mask = genre_mask | :bit '
+                               "WHERE ',' || genres || ',' LIKE :pattern".format(table))
+                       .bindparams(bit=1 << bit, pattern='%,{},%'.format(genre)))
+
+
+def downgrade():
+    op.drop_column('Venue', 'genre_mask')
+    op.drop_column('Artist', 'genre_mask')
@@ -0,0 +1,29 @@
+"""add latitude and longitude to venue
+
+Revision ID: a4c81e6f3b27
+Revises: d6a2f9b41c58
+Create Date: 2026-10-18 21:15:37.904162
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4c81e6f3b27'
+down_revision = 'd6a2f9b41c58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # existing venues are placed by `flask geocode venues`, the gazetteer isn't frozen into the migration
+    op.add_column('Venue', sa.Column('latitude', sa.Float(), nullable=True))
+    op.add_column('Venue', sa.Column('longitude', sa.Float(), nullable=True))
+    op.create_index('ix_Venue_latitude_longitude', 'Venue', ['latitude', 'longitude'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_Venue_latitude_longitude', table_name='Venue')
+    op.drop_column('Venue', 'longitude')
+    op.drop_column('Venue', 'latitude')
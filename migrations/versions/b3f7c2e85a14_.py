@@ -0,0 +1,30 @@
+"""add row version counters for api etags
+
+Revision ID: b3f7c2e85a14
+Revises: 9e4b6d2a1c85
+Create Date: 2026-10-18 18:47:33.215906
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3f7c2e85a14'
+down_revision = '9e4b6d2a1c85'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('Artist', sa.Column('version_id', sa.Integer(), server_default='1', nullable=False))
+    op.add_column('Venue', sa.Column('version_id', sa.Integer(), server_default='1', nullable=False))
+    op.add_column('Show', sa.Column('version_id', sa.Integer(), server_default='1', nullable=False))
+    op.create_index('ix_Venue_name_id', 'Venue', ['name', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_Venue_name_id', table_name='Venue')
+    op.drop_column('Show', 'version_id')
+    op.drop_column('Venue', 'version_id')
+    op.drop_column('Artist', 'version_id')
@@ -0,0 +1,35 @@
+"""index only the archived venues and artists
+
+Revision ID: c5f1e8a3d726
+Revises: 8d2e6a4b1f93
+Create Date: 2026-10-19 14:31:07.524118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5f1e8a3d726'
+down_revision = '8d2e6a4b1f93'
+branch_labels = None
+depends_on = None
+
+ARCHIVED = sa.text('archived_at IS NOT NULL')
+
+
+def upgrade():
+    # a full archived_at index made planners answer "archived_at IS NULL" listings, e.g. the home page feed,
+    # from it and sort every row; partial, it only serves finding the archived rows
+    for table in ('Venue', 'Artist'):
+        name = 'ix_{}_archived_at'.format(table)
+        op.drop_index(name, table_name=table)
+        op.create_index(name, table, ['archived_at'], unique=False,
+                        postgresql_where=ARCHIVED, sqlite_where=ARCHIVED)
+
+
+def downgrade():
+    for table in ('Artist', 'Venue'):
+        name = 'ix_{}_archived_at'.format(table)
+        op.drop_index(name, table_name=table)
+        op.create_index(name, table, ['archived_at'], unique=False)
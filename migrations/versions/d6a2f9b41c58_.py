@@ -0,0 +1,96 @@
+"""partition Show by month of start_time on PostgreSQL
+
+Revision ID: d6a2f9b41c58
+Revises: 7c3e5b9a2d41
+Create Date: 2026-10-18 20:41:12.518733
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd6a2f9b41c58'
+down_revision = '7c3e5b9a2d41'
+branch_labels = None
+depends_on = None
+
+# months of partitions created past the current one, partitions.py keeps adding them from there
+AHEAD = 3
+COLUMNS = 'id, start_time, venue_id, artist_id, version_id'
+INDEXES = [('ix_Show_venue_id_start_time', ['venue_id', 'start_time']),
+           ('ix_Show_artist_id_start_time', ['artist_id', 'start_time']),
+           ('ix_Show_start_time_id', ['start_time', 'id'])]
+
+
+def _add_months(month, n):
+    years, month0 = divmod(month.month - 1 + n, 12)
+    return datetime(month.year + years, month0 + 1, 1)
+
+
+def _swap(create, sequence):
+    # rename "Show" away, create the new "Show" with create, copy the rows over and drop the old table.
+    # the id sequence is detached first, it would be dropped with the old table
+    op.execute('ALTER TABLE "Show" RENAME TO "Show_old"')
+    op.execute('ALTER TABLE "Show_old" RENAME CONSTRAINT "Show_pkey" TO "Show_old_pkey"')
+    for name, _ in INDEXES:
+        op.drop_index(name, table_name='Show_old')
+    op.execute('ALTER SEQUENCE {} OWNED BY NONE'.format(sequence))
+    create()
+    op.execute('INSERT INTO "Show" ({0}) SELECT {0} FROM "Show_old"'.format(COLUMNS))
+    for name, columns in INDEXES:
+        op.create_index(name, 'Show', columns, unique=False)
+    op.execute('DROP TABLE "Show_old"')
+    op.execute('ALTER SEQUENCE {} OWNED BY "Show".id'.format(sequence))
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        # declarative partitioning is PostgreSQL only, elsewhere Show stays a plain table
+        return
+    # the partition key is part of the primary key, so it can't be NULL
+    if bind.execute(sa.text('SELECT count(*) FROM "Show" WHERE start_time IS NULL')).scalar():
+        raise RuntimeError('"Show" has rows without a start_time, set or delete them before partitioning')
+    sequence = bind.execute(sa.text("SELECT pg_get_serial_sequence('\"Show\"', 'id')")).scalar()
+    first = bind.execute(sa.text('SELECT min(start_time) FROM "Show"')).scalar() or datetime.utcnow()
+
+    def create():
+        op.execute('CREATE TABLE "Show" ('
+                   "id integer NOT NULL DEFAULT nextval('{}'::regclass), "
+                   'start_time timestamp without time zone NOT NULL, '
+                   'venue_id integer NOT NULL REFERENCES "Venue" (id), '
+                   'artist_id integer NOT NULL REFERENCES "Artist" (id), '
+                   "version_id integer NOT NULL DEFAULT '1', "
+                   'PRIMARY KEY (id, start_time)'
+                   ') PARTITION BY RANGE (start_time)'.format(sequence))
+        op.execute('CREATE TABLE "Show_default" PARTITION OF "Show" DEFAULT')
+        month, last = datetime(first.year, first.month, 1), _add_months(datetime.utcnow(), AHEAD)
+        while month <= last:
+            end = _add_months(month, 1)
+            op.execute('CREATE TABLE "Show_y{:04d}m{:02d}" PARTITION OF "Show" FOR VALUES FROM (\'{}\') TO (\'{}\')'
+                       .format(month.year, month.month, month.isoformat(' '), end.isoformat(' ')))
+            month = end
+
+    _swap(create, sequence)
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+    sequence = bind.execute(sa.text("SELECT pg_get_serial_sequence('\"Show\"', 'id')")).scalar()
+
+    def create():
+        op.execute('CREATE TABLE "Show" ('
+                   "id integer NOT NULL DEFAULT nextval('{}'::regclass), "
+                   'start_time timestamp without time zone, '
+                   'venue_id integer NOT NULL REFERENCES "Venue" (id), '
+                   'artist_id integer NOT NULL REFERENCES "Artist" (id), '
+                   "version_id integer NOT NULL DEFAULT '1', "
+                   'PRIMARY KEY (id))'.format(sequence))
+
+    # dropping the partitioned table drops its partitions
+    _swap(create, sequence)
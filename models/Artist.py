@@ -1,19 +1,66 @@
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import validates
+
+from availability import availability_windows, minute_of_day
 from config import db
+from genres import genres_to_mask
+from models.ArtistAvailability import ArtistAvailability
 
 class Artist(db.Model):
     __tablename__ = 'Artist'
+    __table_args__ = (db.Index('ix_Artist_city_state', 'city', 'state'),
+                      db.Index('ix_Artist_name_id', 'name', 'id'),
+                      # only the few archived rows, so listings filtering on archived_at IS NULL walk their own
+                      # indexes instead of this one; see archive.py
+                      db.Index('ix_Artist_archived_at', 'archived_at',
+                               postgresql_where=db.text('archived_at IS NOT NULL'),
+                               sqlite_where=db.text('archived_at IS NOT NULL')))
 
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String)
+    # NOT NULL, listings are paginated on (name, id)
+    name = db.Column(db.String, nullable=False)
     city = db.Column(db.String(120))
     state = db.Column(db.String(120))
     phone = db.Column(db.String(120))
     genres = db.Column(db.String(120))
+    genre_mask = db.Column(db.BigInteger, nullable=False, default=0, server_default='0')
     image_link = db.Column(db.String(500))
     facebook_link = db.Column(db.String(120))
     website = db.Column(db.String(120))
     seeking_venue = db.Column(db.Boolean())
     seeking_description = db.Column(db.String(250))
     availability = db.Column(db.String(120))
-    shows = db.relationship('Show', backref='shows')
-    created_at = db.Column(db.DateTime, nullable=False)
\ No newline at end of file
+    windows = db.relationship('ArtistAvailability', cascade="all, delete-orphan", passive_deletes=True)
+    shows = db.relationship('Show', backref='shows', passive_deletes=True)
+    created_at = db.Column(db.DateTime, nullable=False, index=True)
+    # set when the artist is archived instead of deleted, it is then hidden everywhere; see archive.py
+    archived_at = db.Column(db.DateTime)
+    # shows after / up to CounterWatermark.rolled_to, maintained by counters.py
+    upcoming_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    past_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # bumped on every ORM update, the API derives its ETags from it
+    version_id = db.Column(db.Integer, nullable=False, server_default='1')
+
+    __mapper_args__ = {'version_id_col': version_id}
+
+    @validates('genres')
+    def sync_genre_mask(self, key, genres):
+        # keep genre_mask in step with the comma-joined genres string, see genres.py
+        self.genre_mask = genres_to_mask(genres.split(',') if genres else [])
+        return genres
+
+    @validates('availability')
+    def sync_windows(self, key, availability):
+        # parse the availability text once, into the ArtistAvailability rows bookings are checked against
+        self.windows = [ArtistAvailability(weekday=weekday, start_minute=start, end_minute=end)
+                        for weekday, start, end in availability_windows(availability)]
+        return availability
+
+    @classmethod
+    def available_at(cls, start):
+        # SQL predicate: the artist has no availability windows (available at all times) or one covering start
+        minute = minute_of_day(start)
+        covering = and_(or_(ArtistAvailability.weekday.is_(None), ArtistAvailability.weekday == start.weekday()),
+                        ArtistAvailability.start_minute < minute,
+                        ArtistAvailability.end_minute > minute)
+        return or_(~cls.windows.any(), cls.windows.any(covering))
@@ -0,0 +1,30 @@
+from sqlalchemy import and_, exists, func, not_, select
+
+from availability import availability_windows
+from config import db
+
+class ArtistAvailability(db.Model):
+    # one availability window of an artist, parsed from Artist.availability, see availability.py
+    __tablename__ = 'ArtistAvailability'
+    __table_args__ = (db.Index('ix_ArtistAvailability_artist_id_start_minute', 'artist_id', 'start_minute'),
+                      db.Index('ix_ArtistAvailability_start_minute_end_minute', 'start_minute', 'end_minute'))
+
+    id = db.Column(db.Integer, primary_key=True)
+    artist_id = db.Column(db.Integer, db.ForeignKey('Artist.id', ondelete='CASCADE'), nullable=False)
+    # 0 is Monday, None every day
+    weekday = db.Column(db.SmallInteger)
+    start_minute = db.Column(db.SmallInteger, nullable=False)
+    end_minute = db.Column(db.SmallInteger, nullable=False)
+
+    @classmethod
+    def index_artists(cls, connection, after_id=0):
+        # add the windows of artists inserted without the ORM (ids above after_id) that have none yet
+        artist = db.metadata.tables['Artist']
+        rows = connection.execute(
+            select([artist.c.id, artist.c.availability])
+            .where(and_(artist.c.id > after_id, func.coalesce(artist.c.availability, '') != ''))
+            .where(not_(exists().where(cls.artist_id == artist.c.id)))).fetchall()
+        windows = [{"artist_id": artist_id, "weekday": weekday, "start_minute": start, "end_minute": end}
+                   for artist_id, text in rows for weekday, start, end in availability_windows(text)]
+        if windows:
+            connection.execute(cls.__table__.insert(), windows)
@@ -0,0 +1,18 @@
+from datetime import datetime
+
+from sqlalchemy import event
+
+from config import db
+
+class CounterWatermark(db.Model):
+    # single row: the instant the show counters of Artist and Venue were last rolled forward to, see counters.py
+    __tablename__ = 'CounterWatermark'
+
+    id = db.Column(db.Integer, primary_key=True)
+    rolled_to = db.Column(db.DateTime, nullable=False)
+
+
+@event.listens_for(CounterWatermark.__table__, 'after_create')
+def insert_watermark(table, connection, **kw):
+    # db.create_all() starts from an empty Show table, so any instant is a correct watermark
+    connection.execute(table.insert().values(id=1, rolled_to=datetime.utcnow()))
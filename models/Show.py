@@ -2,7 +2,17 @@ from config import db
 
 class Show(db.Model):
     __tablename__ = 'Show'
+    __table_args__ = (db.Index('ix_Show_venue_id_start_time', 'venue_id', 'start_time'),
+                      db.Index('ix_Show_artist_id_start_time', 'artist_id', 'start_time'),
+                      db.Index('ix_Show_start_time_id', 'start_time', 'id'))
+
     id = db.Column(db.Integer, primary_key=True)
-    start_time = db.Column(db.DateTime)
-    venue_id = db.Column(db.Integer, db.ForeignKey('Venue.id'), nullable=False)
-    artist_id = db.Column(db.Integer, db.ForeignKey('Artist.id'), nullable=False)
\ No newline at end of file
+    # on PostgreSQL also the partition key, see partitions.py
+    start_time = db.Column(db.DateTime, nullable=False)
+    # deleting a venue or artist deletes its shows in the database, see archive.py
+    venue_id = db.Column(db.Integer, db.ForeignKey('Venue.id', ondelete='CASCADE'), nullable=False)
+    artist_id = db.Column(db.Integer, db.ForeignKey('Artist.id', ondelete='CASCADE'), nullable=False)
+    # bumped on every ORM update, the API derives its ETags from it
+    version_id = db.Column(db.Integer, nullable=False, server_default='1')
+
+    __mapper_args__ = {'version_id_col': version_id}
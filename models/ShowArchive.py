@@ -0,0 +1,13 @@
+from config import db
+
+class ShowArchive(db.Model):
+    # a show of an archived venue or artist, moved out of Show by archive.py. No foreign keys, so the
+    # archive outlives the listings it refers to
+    __tablename__ = 'ShowArchive'
+
+    # the id the show had in Show
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    start_time = db.Column(db.DateTime)
+    venue_id = db.Column(db.Integer, nullable=False, index=True)
+    artist_id = db.Column(db.Integer, nullable=False, index=True)
+    archived_at = db.Column(db.DateTime, nullable=False)
@@ -1,10 +1,23 @@
+from sqlalchemy.orm import validates
+
 from config import db
+from genres import genres_to_mask
+from gazetteer import geocode
 
 class Venue(db.Model):
     __tablename__ = 'Venue'
+    __table_args__ = (db.Index('ix_Venue_city_state', 'city', 'state'),
+                      db.Index('ix_Venue_name_id', 'name', 'id'),
+                      db.Index('ix_Venue_latitude_longitude', 'latitude', 'longitude'),
+                      # only the few archived rows, so listings filtering on archived_at IS NULL walk their own
+                      # indexes instead of this one; see archive.py
+                      db.Index('ix_Venue_archived_at', 'archived_at',
+                               postgresql_where=db.text('archived_at IS NOT NULL'),
+                               sqlite_where=db.text('archived_at IS NOT NULL')))
 
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String)
+    # NOT NULL, listings are paginated on (name, id)
+    name = db.Column(db.String, nullable=False)
     city = db.Column(db.String(120))
     state = db.Column(db.String(120))
     address = db.Column(db.String(120))
@@ -15,5 +28,31 @@ class Venue(db.Model):
     seeking_talent = db.Column(db.Boolean())
     seeking_description = db.Column(db.String(250))
     genres = db.Column(db.String(120))
-    shows = db.relationship('Show', backref='showlist', cascade="all, delete")
-    created_at = db.Column(db.DateTime, nullable= False)
\ No newline at end of file
+    genre_mask = db.Column(db.BigInteger, nullable=False, default=0, server_default='0')
+    # placed from city and state by the bundled gazetteer, None when it doesn't know the city; see gazetteer.py
+    latitude = db.Column(db.Float)
+    longitude = db.Column(db.Float)
+    shows = db.relationship('Show', backref='showlist', cascade="all, delete", passive_deletes=True)
+    created_at = db.Column(db.DateTime, nullable=False, index=True)
+    # set when the venue is archived instead of deleted, it is then hidden everywhere; see archive.py
+    archived_at = db.Column(db.DateTime)
+    # shows after / up to CounterWatermark.rolled_to, maintained by counters.py
+    upcoming_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    past_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # bumped on every ORM update, the API derives its ETags from it
+    version_id = db.Column(db.Integer, nullable=False, server_default='1')
+
+    __mapper_args__ = {'version_id_col': version_id}
+
+    @validates('genres')
+    def sync_genre_mask(self, key, genres):
+        # keep genre_mask in step with the comma-joined genres string, see genres.py
+        self.genre_mask = genres_to_mask(genres.split(',') if genres else [])
+        return genres
+
+    @validates('city', 'state')
+    def sync_location(self, key, value):
+        # keep latitude/longitude in step with city and state
+        city, state = (value, self.state) if key == 'city' else (self.city, value)
+        self.latitude, self.longitude = geocode(city, state) or (None, None)
+        return value
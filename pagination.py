@@ -0,0 +1,90 @@
+import base64
+import json
+from collections import namedtuple
+from datetime import datetime
+
+from flask import abort, current_app, request
+from sqlalchemy import tuple_
+
+# ----------------------------------------------------------------------------#
+# Keyset (cursor) pagination.
+#
+# A page is fetched with a single `WHERE (k1, k2) > (:v1, :v2) ORDER BY k1, k2
+# LIMIT n + 1` query on an indexed key, so page 1000 costs the same as page 1.
+# Cursors are the key of the first/last row of a page, url-safe base64 JSON.
+# Key columns must be NOT NULL, a row with a NULL key would never compare
+# greater or less than a cursor and so drop out of every page.
+# ----------------------------------------------------------------------------#
+
+Page = namedtuple('Page', ['items', 'next', 'prev', 'size'])
+
+
+def encode_cursor(values):
+    values = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, columns):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError(token)
+        return [_key_value(v, c) for v, c in zip(values, columns)]
+    except (ValueError, TypeError, NotImplementedError):
+        abort(400)
+
+
+def _key_value(value, column):
+    # a cursor value as a bind parameter for column, ValueError unless it is of the column's type
+    python_type = column.type.python_type
+    if python_type is datetime and isinstance(value, str):
+        return datetime.fromisoformat(value)
+    if python_type is float and type(value) is int:
+        return float(value)
+    if type(value) is not python_type:
+        raise ValueError(value)
+    return value
+
+
+def page_size():
+    # ?size= overrides PAGE_SIZE from config.py, up to MAX_PAGE_SIZE
+    size = request.args.get('size', type=int) or current_app.config['PAGE_SIZE']
+    return max(1, min(size, current_app.config['MAX_PAGE_SIZE']))
+
+
+def keyset(query, columns):
+    # (query for one page of query ordered by columns, function turning its rows into the Page), positioned
+    # by the ?after= / ?before= cursor of the request. every column must also be selected by query, under
+    # its own key. split from paginate() so the async server (asgi.py) can run the query itself.
+    size = page_size()
+    after = request.args.get('after')
+    before = request.args.get('before')
+    key = tuple_(*columns)
+
+    if before:
+        query = query.filter(key < tuple_(*decode_cursor(before, columns))) \
+            .order_by(*[c.desc() for c in columns]).limit(size + 1)
+    else:
+        if after:
+            query = query.filter(key > tuple_(*decode_cursor(after, columns)))
+        query = query.order_by(*columns).limit(size + 1)
+
+    def page(rows):
+        if before:
+            has_prev, has_next = len(rows) > size, True
+            rows = rows[:size][::-1]
+        else:
+            has_prev, has_next = bool(after), len(rows) > size
+            rows = rows[:size]
+        cursor = lambda row: encode_cursor([getattr(row, c.key) for c in columns])
+        return Page(items=rows,
+                    next=cursor(rows[-1]) if rows and has_next else None,
+                    prev=cursor(rows[0]) if rows and has_prev else None,
+                    size=size)
+    return query, page
+
+
+def paginate(query, columns):
+    # one page of query ordered by columns, see keyset()
+    query, page = keyset(query, columns)
+    return page(query.all())
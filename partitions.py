@@ -0,0 +1,129 @@
+import threading
+import time
+from datetime import datetime
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+
+from config import db
+
+# ----------------------------------------------------------------------------#
+# Monthly partitions of the Show table on PostgreSQL.
+#
+# Migration d6a2f9b41c58 turns "Show" into a table partitioned by range of
+# start_time: one partition per calendar month ("Show_y2026m10") and
+# "Show_default" for shows outside all of them. Queries bounded on
+# start_time (upcoming and past shows, /shows?from=&to=, the shows of a day)
+# then only scan the months they ask for. ensure_partitions() keeps
+# PARTITION_MONTHS_AHEAD months of partitions ready, moving any shows that
+# reached the default partition into their new month. Every worker checks
+# at most once per PARTITION_CHECK_INTERVAL seconds before a request, and
+# `flask partitions ensure` does it from a scheduler. On other databases
+# Show stays a plain table and none of this runs.
+# ----------------------------------------------------------------------------#
+
+# pg_try_advisory_xact_lock key, so only one worker creates partitions at a time
+LOCK_KEY = 0x53686f77
+
+
+def month_start(moment):
+    return datetime(moment.year, moment.month, 1)
+
+
+def add_months(month, n):
+    years, month0 = divmod(month.month - 1 + n, 12)
+    return datetime(month.year + years, month0 + 1, 1)
+
+
+def partition_name(month):
+    return 'Show_y{:04d}m{:02d}'.format(month.year, month.month)
+
+
+def is_partitioned(connection):
+    if connection.dialect.name != 'postgresql':
+        return False
+    return connection.execute(text("SELECT EXISTS (SELECT 1 FROM pg_partitioned_table "
+                                   "WHERE partrelid = '\"Show\"'::regclass)")).scalar()
+
+
+def partitions(connection):
+    # names of the partitions of "Show"
+    return {name for (name,) in connection.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = '\"Show\"'::regclass"))}
+
+
+def create_partition(connection, month):
+    # the partition of month, taking over the shows the default partition holds for it.
+    # CREATE TABLE ... PARTITION OF would fail while the default partition has shows of that month
+    name = partition_name(month)
+    start, end = month, add_months(month, 1)
+    connection.execute(text('CREATE TABLE "{}" (LIKE "Show" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'.format(name)))
+    connection.execute(text('WITH moved AS (DELETE FROM "Show_default" '
+                            'WHERE start_time >= :start AND start_time < :end RETURNING *) '
+                            'INSERT INTO "{}" SELECT * FROM moved'.format(name)), start=start, end=end)
+    connection.execute(text('ALTER TABLE "Show" ATTACH PARTITION "{}" FOR VALUES FROM (\'{}\') TO (\'{}\')'
+                            .format(name, start.isoformat(' '), end.isoformat(' '))))
+    return name
+
+
+def ensure_partitions(connection, ahead, now=None):
+    # create the missing partitions from this month to ahead months on, returns their names
+    if not is_partitioned(connection):
+        return []
+    if not connection.execute(text('SELECT pg_try_advisory_xact_lock(:key)'), key=LOCK_KEY).scalar():
+        return []
+    existing = partitions(connection)
+    month = month_start(now or datetime.utcnow())
+    created = []
+    for n in range(ahead + 1):
+        if partition_name(add_months(month, n)) not in existing:
+            created.append(create_partition(connection, add_months(month, n)))
+    return created
+
+
+class EnsurePartitions(object):
+    # per worker throttle for creating upcoming partitions before requests
+
+    def __init__(self, interval, ahead):
+        self.interval = interval
+        self.ahead = ahead
+        self.next_run = 0.0
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        if not self.interval or time.monotonic() < self.next_run or not self.lock.acquire(False):
+            return
+        try:
+            self.next_run = time.monotonic() + self.interval
+            with db.engine.begin() as connection:
+                ensure_partitions(connection, self.ahead)
+        finally:
+            self.lock.release()
+
+
+def init_partitions(app):
+    if make_url(app.config['SQLALCHEMY_DATABASE_URI']).get_backend_name() == 'postgresql':
+        app.before_request(EnsurePartitions(app.config['PARTITION_CHECK_INTERVAL'],
+                                            app.config['PARTITION_MONTHS_AHEAD']))
+    app.cli.add_command(partitions_command)
+
+
+partitions_command = AppGroup('partitions', help='Maintain the monthly partitions of the Show table.')
+
+
+@partitions_command.command('ensure')
+@click.option('--ahead', type=int, help='months of partitions to keep ready, default PARTITION_MONTHS_AHEAD')
+def ensure_command(ahead):
+    """Create the partitions of the coming months."""
+    if ahead is None:
+        ahead = current_app.config['PARTITION_MONTHS_AHEAD']
+    with db.engine.begin() as connection:
+        if not is_partitioned(connection):
+            click.echo('"Show" is not partitioned on this database')
+            return
+        created = ensure_partitions(connection, ahead)
+    click.echo('created {}'.format(', '.join(created)) if created else 'partitions up to date')
@@ -0,0 +1,115 @@
+import sqlite3
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError
+from sqlalchemy.pool import NullPool, QueuePool
+
+# ----------------------------------------------------------------------------#
+# Connection pool configuration and statistics.
+#
+# config.py builds SQLALCHEMY_ENGINE_OPTIONS with engine_options() from the
+# DB_POOL_* environment variables. Each pool records how long its checkouts
+# waited, so /metrics/pool can show whether workers queue for connections,
+# for the primary and every replica separately.
+# ----------------------------------------------------------------------------#
+
+
+class PoolStats(object):
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.wait_total = 0.0
+            self.wait_max = 0.0
+
+    def record(self, waited, timed_out=False):
+        with self._lock:
+            self.checkouts += 1
+            self.timeouts += timed_out
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+
+    def as_dict(self):
+        with self._lock:
+            return {"checkouts": self.checkouts,
+                    "timeouts": self.timeouts,
+                    "wait_avg_ms": round(self.wait_total * 1000 / self.checkouts, 3) if self.checkouts else 0.0,
+                    "wait_max_ms": round(self.wait_max * 1000, 3)}
+
+
+class TimedQueuePool(QueuePool):
+    # QueuePool that records the time spent waiting for a free connection in its own stats
+
+    def __init__(self, creator, **kw):
+        super(TimedQueuePool, self).__init__(creator, **kw)
+        self.stats = PoolStats()
+
+    def recreate(self):
+        # engine.dispose() and invalidation replace the pool, the engine's figures carry over
+        pool = super(TimedQueuePool, self).recreate()
+        pool.stats = self.stats
+        return pool
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super(TimedQueuePool, self)._do_get()
+        except TimeoutError:
+            self.stats.record(time.perf_counter() - start, timed_out=True)
+            raise
+        self.stats.record(time.perf_counter() - start)
+        return connection
+
+
+def engine_options(uri, pool_size, max_overflow, pool_timeout, pool_recycle, pre_ping,
+                   statement_timeout_ms, pgbouncer):
+    # SQLALCHEMY_ENGINE_OPTIONS for uri. Only PostgreSQL is tuned, other databases keep their defaults.
+    # pool_size 0 disables client side pooling, e.g. when PgBouncer does all of it.
+    if not uri.startswith('postgresql'):
+        return {}
+    options = {"pool_pre_ping": pre_ping, "pool_recycle": pool_recycle}
+    if pool_size == 0:
+        options["poolclass"] = NullPool
+    else:
+        options.update(poolclass=TimedQueuePool, pool_size=pool_size, max_overflow=max_overflow,
+                       pool_timeout=pool_timeout)
+    if statement_timeout_ms and not pgbouncer:
+        # PgBouncer rejects startup options, transaction pooling mode uses SET LOCAL instead
+        options["connect_args"] = {"options": "-c statement_timeout={}".format(statement_timeout_ms)}
+    return options
+
+
+def use_local_statement_timeout(statement_timeout_ms):
+    # PgBouncer transaction pooling hands each transaction any server connection, so session
+    # settings would leak between clients. Scope the timeout to every transaction instead.
+    @event.listens_for(Engine, 'begin')
+    def set_local_statement_timeout(conn):
+        if conn.dialect.name == 'postgresql':
+            conn.exec_driver_sql('SET LOCAL statement_timeout = {:d}'.format(statement_timeout_ms))
+
+
+@event.listens_for(Engine, 'connect')
+def enforce_sqlite_foreign_keys(dbapi_connection, connection_record):
+    # SQLite ignores foreign keys unless asked, deleting a venue or artist relies on their ON DELETE CASCADE
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        dbapi_connection.execute('PRAGMA foreign_keys = ON')
+
+
+def pool_status(engine):
+    data = {"pool": engine.pool.__class__.__name__, "status": engine.pool.status()}
+    if isinstance(engine.pool, QueuePool):
+        data.update(size=engine.pool.size(),
+                    checked_in=engine.pool.checkedin(),
+                    checked_out=engine.pool.checkedout(),
+                    overflow=max(engine.pool.overflow(), 0))
+    if isinstance(engine.pool, TimedQueuePool):
+        data.update(engine.pool.stats.as_dict())
+    return data
@@ -0,0 +1,139 @@
+import hashlib
+import json
+from datetime import datetime, timedelta
+
+from sqlalchemy import ARRAY, Integer, any_, bindparam, func, literal_column, select
+
+from cache import artist_key, venue_key
+from config import app, cache, db
+from genres import mask_to_genres
+from models.Artist import Artist
+from models.Show import Show
+from models.Venue import Venue
+
+# ----------------------------------------------------------------------------#
+# Data access shared by the HTML pages (app.py) and the JSON API (api.py).
+# ----------------------------------------------------------------------------#
+
+
+def rollover_timeout(upcoming_shows):
+    # cache a detail page until its first upcoming show starts, so that show moves to past shows on time
+    timeout = app.config['CACHE_DEFAULT_TIMEOUT']
+    if upcoming_shows:
+        first = min(s["start_time"] for s in upcoming_shows)
+        timeout = min(timeout, (first - datetime.utcnow()).total_seconds())
+    return timeout
+
+
+def invalidate_pages(artist_ids=(), venue_ids=()):
+    cache.delete(*[artist_key(i) for i in artist_ids] + [venue_key(i) for i in venue_ids])
+
+
+# per detail model: the Show column pointing at it, and the other side of its shows with its label prefix
+DETAIL_SHOWS = {'Artist': (Show.artist_id, Venue, Show.venue_id, "venue"),
+                'Venue': (Show.venue_id, Artist, Show.artist_id, "artist")}
+
+
+def detail_statements(model, entity_id, now):
+    # the entity row, its past shows and its upcoming shows: three independent statements, so the
+    # async server (asgi.py) can run them concurrently
+    column, other, other_id, prefix = DETAIL_SHOWS[model.__name__]
+    shows = select([other_id, other.name.label(prefix + "_name"), other.image_link.label(prefix + "_image_link"),
+                    Show.start_time]).select_from(Show.__table__.join(other.__table__)) \
+        .where(column == entity_id).where(other.archived_at.is_(None))
+    return (select([model.__table__]).where(model.id == entity_id).where(model.archived_at.is_(None)),
+            shows.where(Show.start_time < now),
+            shows.where(Show.start_time > now))
+
+
+def detail_data(entity, past_shows, upcoming_shows):
+    # the dict the detail templates and the API render, from the rows of detail_statements()
+    data = dict(entity)
+    data["past_shows"] = [dict(s) for s in past_shows]
+    data["upcoming_shows"] = [dict(s) for s in upcoming_shows]
+    data["genres"] = mask_to_genres(data["genre_mask"])
+    data["upcoming_shows_count"] = len(data["upcoming_shows"])
+    data["past_shows_count"] = len(data["past_shows"])
+    # the API's ETag, cached with the data so a conditional GET is answered without serializing anything
+    data["etag"] = row_etag(sorted(data.items()))
+    return data
+
+
+def _detail(model, key, entity_id):
+    data = cache.get(key)
+    # entries a shared cache (CACHE_TYPE=sqlite) still holds from before ETags were cached with them are reloaded
+    if data is None or "etag" not in data:
+        entity, past, upcoming = detail_statements(model, entity_id, datetime.utcnow())
+        entity = db.session.execute(entity).first()
+        if entity is None:
+            return None
+        data = detail_data(entity, db.session.execute(past), db.session.execute(upcoming))
+        cache.set(key, data, rollover_timeout(data["upcoming_shows"]))
+    return data
+
+
+def artist_detail(artist_id):
+    # the artist with its past and upcoming shows, None if there is no such artist.
+    # cached until the artist or one of its shows changes, or its next show starts
+    return _detail(Artist, artist_key(artist_id), artist_id)
+
+
+def venue_detail(venue_id):
+    # the venue with its past and upcoming shows, None if there is no such venue.
+    # cached until the venue or one of its shows changes, or its next show starts
+    return _detail(Venue, venue_key(venue_id), venue_id)
+
+
+def recently_listed(model, limit=10):
+    # the newest artists or venues, with what the home page tiles show
+    return select([model.id, model.name, model.city, model.state, model.image_link, model.created_at]) \
+        .where(model.archived_at.is_(None)).order_by(model.created_at.desc(), model.id.desc()).limit(limit)
+
+
+def show_listing(start=None, end=None):
+    # shows joined to their artist and venue, as listed on /shows; start/end bound start_time to [start, end).
+    # the shows of archived venues and artists are left out until they are moved away, see archive.py
+    query = Show.query.with_entities(Show.id, Show.artist_id, Show.venue_id, Artist.name.label("artist_name"),
+                                     Artist.image_link.label("artist_image_link"), Show.start_time,
+                                     Venue.name.label("venue_name"), Venue.image_link.label("venue_image_link")) \
+        .join(Artist).join(Venue).filter(Artist.archived_at.is_(None), Venue.archived_at.is_(None))
+    if start is not None:
+        query = query.filter(Show.start_time >= start)
+    if end is not None:
+        query = query.filter(Show.start_time < end)
+    return query
+
+
+def shows_at(venue_ids, start=None, end=None):
+    # show_listing() of the shows at venue_ids, which are bound as one array parameter however many they are.
+    # past NEAR_SCAN_VENUES venues the listing walks the (start_time, id) index and probes the set, a dense
+    # area fills a page within a few rows; below, each venue's upcoming shows are read and sorted
+    ids = sorted(venue_ids)
+    venue_id = Show.venue_id + 0 if len(ids) >= app.config['NEAR_SCAN_VENUES'] else Show.venue_id
+    if db.engine.dialect.name == 'postgresql':
+        return show_listing(start, end).filter(venue_id == any_(bindparam('venue_ids', ids, type_=ARRAY(Integer))))
+    values = select([literal_column('value')]).select_from(func.json_each(json.dumps(ids)))
+    return show_listing(start, end).filter(venue_id.in_(values))
+
+
+def escape_like(term):
+    # term as an ILIKE pattern matching it literally, to use with escape='\\'
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def show_search(term):
+    # statement for the shows on a YYYY-MM-DD day or at the venues of a "City, ST", None for any other term
+    try:
+        day = datetime.strptime(term, '%Y-%m-%d')
+        return show_listing(day, day + timedelta(days=1)).statement
+    except ValueError:
+        location = term.split(",")
+        if len(location) != 2:
+            return None
+        return show_listing().filter(Venue.city.ilike(escape_like(location[0].strip()), escape='\\'),
+                                     Venue.state.ilike(escape_like(location[1].strip()), escape='\\')).statement
+
+
+def row_etag(*parts):
+    # strong ETag value from row ids and versions
+    return hashlib.sha1(repr(parts).encode()).hexdigest()
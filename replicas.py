@@ -0,0 +1,87 @@
+import random
+import time
+
+from flask import current_app, g, has_request_context, request, session
+from flask_sqlalchemy import SignallingSession, SQLAlchemy
+from sqlalchemy import orm
+from sqlalchemy.sql.expression import Select, TextClause
+
+# ----------------------------------------------------------------------------#
+# Read replicas.
+#
+# DATABASE_REPLICA_URLS lists databases replicating the primary, each one a
+# bind of its own (replica0, replica1, ...). While a GET or HEAD request is
+# served, the SELECTs of db.session go to one replica picked at random for
+# the request; writes, SELECT ... FOR UPDATE and everything outside a request
+# (CLI commands, background threads) use the primary. So that users see
+# their own changes despite replication lag, a request that writes pins its
+# client to the primary for REPLICA_STICKY_SECONDS through the Flask session,
+# and every query of the same request after a write goes to the primary.
+# ----------------------------------------------------------------------------#
+
+STICKY_KEY = 'db_primary_until'
+
+
+def replica_binds(app):
+    return app.config.get('REPLICA_BINDS', [])
+
+
+def sticky():
+    # the client wrote recently, its reads have to see the primary
+    return session.get(STICKY_KEY, 0) > time.time()
+
+
+def reads_from_replica(app):
+    # a replica may serve the reads of the current request
+    return bool(replica_binds(app)) and has_request_context() and request.method in ('GET', 'HEAD') \
+        and not getattr(g, 'db_wrote', False) and not sticky()
+
+
+def is_read(clause):
+    if isinstance(clause, Select):
+        return clause._for_update_arg is None
+    if isinstance(clause, TextClause):
+        return clause.text.lstrip()[:6].upper() in ('SELECT', 'WITH')
+    return False
+
+
+class RoutingSession(SignallingSession):
+
+    def get_bind(self, mapper=None, clause=None):
+        if not self._flushing and is_read(clause) and reads_from_replica(self.app):
+            return self.replica()
+        if has_request_context() and not is_read(clause):
+            # a write or an unknown statement: the primary from now on
+            g.db_wrote = True
+        return SignallingSession.get_bind(self, mapper, clause)
+
+    def replica(self):
+        # the replica of this session, the same one for all its reads
+        if 'replica' not in self.info:
+            bind = random.choice(replica_binds(self.app))
+            self.info['replica'] = self.app.extensions['sqlalchemy'].db.get_engine(self.app, bind=bind)
+        return self.info['replica']
+
+
+class RoutingSQLAlchemy(SQLAlchemy):
+
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+
+def read_engine(db):
+    # engine for reads outside db.session, e.g. the /export streams
+    if reads_from_replica(current_app):
+        return db.get_engine(current_app, bind=random.choice(replica_binds(current_app)))
+    return db.engine
+
+
+def pin_writer(response):
+    if getattr(g, 'db_wrote', False) and replica_binds(current_app):
+        session[STICKY_KEY] = time.time() + current_app.config['REPLICA_STICKY_SECONDS']
+    return response
+
+
+def init_replicas(app):
+    # a no-op without replicas, registered anyway so tests can configure replicas after startup
+    app.after_request(pin_writer)
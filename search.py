@@ -0,0 +1,141 @@
+import re
+
+from sqlalchemy import DDL, and_, event, func, literal_column, select, text
+
+from config import app, db
+from models.Artist import Artist
+from models.Venue import Venue
+from queries import escape_like
+
+# ----------------------------------------------------------------------------#
+# Full-text search over artists and venues.
+#
+# PostgreSQL: each table carries a generated `search_vector` tsvector column
+# (name, city, genres, seeking_description) with a GIN index, created by
+# migration 2c7e9a41f0b6. Results are ranked with ts_rank_cd.
+# SQLite: an external-content FTS5 table per model, kept in sync by triggers
+# and created alongside the table by db.create_all(). Results are ranked
+# with bm25. Both rank the name above city, genres and description.
+# Words match by prefix; a term no word starts with falls back to the old
+# substring match on the name (ILIKE '%term%', a table scan), so "usical"
+# still finds The Musical Hop. Every statement returns at most SEARCH_LIMIT
+# rows.
+# ----------------------------------------------------------------------------#
+
+COLUMNS = ('name', 'city', 'genres', 'seeking_description')
+BM25_WEIGHTS = '10.0, 5.0, 2.0, 1.0'
+WORD = re.compile(r'\w+', re.UNICODE)
+
+
+def _fts_table(model):
+    return model.__tablename__.lower() + '_fts'
+
+
+def _sqlite_ddl(model):
+    names = dict(table=model.__tablename__,
+                 fts=_fts_table(model),
+                 columns=', '.join(COLUMNS),
+                 new=', '.join('new.' + c for c in COLUMNS),
+                 old=', '.join('old.' + c for c in COLUMNS))
+    statements = [
+        'CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({columns}, content=\'{table}\', content_rowid=\'id\')',
+        'CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON "{table}" BEGIN '
+        'INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, {new}); END',
+        'CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON "{table}" BEGIN '
+        'INSERT INTO {fts}({fts}, rowid, {columns}) VALUES (\'delete\', old.id, {old}); END',
+        'CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON "{table}" BEGIN '
+        'INSERT INTO {fts}({fts}, rowid, {columns}) VALUES (\'delete\', old.id, {old}); '
+        'INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, {new}); END',
+    ]
+    return [statement.format(**names) for statement in statements]
+
+
+for _model in (Artist, Venue):
+    for _statement in _sqlite_ddl(_model):
+        event.listen(_model.__table__, 'after_create', DDL(_statement).execute_if(dialect='sqlite'))
+    event.listen(_model.__table__, 'after_drop',
+                 DDL('DROP TABLE IF EXISTS ' + _fts_table(_model)).execute_if(dialect='sqlite'))
+
+
+def rebuild():
+    # re-index every row of the sqlite fts tables, e.g. after loading data with the triggers missing
+    if db.engine.dialect.name == 'sqlite':
+        for model in (Artist, Venue):
+            fts = _fts_table(model)
+            db.session.execute(text("INSERT INTO {0}({0}) VALUES ('rebuild')".format(fts)))
+        db.session.commit()
+
+
+def _words(term):
+    return [w.lower() for w in WORD.findall(term)]
+
+
+def _ranked_postgres(model, words):
+    vector = literal_column('"{}".search_vector'.format(model.__tablename__))
+    query = func.to_tsquery('simple', ' & '.join(w + ':*' for w in words))
+    return select([model.id, model.name, model.upcoming_shows_count]).where(vector.op('@@')(query)) \
+        .where(model.archived_at.is_(None)).order_by(func.ts_rank_cd(vector, query).desc(), model.name, model.id) \
+        .limit(app.config['SEARCH_LIMIT'])
+
+
+def _ranked_sqlite(model, words):
+    fts = _fts_table(model)
+    table = model.__tablename__
+    sql = 'SELECT "{table}".id, "{table}".name, "{table}".upcoming_shows_count FROM {fts} ' \
+          'JOIN "{table}" ON "{table}".id = {fts}.rowid ' \
+          'WHERE {fts} MATCH :query AND "{table}".archived_at IS NULL ORDER BY bm25({fts}, {weights}), "{table}".name, "{table}".id ' \
+          'LIMIT :limit' \
+        .format(table=table, fts=fts, weights=BM25_WEIGHTS)
+    query = ' AND '.join('"{}"*'.format(w) for w in words)
+    return text(sql).bindparams(query=query, limit=app.config['SEARCH_LIMIT'])
+
+
+def _result(row):
+    return {"id": row.id, "name": row.name, "num_upcoming_show": row.upcoming_shows_count}
+
+
+def search_statements(model, term, dialect):
+    # the ranked match and "City, ST" location statements for term, either None when it does not apply.
+    # independent of each other, so the async server (asgi.py) runs them concurrently
+    words = _words(term)
+    ranked = located = None
+    if words:
+        ranked = _ranked_postgres(model, words) if dialect == 'postgresql' else _ranked_sqlite(model, words)
+    location = term.split(",")
+    if len(location) == 2:
+        located = select([model.id, model.name, model.upcoming_shows_count]) \
+            .where(and_(model.city.ilike(escape_like(location[0].strip()), escape='\\'),
+                        model.state.ilike(escape_like(location[1].strip()), escape='\\'))) \
+            .where(model.archived_at.is_(None)).order_by(model.name, model.id).limit(app.config['SEARCH_LIMIT'])
+    return ranked, located
+
+
+def substring_statement(model, term):
+    # names containing term anywhere, for when no word starts with it; None for a blank term
+    term = term.strip()
+    if not term:
+        return None
+    pattern = '%{}%'.format(escape_like(term))
+    return select([model.id, model.name, model.upcoming_shows_count]) \
+        .where(model.name.ilike(pattern, escape='\\')).where(model.archived_at.is_(None)) \
+        .order_by(model.name, model.id).limit(app.config['SEARCH_LIMIT'])
+
+
+def search_results(ranked, located, substring=()):
+    # ranked matches (or substring ones when nothing ranked) first, then the located rows not already matched
+    data = [_result(row) for row in ranked or substring]
+    seen = set(d["id"] for d in data)
+    return data + [_result(row) for row in located if row.id not in seen]
+
+
+def search(model, term):
+    # ranked matches for term against model (Artist or Venue), as dicts with id, name and num_upcoming_show.
+    # every word of term must prefix-match a word of the name, city, genres or description.
+    # a "City, ST" term also returns everything located there, after the ranked matches.
+    ranked, located = [db.session.execute(s).fetchall() if s is not None else []
+                       for s in search_statements(model, term, db.engine.dialect.name)]
+    substring = []
+    if not ranked:
+        statement = substring_statement(model, term)
+        substring = db.session.execute(statement).fetchall() if statement is not None else []
+    return search_results(ranked, located, substring)
@@ -2,3 +2,27 @@ window.parseISOString = function parseISOString(s) {
   var b = s.split(/\D+/);
   return new Date(Date.UTC(b[0], --b[1], b[2], b[3], b[4], b[5], b[6]));
 };
+
+// inputs with data-typeahead="artist|venue" offer matching names from /typeahead in their datalist,
+// picking one fills in its id
+$(function () {
+  $('input[data-typeahead]').each(function () {
+    var input = $(this), options = $('#' + input.attr('list')), last = null;
+    input.on('input', function () {
+      var q = input.val();
+      if (q === last || /^\d*$/.test(q)) {
+        return;
+      }
+      last = q;
+      $.getJSON('/typeahead', {q: q, type: input.data('typeahead')}, function (response) {
+        if (q !== last) {
+          return;
+        }
+        options.empty();
+        $.each(response.data, function (i, match) {
+          $('<option>').val(match.id).text(match.name).appendTo(options);
+        });
+      });
+    });
+  });
+});
@@ -0,0 +1,97 @@
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+import pytest
+
+# config.py reads the environment on import: a throwaway SQLite database, and no per-worker upkeep
+# before requests so query counts only cover the route itself
+TMP = tempfile.mkdtemp(prefix='fyyur-tests-')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(TMP, 'primary.db')
+os.environ['DATABASE_REPLICA_URLS'] = ''
+os.environ['COUNTER_ROLL_INTERVAL'] = '0'
+os.environ['ARCHIVE_INTERVAL'] = '0'
+os.environ['CACHE_TYPE'] = 'lru'
+os.environ['FEED_TYPE'] = 'memory'
+os.environ['SQL_INSTRUMENTATION'] = '0'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config  # noqa: E402
+config.app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+import app as routes  # noqa: E402,F401  registers the routes
+from config import cache, db  # noqa: E402
+from feed import feed  # noqa: E402
+from models.Artist import Artist  # noqa: E402
+from models.Show import Show  # noqa: E402
+from models.Venue import Venue  # noqa: E402
+from typeahead import names  # noqa: E402
+
+VENUES = [('The Musical Hop', 'San Francisco', 'CA'),
+          ('Park Square Live Music & Coffee', 'San Francisco', 'CA'),
+          ('The Dueling Pianos Bar', 'New York', 'NY')]
+ARTISTS = [('Guns N Petals', 'San Francisco', 'CA', ''),
+           ('Matt Quevado', 'New York', 'NY', ''),
+           ('The Wild Sax Band', 'San Francisco', 'CA', 'Fri 20:00-23:59')]
+
+
+def artist_form(**fields):
+    # a valid ArtistForm submission, fields replacing its values
+    return dict({'name': 'The New Quartet', 'city': 'Austin', 'state': 'TX', 'genres': ['Jazz'],
+                 'image_link': '', 'availability': '', 'seeking_description': ''}, **fields)
+
+
+def venue_form(**fields):
+    # a valid VenueForm submission, fields replacing its values
+    return dict({'name': 'The Blue Cellar', 'city': 'Austin', 'state': 'TX', 'address': '5 Main St',
+                 'genres': ['Jazz'], 'image_link': '', 'seeking_description': ''}, **fields)
+
+
+def query_plan(statement):
+    # SQLite's plan for a Core statement, its steps joined by ' | '
+    compiled = statement.compile(db.engine)
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    with db.engine.connect() as connection:
+        rows = connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + str(compiled), params)
+        return ' | '.join(row[-1] for row in rows)
+
+
+@pytest.fixture
+def app():
+    with config.app.app_context():
+        yield config.app
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def data(app):
+    # a fresh database: the VENUES and ARTISTS with two upcoming and one past show each, ids in list order
+    db.drop_all()
+    db.create_all()
+    now = datetime.utcnow()
+    venues = [Venue(name=name, city=city, state=state, address='1 Main St', genres='Jazz,Blues',
+                    seeking_description='', created_at=now - timedelta(days=i))
+              for i, (name, city, state) in enumerate(VENUES)]
+    artists = [Artist(name=name, city=city, state=state, genres='Rock n Roll,Jazz', availability=availability,
+                      seeking_description='', created_at=now - timedelta(days=i))
+               for i, (name, city, state, availability) in enumerate(ARTISTS)]
+    db.session.add_all(venues + artists)
+    db.session.commit()
+    for i, (venue, artist) in enumerate(zip(venues, artists)):
+        friday = (now + timedelta(days=7 + (4 - now.weekday()) % 7 + 7 * i)).replace(hour=21, minute=0,
+                                                                                     second=0, microsecond=0)
+        db.session.add_all([Show(venue_id=venue.id, artist_id=artist.id, start_time=friday),
+                            Show(venue_id=venue.id, artist_id=artist.id, start_time=friday + timedelta(days=7)),
+                            Show(venue_id=venue.id, artist_id=artist.id, start_time=now - timedelta(days=30 + i))])
+    db.session.commit()
+    ids = {'venues': [v.id for v in venues], 'artists': [a.id for a in artists]}
+    db.session.remove()
+    cache.clear()
+    feed.discard(Artist, Venue)
+    names.loaded_at = None
+    return ids
@@ -0,0 +1,78 @@
+import json
+from types import SimpleNamespace
+
+import api
+from conftest import artist_form
+from config import cache, db
+from counters import roll_forward
+from instrumentation import assert_max_queries
+from models.Artist import Artist
+from models.Show import Show
+
+
+def _no_serializing(monkeypatch):
+    # a 304 must not serialize the body it doesn't send
+    def fail(*args, **kwargs):
+        raise AssertionError('serialized a body for a 304')
+    monkeypatch.setattr(api, 'json', SimpleNamespace(dumps=fail))
+
+
+def test_detail(client, data):
+    response = client.get('/api/v1/artists/{}'.format(data['artists'][0]))
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == 'no-cache'
+    body = response.get_json()
+    assert body['name'] == 'Guns N Petals'
+    assert body['genres'] == ['Jazz', 'Rock n Roll']
+    assert 'etag' not in body and 'genre_mask' not in body
+    assert [show['venue_name'] for show in body['upcoming_shows']] == ['The Musical Hop'] * 2
+
+
+def test_detail_not_modified(client, data, monkeypatch):
+    url = '/api/v1/venues/{}'.format(data['venues'][0])
+    etag = client.get(url).headers['ETag']
+    _no_serializing(monkeypatch)
+    response = assert_max_queries(client, url, 0, headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+
+
+def test_detail_etag_follows_data(client, data):
+    url = '/api/v1/artists/{}'.format(data['artists'][0])
+    etag = client.get(url).headers['ETag']
+    # the same data cached again, e.g. by another worker, has the same ETag
+    cache.clear()
+    assert client.get(url).headers['ETag'] == etag
+    client.post('/artists/{}/edit'.format(data['artists'][0]), data=artist_form(name='Guns N Roses'))
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert response.get_json()['name'] == 'Guns N Roses'
+
+
+def test_listing_etag(client, data, monkeypatch):
+    response = client.get('/api/v1/artists')
+    etag = response.headers['ETag']
+    assert [artist['name'] for artist in response.get_json()['data']] == \
+        ['Guns N Petals', 'Matt Quevado', 'The Wild Sax Band']
+    with monkeypatch.context() as patched:
+        _no_serializing(patched)
+        assert client.get('/api/v1/artists', headers={'If-None-Match': etag}).status_code == 304
+    db.session.get(Artist, data['artists'][1]).image_link = 'https://example.com/matt.png'
+    db.session.commit()
+    assert client.get('/api/v1/artists', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_roll_forward_bumps_version(data):
+    versions = dict(db.session.query(Artist.id, Artist.version_id))
+    later = db.session.query(db.func.max(Show.start_time)).scalar()
+    with db.engine.begin() as connection:
+        roll_forward(connection, later)
+    db.session.expire_all()
+    assert all(version == versions[i] + 1 for i, version in db.session.query(Artist.id, Artist.version_id))
+
+
+def test_not_found(client, data):
+    response = client.get('/api/v1/venues/999999')
+    assert response.status_code == 404
+    assert json.loads(response.data) == {'error': 'Not Found', 'status': 404}
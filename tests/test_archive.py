@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from archive import archive_shows, archived_shows, archiver
+from config import db
+from conftest import query_plan
+from models.Artist import Artist
+from models.Show import Show
+from models.ShowArchive import ShowArchive
+from models.Venue import Venue
+from queries import recently_listed
+
+
+@pytest.fixture
+def archiving(app, data):
+    app.config['DELETE_MODE'] = 'archive'
+    yield data
+    app.config['DELETE_MODE'] = 'cascade'
+    # let a background move the test started finish before the next test drops the tables
+    with archiver._running:
+        pass
+
+
+def _flashes(client):
+    with client.session_transaction() as session:
+        return [message for _, message in session.get('_flashes', [])]
+
+
+def test_cascade_delete(client, data):
+    venue_id = data['venues'][0]
+    client.delete('/venues/{}'.format(venue_id))
+    assert db.session.get(Venue, venue_id) is None
+    assert db.session.query(Show).filter_by(venue_id=venue_id).count() == 0
+    # the artist's counters lost the venue's shows
+    assert db.session.get(Artist, data['artists'][0]).upcoming_shows_count == 0
+
+
+def test_archive_delete(client, archiving):
+    venue_id = archiving['venues'][0]
+    client.delete('/venues/{}'.format(venue_id))
+    assert db.session.get(Venue, venue_id).archived_at is not None
+    assert client.get('/venues/{}'.format(venue_id)).status_code == 404
+    archive_shows(2)
+    assert db.session.query(Show).filter_by(venue_id=venue_id).count() == 0
+    assert db.session.query(ShowArchive).filter_by(venue_id=venue_id).count() == 3
+
+
+def test_archived_not_editable(client, archiving):
+    artist_id, venue_id = archiving['artists'][0], archiving['venues'][0]
+    client.delete('/artists/{}'.format(artist_id))
+    client.delete('/venues/{}'.format(venue_id))
+    assert client.post('/artists/{}/edit'.format(artist_id), data={'name': 'Renamed'}).status_code == 404
+    assert client.post('/venues/{}/edit'.format(venue_id), data={'name': 'Renamed'}).status_code == 404
+    assert client.post('/artists/999999/edit', data={'name': 'Renamed'}).status_code == 404
+    db.session.expire_all()
+    assert db.session.get(Artist, artist_id).name == 'Guns N Petals'
+
+
+@pytest.mark.parametrize('archived', ['artists', 'venues'])
+def test_archived_take_no_shows(client, archiving, archived):
+    client.delete('/{}/{}'.format(archived, archiving[archived][1]))
+    start = datetime.utcnow() + timedelta(days=100)
+    response = client.post('/shows/create', data={'artist_id': archiving['artists'][1],
+                                                  'venue_id': archiving['venues'][1],
+                                                  'start_time': start.strftime('%Y-%m-%d %H:%M:%S')})
+    assert response.status_code == 302
+    # the archiver may be moving the listing's other shows meanwhile
+    assert db.session.query(Show).filter(Show.start_time > start - timedelta(days=1)).count() == 0
+    assert '{} {} was not found.'.format(archived[:-1].capitalize(), archiving[archived][1]) in _flashes(client)
+
+
+def test_archived_index_partial(data):
+    # listings of the live rows walk their own indexes, only finding the archived rows uses archived_at's
+    assert 'archived_at' not in query_plan(recently_listed(Venue))
+    assert 'ix_Venue_archived_at' in query_plan(db.select([Show.id]).where(archived_shows()))
@@ -0,0 +1,61 @@
+import asyncio
+import threading
+
+import pytest
+
+import asgi
+
+
+def _get(path, method='GET'):
+    # status, body of a GET (or method) through the ASGI application
+    scope = {'type': 'http', 'method': method, 'path': path, 'query_string': b'', 'headers': [],
+             'http_version': '1.1', 'scheme': 'http', 'server': ('localhost', 80), 'client': ('127.0.0.1', 1)}
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(asgi.application(scope, receive, send))
+    return messages[0]['status'], b''.join(m.get('body', b'') for m in messages[1:])
+
+
+@pytest.fixture
+def hook(app):
+    # a before_request hook of the test's choosing, removed again afterwards
+    hooks = app.before_request_funcs.setdefault(None, [])
+    added = []
+
+    def add(func):
+        hooks.append(func)
+        added.append(func)
+
+    yield add
+    for func in added:
+        hooks.remove(func)
+
+
+def test_async_view(data):
+    status, body = _get('/venues/{}'.format(data['venues'][0]))
+    assert status == 200
+    assert b'The Musical Hop' in body
+
+
+def test_head(data):
+    # the async views and the Flask app both answer HEAD without a body
+    for path in ('/venues/{}'.format(data['venues'][0]), '/export/venues.csv'):
+        assert _get(path, 'HEAD') == (200, b'')
+
+
+def test_before_request_short_circuits(data, hook):
+    hook(lambda: ('maintenance', 503))
+    assert _get('/venues/{}'.format(data['venues'][0])) == (503, b'maintenance')
+
+
+def test_hooks_off_the_event_loop(data, hook):
+    threads = []
+    hook(lambda: threads.append(threading.get_ident()))
+    assert _get('/shows')[0] == 200
+    assert threads and threads[0] != threading.get_ident()
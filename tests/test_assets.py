@@ -0,0 +1,74 @@
+import gzip
+import os
+import re
+
+import pytest
+
+import assets
+from conftest import TMP
+
+STATIC_URL = re.compile(r"""static_url\(\s*['"]([^'"]+)['"]\s*\)""")
+
+
+def _templates():
+    for directory, _, files in os.walk(os.path.join(assets.ROOT, 'templates')):
+        for name in files:
+            with open(os.path.join(directory, name), encoding='utf-8') as f:
+                yield name, f.read()
+
+
+def test_templates_reference_registered_files():
+    # every static_url() is a bundle or one of FILES, so `flask assets build` fingerprints it
+    for template, text in _templates():
+        for name in STATIC_URL.findall(text):
+            assert name in assets.BUNDLES or name in assets.FILES, (template, name)
+        # and no page loads scripts or styles from elsewhere
+        assert not re.search(r'<(script|link)[^>]+(src|href)="(https?:)?//', text), template
+    for name in assets.FILES:
+        assert os.path.isfile(os.path.join(assets.STATIC, name)), name
+    for sources in assets.BUNDLES.values():
+        for source in sources:
+            assert os.path.isfile(os.path.join(assets.ROOT, source)), source
+
+
+@pytest.fixture
+def built(app, monkeypatch):
+    # a build into a throwaway static/dist, served by the app
+    dist = os.path.join(TMP, 'dist')
+    monkeypatch.setattr(assets, 'DIST', dist)
+    monkeypatch.setattr(assets, 'MANIFEST', os.path.join(dist, 'manifest.json'))
+    manifest = assets.build()
+    monkeypatch.setitem(app.extensions, 'assets', manifest)
+    return manifest
+
+
+def test_build(built):
+    assert re.fullmatch(r'main\.[0-9a-f]{12}\.css', built['main.css'])
+    with open(os.path.join(assets.DIST, built['main.css']), encoding='utf-8') as f:
+        css = f.read()
+    # the icon font is copied and fingerprinted along with the stylesheet that points at it
+    assert "url('{}?#iefix')".format(built['fonts/fontawesome-webfont.eot']) in css
+    assert "url('{}')".format(built['fonts/fontawesome-webfont.woff']) in css
+    assert os.path.isfile(os.path.join(assets.DIST, built['fonts/fontawesome-webfont.woff']))
+    assert not os.path.exists(os.path.join(assets.DIST, built['fonts/fontawesome-webfont.woff'] + '.gz'))
+
+
+def test_serve_built(client, data, built):
+    page = client.get('/').get_data(as_text=True)
+    assert '/assets/' + built['main.css'] in page
+    assert '/assets/' + built['img/front-splash.jpg'] in page
+    response = client.get('/assets/' + built['main.css'], headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.mimetype == 'text/css'
+    assert 'immutable' in response.headers['Cache-Control'] and 'max-age=31536000' in response.headers['Cache-Control']
+    assert b'FontAwesome' in gzip.decompress(response.data)
+    assert client.get('/assets/main.0123456789ab.css').status_code == 404
+
+
+def test_serve_unbuilt(client, app, monkeypatch):
+    # development: bundles are concatenated per request, pointing at static/
+    monkeypatch.setitem(app.extensions, 'assets', {})
+    response = client.get('/assets/form.css')
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == 'no-cache'
+    assert b"url('/static/fonts/fontawesome-webfont.woff')" in response.data
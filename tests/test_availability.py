@@ -0,0 +1,67 @@
+from datetime import datetime
+
+import pytest
+
+from availability import availability_windows, covers, minute_of_day, parse_availability
+from conftest import artist_form
+from config import db
+from models.Artist import Artist
+from models.ArtistAvailability import ArtistAvailability
+
+# a Friday
+FRIDAY = datetime(2026, 11, 6)
+
+
+def test_parse():
+    assert parse_availability('') == []
+    assert parse_availability('18:00-20:00, fri 20:00-23:59  Sat 09:30-12:00') == \
+        [(None, 18 * 60, 20 * 60), (4, 20 * 60, 23 * 60 + 59), (5, 9 * 60 + 30, 12 * 60)]
+
+
+@pytest.mark.parametrize('text', ['evenings', '18:00-20:00 later', '24:00-25:00', '20:00-18:00', 'Fry 18:00-20:00'])
+def test_parse_rejects(text):
+    with pytest.raises(ValueError):
+        parse_availability(text)
+
+
+def test_windows_skip_what_does_not_parse():
+    # legacy strings never fail a write
+    assert availability_windows(None) == []
+    assert availability_windows('evenings 18:00-20:00 and 22:00-21:00') == [(None, 18 * 60, 20 * 60)]
+
+
+def test_covers():
+    windows = [(4, 20 * 60, 23 * 60 + 59), (None, 9 * 60, 10 * 60)]
+    assert minute_of_day(FRIDAY.replace(hour=21, minute=15)) == 21 * 60 + 15
+    assert covers(windows, FRIDAY.replace(hour=21))
+    assert not covers(windows, FRIDAY.replace(day=7, hour=21))
+    assert covers(windows, FRIDAY.replace(day=7, hour=9, minute=30))
+    # strictly inside: a show can't start when the window does
+    assert not covers(windows, FRIDAY.replace(hour=20))
+    assert covers([], FRIDAY)
+
+
+def test_available_at_matches_covers(data):
+    # the SQL predicate answers what covers() does, for artists with and without windows
+    for hour in (9, 20, 21, 23):
+        for day in (FRIDAY, FRIDAY.replace(day=7)):
+            start = day.replace(hour=hour, minute=30)
+            available = set(i for (i,) in db.session.query(Artist.id).filter(Artist.available_at(start)))
+            expected = set(a.id for a in Artist.query if covers(availability_windows(a.availability), start))
+            assert available == expected
+
+
+def test_edit_rewrites_windows(client, data):
+    artist = data['artists'][0]
+    client.post('/artists/{}/edit'.format(artist), data=artist_form(availability='Mon 10:00-12:00 14:00-16:00'))
+    windows = ArtistAvailability.query.filter_by(artist_id=artist).order_by(ArtistAvailability.start_minute)
+    assert [(w.weekday, w.start_minute, w.end_minute) for w in windows] == \
+        [(0, 10 * 60, 12 * 60), (None, 14 * 60, 16 * 60)]
+    client.post('/artists/{}/edit'.format(artist), data=artist_form(availability=''))
+    assert ArtistAvailability.query.filter_by(artist_id=artist).count() == 0
+
+
+def test_form_rejects_malformed(client, data):
+    response = client.post('/artists/create', data=artist_form(availability='whenever'), follow_redirects=True)
+    assert b'Invalid availability time' in response.data
+    assert Artist.query.filter_by(name='The New Quartet').count() == 0
@@ -0,0 +1,85 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from cache import LRUCache, NullCache, SQLiteCache, artist_key, make_cache, venue_key
+from conftest import TMP, artist_form, venue_form
+from config import cache
+from instrumentation import assert_max_queries
+from queries import rollover_timeout
+
+
+@pytest.mark.parametrize('backend', [lambda: LRUCache(2, 60), lambda: SQLiteCache(TMP + '/cache.sqlite3', 60)])
+def test_backends(backend):
+    store = backend()
+    store.clear()
+    store.set('a', {'n': 1})
+    store.set('b', 2, timeout=0)
+    assert store.get('a') == {'n': 1}
+    assert store.get('b') is None
+    store.set('c', 3, timeout=0.05)
+    time.sleep(0.1)
+    assert store.get('c') is None
+    store.delete('a', 'missing')
+    assert store.get('a') is None
+
+
+def test_lru_evicts_least_recent():
+    store = LRUCache(2, 60)
+    store.set('a', 1)
+    store.set('b', 2)
+    store.get('a')
+    store.set('c', 3)
+    assert (store.get('a'), store.get('b'), store.get('c')) == (1, None, 3)
+
+
+def test_make_cache():
+    assert isinstance(make_cache({'CACHE_TYPE': 'null'}), NullCache)
+    assert isinstance(make_cache({}), LRUCache)
+    with pytest.raises(ValueError):
+        make_cache({'CACHE_TYPE': 'memcached'})
+
+
+def test_rollover_timeout(app):
+    soon = datetime.utcnow() + timedelta(seconds=30)
+    assert 25 < rollover_timeout([{'start_time': soon}, {'start_time': soon + timedelta(days=1)}]) <= 30
+    assert rollover_timeout([]) == app.config['CACHE_DEFAULT_TIMEOUT']
+
+
+def test_detail_served_from_cache(client, data):
+    url = '/venues/{}'.format(data['venues'][0])
+    client.get(url)
+    assert cache.get(venue_key(data['venues'][0])) is not None
+    assert assert_max_queries(client, url, 0).status_code == 200
+
+
+def test_artist_edit_invalidates(client, data):
+    artist_id, venue_id = data['artists'][0], data['venues'][0]
+    client.get('/venues/{}'.format(venue_id))
+    client.get('/artists/{}'.format(artist_id))
+    client.post('/artists/{}/edit'.format(artist_id), data=artist_form(name='Guns N Roses'))
+    assert cache.get(artist_key(artist_id)) is None
+    # the venue page lists the artist's name next to its shows
+    assert cache.get(venue_key(venue_id)) is None
+    assert b'Guns N Roses' in client.get('/venues/{}'.format(venue_id)).data
+
+
+def test_venue_edit_invalidates(client, data):
+    artist_id, venue_id = data['artists'][0], data['venues'][0]
+    client.get('/artists/{}'.format(artist_id))
+    client.post('/venues/{}/edit'.format(venue_id), data=venue_form(name='The Musical Hall'))
+    assert cache.get(artist_key(artist_id)) is None
+    assert b'The Musical Hall' in client.get('/artists/{}'.format(artist_id)).data
+
+
+def test_new_show_invalidates(client, data):
+    artist_id, venue_id = data['artists'][1], data['venues'][0]
+    client.get('/artists/{}'.format(artist_id))
+    client.get('/venues/{}'.format(venue_id))
+    start = datetime.utcnow() + timedelta(days=90)
+    client.post('/shows/create', data={'artist_id': artist_id, 'venue_id': venue_id,
+                                       'start_time': start.strftime('%Y-%m-%d %H:%M:%S')})
+    assert cache.get(artist_key(artist_id)) is None
+    assert cache.get(venue_key(venue_id)) is None
+    assert b'The Musical Hop' in client.get('/artists/{}'.format(artist_id)).data
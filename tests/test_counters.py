@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy.dialects import postgresql
+
+from config import db
+from counters import reconcile, roll_forward, watermark
+from models.Artist import Artist
+from models.Show import Show
+from models.Venue import Venue
+
+
+class Recorder(object):
+    # a connection that records the statements run on it and answers with its database's rows
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.statements = []
+
+    def execute(self, statement, *args):
+        self.statements.append(str(statement.compile(dialect=postgresql.dialect())))
+        return self.connection.execute(statement, *args)
+
+
+def test_roll_forward(data):
+    a1 = data['artists'][0]
+    later = db.session.query(db.func.max(Show.start_time)).filter(Show.artist_id == a1).scalar()
+    with db.engine.begin() as connection:
+        assert roll_forward(connection, later) == 3
+        assert roll_forward(connection, later) == 0
+    artist = db.session.get(Artist, a1)
+    assert (artist.upcoming_shows_count, artist.past_shows_count) == (0, 3)
+    with db.engine.begin() as connection:
+        assert reconcile(connection, datetime.utcnow()) == 4
+
+
+def test_watermark_locks(data):
+    # counting shows shares the watermark row, moving it takes it exclusively (PostgreSQL)
+    with db.engine.begin() as connection:
+        recorder = Recorder(connection)
+        watermark(recorder)
+        roll_forward(recorder, datetime.utcnow() + timedelta(minutes=1))
+    assert recorder.statements[0].endswith('FOR SHARE')
+    assert recorder.statements[1].endswith('FOR UPDATE')
+
+
+def _show_form(data):
+    start = (datetime.utcnow() + timedelta(days=10)).replace(hour=12, minute=0, second=0, microsecond=0)
+    return {'artist_id': data['artists'][0], 'venue_id': data['venues'][0], 'start_time': str(start)}
+
+
+def _counts(data):
+    db.session.expire_all()
+    return (db.session.get(Artist, data['artists'][0]).upcoming_shows_count,
+            db.session.get(Venue, data['venues'][0]).upcoming_shows_count)
+
+
+def test_new_show_counts(client, data):
+    before = _counts(data)
+    client.post('/shows/create', data=_show_form(data))
+    assert _counts(data) == (before[0] + 1, before[1] + 1)
+
+
+def test_failed_show_rolls_back(client, data, monkeypatch):
+    before = _counts(data)
+    rollbacks = []
+    rollback = db.session.rollback
+    monkeypatch.setattr(db.session, 'rollback', lambda: rollbacks.append(1) or rollback())
+    db.session.execute(db.text('CREATE TRIGGER no_shows BEFORE INSERT ON "Show" '
+                               'BEGIN SELECT RAISE(ABORT, \'closed\'); END'))
+    db.session.commit()
+    try:
+        response = client.post('/shows/create', data=_show_form(data), follow_redirects=True)
+    finally:
+        db.session.execute(db.text('DROP TRIGGER no_shows'))
+        db.session.commit()
+    assert b'Show could not be listed' in response.data
+    assert rollbacks
+    assert _counts(data) == before
+    # the session is usable again for the next request
+    client.post('/shows/create', data=_show_form(data))
+    assert _counts(data) == (before[0] + 1, before[1] + 1)
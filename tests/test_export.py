@@ -0,0 +1,62 @@
+import csv
+import io
+import json
+import os
+from datetime import datetime, timedelta
+
+from conftest import TMP
+from config import db
+from models.Artist import Artist
+from models.Show import Show
+
+
+def test_csv(client, data):
+    response = client.get('/export/venues.csv')
+    assert response.mimetype == 'text/csv'
+    assert response.headers['Content-Disposition'] == 'attachment; filename=venues.csv'
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert [row['name'] for row in rows] == ['The Musical Hop', 'Park Square Live Music & Coffee',
+                                            'The Dueling Pianos Bar']
+    assert rows[0]['website_link'] == '' and rows[0]['upcoming_shows_count'] == '2'
+
+
+def test_ndjson_bounds(client, data):
+    now = datetime.utcnow()
+    response = client.get('/export/shows.ndjson?since={}&until={}'.format(now, now + timedelta(days=14)))
+    assert response.mimetype == 'application/x-ndjson'
+    rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    expected = Show.query.filter(Show.start_time >= now, Show.start_time < now + timedelta(days=14)) \
+        .order_by(Show.start_time, Show.id).all()
+    assert [row['id'] for row in rows] == [show.id for show in expected]
+    assert rows and rows[0]['start_time'] == expected[0].start_time.strftime('%Y-%m-%d %H:%M:%S')
+    assert rows[0]['artist_name'] == 'Guns N Petals'
+
+
+def test_batches_stream(app, client, data, monkeypatch):
+    # one chunk per batch of rows, after the header
+    monkeypatch.setitem(app.config, 'EXPORT_BATCH', 2)
+    response = client.get('/export/shows.csv')
+    assert response.is_streamed
+    chunks = list(response.response)
+    assert len(chunks) == 1 + 5
+    assert sum(chunk.count(b'\n') for chunk in chunks) == 1 + 9
+
+
+def test_bad_requests(client, data):
+    assert client.get('/export/users.csv').status_code == 404
+    assert client.get('/export/shows.xml').status_code == 404
+    assert client.get('/export/shows.csv?since=someday').status_code == 400
+
+
+def test_round_trip(app, client, data):
+    # an export loads back with `flask import`
+    path = os.path.join(TMP, 'export-artists.csv')
+    with open(path, 'wb') as f:
+        f.write(client.get('/export/artists.csv').data)
+    db.session.remove()
+    db.session.execute(Artist.__table__.delete())
+    db.session.commit()
+    result = app.test_cli_runner().invoke(args=['import', 'artists', path])
+    assert result.exit_code == 0, result.output
+    assert [(a.name, a.availability) for a in Artist.query.order_by(Artist.name)] == \
+        [('Guns N Petals', ''), ('Matt Quevado', ''), ('The Wild Sax Band', 'Fri 20:00-23:59')]
@@ -0,0 +1,50 @@
+import pytest
+
+from conftest import artist_form, venue_form
+from feed import feed, make_feed
+from instrumentation import assert_max_queries
+from models.Artist import Artist
+from models.Venue import Venue
+
+
+def test_cold_and_warm(client, data):
+    assert [v['name'] for v in feed.get(Venue)] == ['The Musical Hop', 'Park Square Live Music & Coffee',
+                                                      'The Dueling Pianos Bar']
+    # both feeds loaded, the home page reads no table
+    feed.get(Artist)
+    response = assert_max_queries(client, '/', 0)
+    assert b'Guns N Petals' in response.data
+
+
+def test_new_listings_head_the_feed(client, data):
+    feed.get(Artist)
+    feed.get(Venue)
+    client.post('/artists/create', data=artist_form())
+    client.post('/venues/create', data=venue_form())
+    assert feed.cached(Artist)[0]['name'] == 'The New Quartet'
+    assert feed.cached(Venue)[0]['name'] == 'The Blue Cellar'
+    assert b'The New Quartet' in assert_max_queries(client, '/', 0).data
+
+
+def test_edit_reloads(client, data):
+    feed.get(Artist)
+    client.post('/artists/{}/edit'.format(data['artists'][1]), data=artist_form(name='Matt Q'))
+    assert feed.cached(Artist) is None
+    assert feed.get(Artist)[1]['name'] == 'Matt Q'
+
+
+def test_feed_failure_keeps_the_listing(client, data, monkeypatch):
+    # the artist is listed all the same, the feed catches up when it is reloaded
+    def fail(*args):
+        raise RuntimeError('feed store unavailable')
+    monkeypatch.setattr(feed, 'add', fail)
+    response = client.post('/artists/create', data=artist_form(), follow_redirects=True)
+    assert b'The New Quartet was successfully listed' in response.data
+    assert b'could not be listed' not in response.data
+    assert Artist.query.filter_by(name='The New Quartet').count() == 1
+
+
+def test_make_feed(app):
+    assert make_feed({'FEED_TYPE': 'memory', 'FEED_SIZE': 3}).size == 3
+    with pytest.raises(ValueError):
+        make_feed({'FEED_TYPE': 'redis'})
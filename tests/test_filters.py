@@ -0,0 +1,31 @@
+from datetime import datetime
+
+import babel.dates
+import pytest
+
+from app import _format_datetime, format_datetime
+
+FORMATS = {'full': "EEEE MMMM, d, y 'at' h:mma", 'medium': "EE MM, dd, y h:mma"}
+
+
+@pytest.mark.parametrize('format', ['full', 'medium', 'y-MM-dd HH:mm'])
+@pytest.mark.parametrize('value', [datetime(2026, 11, 6, 21, 0), datetime(2027, 1, 1, 9, 5, 30)])
+def test_same_as_babel(value, format):
+    # the precompiled patterns give what babel's format_datetime gave the old filter
+    expected = babel.dates.format_datetime(value, FORMATS.get(format, format), locale='en')
+    assert format_datetime(value, format) == expected
+    assert format_datetime(value.isoformat(), format) == expected
+
+
+def test_memoized():
+    _format_datetime.cache_clear()
+    value = datetime(2026, 11, 6, 21, 0)
+    for _ in range(3):
+        format_datetime(value, 'full')
+    assert _format_datetime.cache_info().hits == 2
+
+
+def test_template_filter(app):
+    assert app.jinja_env.filters['datetime'] is format_datetime
+    rendered = app.jinja_env.from_string("{{ when|datetime('full') }}").render(when=datetime(2026, 11, 6, 21, 0))
+    assert rendered == 'Friday November, 6, 2026 at 9:00PM'
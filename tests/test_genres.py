@@ -0,0 +1,44 @@
+from config import db
+from genres import GENRE_BITS, GENRES, genres_to_mask, mask_to_genres
+from models.Artist import Artist
+from models.Venue import Venue
+
+
+def test_mask_round_trip():
+    assert genres_to_mask([]) == 0
+    assert genres_to_mask(['Jazz', ' Blues', 'Polka']) == GENRE_BITS['Jazz'] | GENRE_BITS['Blues']
+    assert mask_to_genres(genres_to_mask(['Soul', 'Alternative'])) == ['Alternative', 'Soul']
+    # bits are positions in GENRES, which only ever grows at the end
+    assert GENRE_BITS['Alternative'] == 1 and GENRE_BITS['Other'] == 1 << (len(GENRES) - 1)
+
+
+def test_mask_follows_genres(data):
+    artist = db.session.get(Artist, data['artists'][0])
+    assert mask_to_genres(artist.genre_mask) == ['Jazz', 'Rock n Roll']
+    artist.genres = 'Funk,Soul'
+    db.session.commit()
+    assert db.session.query(Artist.genre_mask).filter_by(id=artist.id).scalar() == genres_to_mask(['Funk', 'Soul'])
+
+
+def test_venue_filter(client, data):
+    db.session.get(Venue, data['venues'][0]).genres = 'Funk,Jazz'
+    db.session.commit()
+    page = client.get('/venues?genre=Jazz').data
+    assert b'The Musical Hop' in page and b'The Dueling Pianos Bar' in page
+    page = client.get('/venues?genre=Jazz&genre=Funk').data
+    assert b'The Musical Hop' in page and b'The Dueling Pianos Bar' not in page
+    assert b'The Musical Hop' not in client.get('/venues?genre=Pop').data
+
+
+def test_artist_filter(client, data):
+    db.session.get(Artist, data['artists'][2]).genres = 'Funk'
+    db.session.commit()
+    page = client.get('/artists?genre=Funk').data
+    assert b'The Wild Sax Band' in page and b'Guns N Petals' not in page
+    page = client.get('/artists?genre=Jazz').data
+    assert b'The Wild Sax Band' not in page and b'Guns N Petals' in page
+
+
+def test_unknown_genre(client, data):
+    assert client.get('/venues?genre=Polka').status_code == 400
+    assert client.get('/artists?genre=Jazz&genre=Polka').status_code == 400
@@ -0,0 +1,73 @@
+from datetime import datetime
+
+import pytest
+
+from config import db
+from gazetteer import bounding_box, geocode, haversine, place_key
+from geocode import within
+from models.Venue import Venue
+
+SAN_FRANCISCO = (37.7749, -122.4194)
+OAKLAND = (37.8044, -122.2712)
+
+
+def test_place_key():
+    assert place_key(' Saint Louis', 'missouri') == ('st louis', 'MO')
+    assert place_key('Mt. Vernon', 'n.y.') == ('mount vernon', 'NY')
+    assert place_key('', 'CA') is None
+    assert geocode('san francisco', 'California') == SAN_FRANCISCO
+    assert geocode('Atlantis', 'CA') is None
+
+
+def test_distances():
+    assert haversine(*SAN_FRANCISCO, *SAN_FRANCISCO) == 0
+    assert 8 < haversine(*SAN_FRANCISCO, *OAKLAND) < 9
+    assert 340 < haversine(*SAN_FRANCISCO, *geocode('Los Angeles', 'CA')) < 350
+    min_lat, max_lat, min_lng, max_lng = bounding_box(*SAN_FRANCISCO, 10)
+    assert min_lat < OAKLAND[0] < max_lat and min_lng < OAKLAND[1] < max_lng
+    assert not min_lat < geocode('Los Angeles', 'CA')[0] < max_lat
+
+
+def test_within(data):
+    hop, park, dueling = data['venues']
+    assert set(within(Venue, *OAKLAND, 5)) == set()
+    distances = within(Venue, *OAKLAND, 10)
+    assert set(distances) == {hop, park}
+    assert 8 < distances[hop] < 9
+    assert set(within(Venue, *SAN_FRANCISCO, 3000)) == {hop, park, dueling}
+
+
+def test_archived_venues_are_not_found(client, data):
+    hop, park, _ = data['venues']
+    db.session.get(Venue, hop).archived_at = datetime.utcnow()
+    db.session.commit()
+    assert set(within(Venue, *SAN_FRANCISCO, 10)) == {park}
+    page = client.get('/shows/near?near=San Francisco, CA').get_data(as_text=True)
+    assert 'Park Square Live Music' in page and 'The Musical Hop' not in page
+
+
+def test_shows_near(client, data):
+    page = client.get('/shows/near?lat=40.73&lng=-73.99&radius=10').get_data(as_text=True)
+    # the upcoming shows only
+    assert page.count('The Dueling Pianos Bar') == 2
+    assert '0.0 miles away' not in page and 'miles away' in page
+    assert 'The Musical Hop' not in page
+
+
+@pytest.mark.parametrize('query', ['lat=40.73', 'lat=91&lng=0', 'near=Atlantis, CA', 'radius=-1&near=Oakland, CA'])
+def test_shows_near_rejects(client, data, query):
+    assert client.get('/shows/near?' + query).status_code == 400
+
+
+def test_venues_command(app, data):
+    hop = data['venues'][0]
+    db.session.execute(Venue.__table__.update().values(latitude=None, longitude=None))
+    db.session.commit()
+    version = db.session.get(Venue, hop).version_id
+    result = app.test_cli_runner().invoke(args=['geocode', 'venues'])
+    assert 'placed 3 venues, 0 not in the gazetteer' in result.output
+    db.session.expire_all()
+    venue = db.session.get(Venue, hop)
+    assert (venue.latitude, venue.longitude) == SAN_FRANCISCO
+    assert venue.version_id == version + 1
+    assert 'placed 0 venues' in app.test_cli_runner().invoke(args=['geocode', 'venues']).output
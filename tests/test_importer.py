@@ -0,0 +1,80 @@
+import json
+import os
+from datetime import datetime, timedelta
+
+from conftest import TMP
+from config import db
+from models.Artist import Artist
+from models.ArtistAvailability import ArtistAvailability
+from models.Show import Show
+from models.Venue import Venue
+
+
+def _write(name, text):
+    path = os.path.join(TMP, name)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    return path
+
+
+def _import(app, *args):
+    result = app.test_cli_runner().invoke(args=['import'] + list(args))
+    assert result.exit_code == 0, result.output
+    return result
+
+
+def _dead_letters(path):
+    with open(path + '.rejected.ndjson', encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_csv_artists(app, data):
+    path = _write('artists.csv', 'name,city,state,genres,availability,seeking_venue\n'
+                                 'The Night Owls,Austin,TX,"Jazz,Blues",Sat 19:00-23:00,yes\n'
+                                 ',Austin,TX,Jazz,,no\n'
+                                 'Quiet Hours,Denver,CO,Folk,,off\n')
+    _import(app, 'artists', path)
+    owls = Artist.query.filter_by(name='The Night Owls').one()
+    assert owls.genre_mask and owls.seeking_venue
+    assert not Artist.query.filter_by(name='Quiet Hours').one().seeking_venue
+    # the Core insert still indexes the availability windows
+    assert [(w.weekday, w.start_minute, w.end_minute) for w in
+            ArtistAvailability.query.filter_by(artist_id=owls.id)] == [(5, 19 * 60, 23 * 60)]
+    rejected = _dead_letters(path)
+    assert [(r['line'], sorted(r['errors'])) for r in rejected] == [(3, ['name'])]
+    assert rejected[0]['row']['city'] == 'Austin'
+
+
+def test_ndjson_shows_dead_letter(app, data):
+    artist, venue = data['artists'][0], data['venues'][0]
+    sax = data['artists'][2]
+    start = datetime.utcnow().replace(microsecond=0) + timedelta(days=3)
+    monday = start + timedelta(days=(7 - start.weekday()) % 7)
+    rows = [{'artist_id': artist, 'venue_id': venue, 'start_time': str(start)},
+            {'artist_id': 999, 'venue_id': venue, 'start_time': str(start)},
+            {'artist_id': artist, 'venue_id': 999, 'start_time': str(start)},
+            {'artist_id': sax, 'venue_id': venue, 'start_time': str(monday.replace(hour=10, minute=0))},
+            {'artist_id': 'one', 'venue_id': venue, 'start_time': str(start)}]
+    path = _write('shows.ndjson', '\n'.join(json.dumps(r) for r in rows) + '\n{not json\n')
+    counts = db.session.get(Artist, artist).upcoming_shows_count
+    result = _import(app, 'shows', path, '--batch-size', '2')
+    assert '1 imported, 5 rejected' in result.output
+    rejected = _dead_letters(path)
+    assert [(r['line'], r['errors']) for r in rejected] == [
+        (2, {'artist_id': ['no such artist']}),
+        (3, {'venue_id': ['no such venue']}),
+        (4, {'start_time': ["the artist isn't available at that time"]}),
+        (5, {'artist_id': ['must be an integer id']}),
+        (6, {'row': ['not a JSON object']})]
+    assert rejected[-1]['row'] == '{not json\n'
+    db.session.expire_all()
+    assert Show.query.filter_by(artist_id=artist, start_time=start).count() == 1
+    assert db.session.get(Artist, artist).upcoming_shows_count == counts + 1
+
+
+def test_no_rejects_leave_no_dead_letter(app, data):
+    path = _write('venues.ndjson', json.dumps({'name': 'The Blue Cellar', 'city': 'Austin', 'state': 'TX',
+                                                 'address': '5 Main St', 'genres': ['Jazz']}) + '\n')
+    _import(app, 'venues', path)
+    assert not os.path.exists(path + '.rejected.ndjson')
+    assert Venue.query.filter_by(name='The Blue Cellar').count() == 1
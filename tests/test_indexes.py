@@ -0,0 +1,36 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import inspect
+
+from config import db
+from conftest import query_plan
+from models.Artist import Artist
+from models.Venue import Venue
+from queries import detail_statements, recently_listed, show_listing
+
+
+def test_declared_indexes(data):
+    indexes = {table: {index['name'] for index in inspect(db.engine).get_indexes(table)}
+               for table in ('Show', 'Artist', 'Venue')}
+    assert {'ix_Show_venue_id_start_time', 'ix_Show_artist_id_start_time', 'ix_Show_start_time_id'} <= indexes['Show']
+    assert {'ix_Artist_city_state', 'ix_Artist_created_at'} <= indexes['Artist']
+    assert {'ix_Venue_city_state', 'ix_Venue_created_at'} <= indexes['Venue']
+
+
+@pytest.mark.parametrize('model,index', [(Venue, 'ix_Show_venue_id_start_time'),
+                                         (Artist, 'ix_Show_artist_id_start_time')])
+def test_detail_shows_use_index(data, model, index):
+    _, past, upcoming = detail_statements(model, 1, datetime.utcnow())
+    assert index in query_plan(past)
+    assert index in query_plan(upcoming)
+
+
+@pytest.mark.parametrize('model', [Artist, Venue])
+def test_recently_listed_uses_index(data, model):
+    assert 'ix_{}_created_at'.format(model.__name__) in query_plan(recently_listed(model))
+
+
+def test_time_range_uses_index(data):
+    now = datetime.utcnow()
+    assert 'ix_Show_start_time_id' in query_plan(show_listing(now, now + timedelta(days=7)).statement)
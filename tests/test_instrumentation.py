@@ -0,0 +1,55 @@
+import os
+
+import pytest
+from flask import Flask
+from sqlalchemy import create_engine, text
+
+from conftest import TMP
+from instrumentation import QueryLog, init_instrumentation, max_queries, statement_shape
+
+
+def test_statement_shape():
+    assert statement_shape("SELECT * FROM t WHERE id IN (?, ?, ?) AND name = 'it''s'\n  LIMIT 5") == \
+        'SELECT * FROM t WHERE id IN (?) AND name = ? LIMIT ?'
+    assert statement_shape('SELECT 1 WHERE a = %(a_1)s') == statement_shape('SELECT 2 WHERE a = %(a_1)s')
+
+
+def test_repeated():
+    log = QueryLog()
+    for i in range(4):
+        log.add('SELECT name FROM t WHERE id = {}'.format(i), 0.001)
+    log.add('SELECT 1', 0.002)
+    assert log.count == 5
+    assert log.repeated(3) == [('SELECT name FROM t WHERE id = ?', 4)]
+    assert log.repeated(4) == []
+
+
+def test_max_queries():
+    engine = create_engine('sqlite://')
+    with max_queries(2) as log:
+        engine.execute(text('SELECT 1'))
+        engine.execute(text('SELECT 2'))
+    assert log.count == 2
+    with pytest.raises(AssertionError, match='3 queries, expected at most 2'):
+        with max_queries(2):
+            for i in range(3):
+                engine.execute(text('SELECT {}'.format(i)))
+
+
+def test_response_headers():
+    engine = create_engine('sqlite://')
+    app = Flask(__name__)
+    app.config.update(SQL_INSTRUMENTATION=True, SQL_SLOW_QUERY_LOG=os.path.join(TMP, 'slow.log'),
+                      SQL_SLOW_QUERY_MS=10000, SQL_SLOWEST=5, SQL_REPEAT_THRESHOLD=2, SQL_DEBUG_FOOTER=True)
+    init_instrumentation(app)
+
+    @app.route('/')
+    def n_plus_one():
+        for i in range(3):
+            engine.execute(text('SELECT {}'.format(i)))
+        return '<html><body></body></html>'
+
+    response = app.test_client().get('/')
+    assert response.headers['X-DB-Query-Count'] == '3'
+    assert response.headers['X-DB-Repeated-Statements'] == '1'
+    assert b'N+1: 3 x <code>SELECT ?</code>' in response.data
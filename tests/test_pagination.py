@@ -0,0 +1,70 @@
+import base64
+import json
+from datetime import datetime
+
+import pytest
+
+from models.Show import Show
+from pagination import decode_cursor, encode_cursor
+
+
+def _token(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def test_cursor_round_trip(app):
+    start = datetime(2026, 11, 6, 21, 30)
+    token = encode_cursor([start, 42])
+    assert '=' not in token
+    with app.test_request_context():
+        assert decode_cursor(token, [Show.start_time, Show.id]) == [start, 42]
+
+
+def _walk(client, url):
+    # every page of url forward through "next", then back through "prev"; the ids seen each way
+    forward, backward = [], []
+    response = client.get(url).get_json()
+    while True:
+        forward += [row['id'] for row in response['data']]
+        if not response['next']:
+            break
+        response = client.get('{}&after={}'.format(url, response['next'])).get_json()
+    while True:
+        backward = [row['id'] for row in response['data']] + backward
+        if not response['prev']:
+            break
+        response = client.get('{}&before={}'.format(url, response['prev'])).get_json()
+    return forward, backward
+
+
+def test_walk_shows(client, data):
+    forward, backward = _walk(client, '/api/v1/shows?size=2')
+    ordered = [show.id for show in Show.query.order_by(Show.start_time, Show.id)]
+    assert forward == backward == ordered
+
+
+def test_walk_artists(client, data):
+    forward, backward = _walk(client, '/api/v1/artists?size=2')
+    assert forward == backward == [1, 2, 3]
+
+
+@pytest.mark.parametrize('url,cursor', [
+    ('/shows', 'not a cursor!'),
+    ('/shows', _token({'start_time': '2026-11-06'})),
+    ('/shows', _token(['2026-11-06T21:00:00'])),
+    ('/shows', _token(['yesterday', 1])),
+    ('/shows', _token(['2026-11-06T21:00:00', '1'])),
+    ('/artists', _token([1, 1])),
+    ('/artists', _token(['Guns N Petals', None])),
+    ('/api/v1/shows', _token([None, 1])),
+    ('/api/v1/venues', _token(['The Musical Hop', 1.5])),
+])
+def test_malformed_cursor(client, data, url, cursor):
+    assert client.get('{}?after={}'.format(url, cursor)).status_code == 400
+    assert client.get('{}?before={}'.format(url, cursor)).status_code == 400
+
+
+def test_listing_pages(client, data):
+    response = client.get('/shows?size=2')
+    assert response.status_code == 200
+    assert b'Later shows' in response.data and b'Earlier shows' not in response.data
@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from app import format_datetime
+from config import db
+from models.Show import Show
+from partitions import EnsurePartitions, add_months, ensure_partitions, month_start, partition_name
+
+
+class Result(list):
+
+    def scalar(self):
+        return self[0][0]
+
+
+class Postgres(object):
+    # answers ensure_partitions' catalog queries like a database with "Show" partitioned, recording the rest
+
+    dialect = SimpleNamespace(name='postgresql')
+
+    def __init__(self, existing=(), locked=False):
+        self.existing = set(existing)
+        self.locked = locked
+        self.statements = []
+
+    def execute(self, statement, **params):
+        sql = str(statement)
+        if 'pg_partitioned_table' in sql:
+            return Result([(True,)])
+        if 'pg_try_advisory_xact_lock' in sql:
+            return Result([(not self.locked,)])
+        if 'pg_inherits' in sql:
+            return Result((name,) for name in self.existing)
+        self.statements.append((sql, params))
+        return Result()
+
+
+def test_months():
+    assert month_start(datetime(2026, 10, 19, 14, 31)) == datetime(2026, 10, 1)
+    assert add_months(datetime(2026, 11, 1), 2) == datetime(2027, 1, 1)
+    assert add_months(datetime(2026, 1, 1), -1) == datetime(2025, 12, 1)
+    assert partition_name(datetime(2027, 3, 1)) == 'Show_y2027m03'
+
+
+def test_ensure_creates_missing_months():
+    connection = Postgres(existing=['Show_default', 'Show_y2026m11'])
+    assert ensure_partitions(connection, 2, datetime(2026, 10, 19)) == ['Show_y2026m10', 'Show_y2026m12']
+    create, move, attach = [sql for sql, _ in connection.statements[3:]]
+    assert create.startswith('CREATE TABLE "Show_y2026m12" (LIKE "Show"')
+    # the default partition's shows of the month move first, ATTACH fails while it holds any
+    assert 'DELETE FROM "Show_default"' in move and 'INSERT INTO "Show_y2026m12"' in move
+    assert connection.statements[4][1] == {'start': datetime(2026, 12, 1), 'end': datetime(2027, 1, 1)}
+    assert attach.endswith("FOR VALUES FROM ('2026-12-01 00:00:00') TO ('2027-01-01 00:00:00')")
+
+
+def test_ensure_skips_while_another_worker_holds_the_lock():
+    connection = Postgres(locked=True)
+    assert ensure_partitions(connection, 2, datetime(2026, 10, 19)) == []
+    assert connection.statements == []
+
+
+def test_not_partitioned_elsewhere(app):
+    with db.engine.begin() as connection:
+        assert ensure_partitions(connection, 2) == []
+    assert 'not partitioned' in app.test_cli_runner().invoke(args=['partitions', 'ensure']).output
+    # a worker without a check interval never looks
+    EnsurePartitions(0, 2)()
+
+
+def test_time_range(client, data):
+    shows = Show.query.order_by(Show.start_time, Show.id).all()
+    start, end = shows[3].start_time, shows[6].start_time
+    page = client.get('/shows?from={}&to={}'.format(start.isoformat(), end.isoformat())).get_data(as_text=True)
+    # from inclusive, to exclusive
+    assert page.count('tile-show') == 3
+    for show in shows[3:6]:
+        assert format_datetime(show.start_time, 'full') in page
+    assert format_datetime(shows[6].start_time, 'full') not in page
+    after = (shows[-1].start_time + timedelta(days=1)).isoformat()
+    assert client.get('/shows?from={}'.format(after)).get_data(as_text=True).count('tile-show') == 0
+    assert client.get('/shows?from=the+weekend').status_code == 400
@@ -0,0 +1,29 @@
+import os
+
+from sqlalchemy import create_engine
+
+from conftest import TMP
+from pool import TimedQueuePool, pool_status
+
+
+def _engine(name):
+    return create_engine('sqlite:///' + os.path.join(TMP, name), poolclass=TimedQueuePool, pool_size=2)
+
+
+def test_stats_per_engine():
+    primary, replica = _engine('pool-primary.db'), _engine('pool-replica.db')
+    for _ in range(3):
+        primary.connect().close()
+    replica.connect().close()
+    assert pool_status(primary)['checkouts'] == 3
+    assert pool_status(replica)['checkouts'] == 1
+    # disposing replaces the pool, not its figures
+    primary.dispose()
+    primary.connect().close()
+    assert pool_status(primary)['checkouts'] == 4
+
+
+def test_metrics_route(client):
+    response = client.get('/metrics/pool')
+    assert response.status_code == 200
+    assert 'pool' in response.get_json()
@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from config import cache, db
+from instrumentation import assert_max_queries
+from models.Artist import Artist
+from models.Show import Show
+from models.Venue import Venue
+
+# (method, url, request kwargs, query budget). The budgets are the counts of today's routes: a page must
+# not grow a query per venue, artist or show, which `crowded` checks with twenty times the data.
+ROUTES = [
+    ('GET', '/', {}, 2),
+    ('GET', '/venues', {}, 1),
+    ('GET', '/artists', {}, 1),
+    ('GET', '/shows', {}, 1),
+    ('GET', '/venues/1', {}, 3),
+    ('GET', '/artists/1', {}, 3),
+    ('POST', '/venues/search', {'data': {'search_term': 'music'}}, 1),
+    ('POST', '/artists/search', {'data': {'search_term': 'band'}}, 1),
+    # no word starts with it, the substring fallback is the second query
+    ('POST', '/artists/search', {'data': {'search_term': 'uns'}}, 2),
+    ('POST', '/shows/search', {'data': {'search_term': 'San Francisco, CA'}}, 1),
+    ('GET', '/api/v1/artists', {}, 1),
+    ('GET', '/api/v1/venues', {}, 1),
+    ('GET', '/api/v1/shows', {}, 1),
+    ('GET', '/api/v1/artists/1', {}, 3),
+    ('GET', '/api/v1/venues/1', {}, 3),
+]
+
+
+def _crowd(count):
+    # count more venues and artists, each with a show, upcoming and past, at venue 1 and by artist 1
+    now = datetime.utcnow()
+    venues = [Venue(name='Crowd Venue {}'.format(i), city='San Francisco', state='CA', address='2 Main St',
+                    genres='Jazz', seeking_description='', created_at=now) for i in range(count)]
+    artists = [Artist(name='Crowd Artist {}'.format(i), city='San Francisco', state='CA', genres='Jazz',
+                      availability='', seeking_description='', created_at=now) for i in range(count)]
+    db.session.add_all(venues + artists)
+    db.session.commit()
+    for i, (venue, artist) in enumerate(zip(venues, artists)):
+        db.session.add_all([Show(venue_id=1, artist_id=artist.id, start_time=now + timedelta(days=60, hours=4 * i)),
+                            Show(venue_id=venue.id, artist_id=1, start_time=now - timedelta(days=60, hours=4 * i))])
+    db.session.commit()
+    db.session.remove()
+    cache.clear()
+
+
+@pytest.mark.parametrize('method,url,kwargs,limit', ROUTES)
+def test_route_queries(client, data, method, url, kwargs, limit):
+    assert assert_max_queries(client, url, limit, method=method, **kwargs).status_code == 200
+
+
+@pytest.mark.parametrize('method,url,kwargs,limit', ROUTES)
+def test_route_queries_crowded(client, data, method, url, kwargs, limit):
+    _crowd(60)
+    assert assert_max_queries(client, url, limit, method=method, **kwargs).status_code == 200
+
+
+@pytest.mark.parametrize('url', ['/venues/1', '/artists/1', '/api/v1/venues/1', '/api/v1/artists/1'])
+def test_cached_detail_queries(client, data, url):
+    client.get(url)
+    assert assert_max_queries(client, url, 0).status_code == 200
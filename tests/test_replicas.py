@@ -0,0 +1,69 @@
+import os
+import shutil
+import sqlite3
+import time
+
+import pytest
+from flask import g
+
+from config import cache, db
+from conftest import TMP
+from replicas import STICKY_KEY
+
+
+@pytest.fixture
+def replica(app, data):
+    # a copy of the primary as the only replica, whose venue 1 is renamed so reads show where they went
+    db.session.remove()
+    db.engine.dispose()
+    path = os.path.join(TMP, 'replica.db')
+    shutil.copyfile(os.path.join(TMP, 'primary.db'), path)
+    with sqlite3.connect(path) as connection:
+        connection.execute('UPDATE "Venue" SET name = ? WHERE id = ?', ('The Replica Hop', data['venues'][0]))
+    app.config.update(SQLALCHEMY_BINDS={'replica0': 'sqlite:///' + path}, REPLICA_BINDS=['replica0'])
+    yield data
+    db.session.remove()
+    db.get_engine(app, bind='replica0').dispose()
+    db.get_app(app).extensions['sqlalchemy'].connectors.pop('replica0', None)
+    app.config.update(SQLALCHEMY_BINDS=None, REPLICA_BINDS=[])
+
+
+def _venue_name(client, venue_id):
+    # the detail page is cached, whichever database rendered it first
+    cache.clear()
+    # the requests of a test share its app context, and so g, a write must not leak into the next request
+    g.pop('db_wrote', None)
+    response = client.get('/api/v1/venues/{}'.format(venue_id))
+    assert response.status_code == 200
+    return response.get_json()['name']
+
+
+def test_reads_go_to_replica(client, replica):
+    assert _venue_name(client, replica['venues'][0]) == 'The Replica Hop'
+
+
+def test_writer_pinned_to_primary(app, replica):
+    writer, reader = app.test_client(), app.test_client()
+    writer.delete('/venues/{}'.format(replica['venues'][2]))
+    with writer.session_transaction() as session:
+        assert session[STICKY_KEY] > time.time()
+    assert _venue_name(writer, replica['venues'][0]) == 'The Musical Hop'
+    assert _venue_name(reader, replica['venues'][0]) == 'The Replica Hop'
+    # the pin expires
+    with writer.session_transaction() as session:
+        session[STICKY_KEY] = time.time() - 1
+    assert _venue_name(writer, replica['venues'][0]) == 'The Replica Hop'
+
+
+def test_reads_without_write_dont_pin(app, replica):
+    client = app.test_client()
+    client.delete('/venues/999999')
+    with client.session_transaction() as session:
+        assert STICKY_KEY not in session
+    assert _venue_name(client, replica['venues'][0]) == 'The Replica Hop'
+
+
+def test_non_get_reads_from_primary(client, replica):
+    response = client.post('/venues/search', data={'search_term': 'hop'})
+    assert b'The Musical Hop' in response.data
+    assert b'The Replica Hop' not in response.data
@@ -0,0 +1,68 @@
+from datetime import datetime
+
+from config import db
+from models.Artist import Artist
+from models.Venue import Venue
+from queries import show_search
+from search import search
+
+
+def _names(results):
+    return [r['name'] for r in results]
+
+
+def test_prefix_match(data):
+    assert sorted(_names(search(Venue, 'Music'))) == ['Park Square Live Music & Coffee', 'The Musical Hop']
+    assert _names(search(Artist, 'band')) == ['The Wild Sax Band']
+    assert _names(search(Artist, 'wild sax')) == ['The Wild Sax Band']
+
+
+def test_substring_fallback(data):
+    # no word starts with "usical", the name contains it
+    assert _names(search(Venue, 'usical')) == ['The Musical Hop']
+    assert _names(search(Artist, 'N Pet')) == ['Guns N Petals']
+    # LIKE wildcards in the term match literally
+    assert search(Venue, '%') == []
+    assert search(Venue, '_') == []
+    assert search(Venue, '   ') == []
+
+
+def test_no_fallback_when_ranked(data):
+    # "hop" prefix-matches The Musical Hop; the substring query would add nothing ranked, and isn't run
+    assert _names(search(Venue, 'hop')) == ['The Musical Hop']
+
+
+def test_location(data):
+    assert _names(search(Venue, 'new york, ny')) == ['The Dueling Pianos Bar']
+    assert len(db.session.execute(show_search('san francisco, ca')).fetchall()) == 6
+    assert db.session.execute(show_search('San_Francisco, %')).fetchall() == []
+    assert _names(search(Artist, 'San Francisco, CA')) == ['Guns N Petals', 'The Wild Sax Band']
+
+
+def test_search_limit(app, data):
+    now = datetime.utcnow()
+    db.session.add_all(Venue(name='Jazz Cellar {}'.format(i), city='Austin', state='TX', genres='Jazz',
+                             seeking_description='', created_at=now) for i in range(5))
+    db.session.commit()
+    app.config['SEARCH_LIMIT'] = 3
+    try:
+        assert len(search(Venue, 'cellar')) == 3
+        assert len(search(Venue, 'ellar')) == 3
+        assert len(search(Venue, 'Austin, TX')) == 3
+    finally:
+        app.config['SEARCH_LIMIT'] = 50
+
+
+def test_archived_excluded(data):
+    venue = db.session.get(Venue, data['venues'][0])
+    venue.archived_at = datetime.utcnow()
+    db.session.commit()
+    assert _names(search(Venue, 'Music')) == ['Park Square Live Music & Coffee']
+    assert search(Venue, 'usical') == []
+    assert 'The Musical Hop' not in _names(search(Venue, 'San Francisco, CA'))
+
+
+def test_search_route(client, data):
+    response = client.post('/venues/search', data={'search_term': 'usical'})
+    assert response.status_code == 200
+    assert b'The Musical Hop' in response.data
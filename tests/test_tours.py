@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta
+
+from config import db
+from models.Artist import Artist
+from models.Show import Show
+
+FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def _next_show(artist_id):
+    # the start of the artist's first upcoming show, a Friday 21:00
+    return db.session.query(db.func.min(Show.start_time)) \
+        .filter(Show.artist_id == artist_id, Show.start_time > datetime.utcnow()).scalar()
+
+
+def _book(client, *rows):
+    response = client.post('/shows/bulk', json={'shows': [
+        {'artist_id': artist_id, 'venue_id': venue_id, 'start_time': start.strftime(FORMAT)}
+        for artist_id, venue_id, start in rows]})
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def _statuses(report):
+    return [row['status'] for row in report['rows']]
+
+
+def test_existing_shows_clash(client, data):
+    (a1, a2, _), (v1, v2, _) = data['artists'], data['venues']
+    start = _next_show(a1)
+    report = _book(client, (a1, v2, start + timedelta(hours=1)), (a2, v1, start - timedelta(hours=2)))
+    assert _statuses(report) == ['rejected', 'rejected']
+    assert report['rows'][0]['errors'] == {'start_time': ['the artist already has a show at that time']}
+    assert report['rows'][1]['errors'] == {'start_time': ['the venue already has a show at that time']}
+
+
+def test_show_length_apart_accepted(app, client, data):
+    (a1, _, _), (_, v2, _) = data['artists'], data['venues']
+    start = _next_show(a1)
+    length = timedelta(minutes=app.config['SHOW_LENGTH_MINUTES'])
+    report = _book(client, (a1, v2, start + length), (a1, v2, start - length))
+    assert _statuses(report) == ['accepted', 'accepted']
+
+
+def test_batch_clash(client, data):
+    (a1, a2, _), (v1, v2, v3) = data['artists'], data['venues']
+    start = _next_show(a1) + timedelta(days=2)
+    report = _book(client, (a2, v1, start), (a2, v3, start + timedelta(hours=1)),
+                   (a1, v1, start + timedelta(minutes=30)), (a1, v2, start + timedelta(days=1)))
+    assert _statuses(report) == ['accepted', 'rejected', 'rejected', 'accepted']
+    assert report['rows'][1]['errors'] == {'start_time': ['the artist already has a show at that time']}
+    assert report['rows'][2]['errors'] == {'start_time': ['the venue already has a show at that time']}
+    assert db.session.query(Show) \
+        .filter(Show.start_time >= start, Show.start_time < start + timedelta(days=2)).count() == 2
+
+
+def test_availability(client, data):
+    # the third artist plays Fridays 20:00-23:59 only
+    a3, v3 = data['artists'][2], data['venues'][2]
+    friday = _next_show(a3) + timedelta(days=28)
+    report = _book(client, (a3, v3, friday - timedelta(hours=2)), (a3, v3, friday))
+    assert _statuses(report) == ['rejected', 'accepted']
+    assert report['rows'][0]['errors'] == {'start_time': ["the artist isn't available at that time"]}
+
+
+def test_counters(client, data):
+    (a1, _, _), (_, v2, _) = data['artists'], data['venues']
+    start = _next_show(a1) + timedelta(days=1)
+    report = _book(client, (a1, v2, start), (a1, v2, start + timedelta(days=1)))
+    assert report['accepted'] == 2
+    db.session.expire_all()
+    assert db.session.get(Artist, a1).upcoming_shows_count == 4
+
+
+def test_form_refuses_double_booking(client, data):
+    (a1, _, _), (_, v2, _) = data['artists'], data['venues']
+    start = _next_show(a1) + timedelta(minutes=30)
+    shows = db.session.query(Show).count()
+    response = client.post('/shows/create', data={'artist_id': a1, 'venue_id': v2,
+                                                  'start_time': start.strftime(FORMAT)})
+    assert response.status_code == 302
+    assert db.session.query(Show).count() == shows
+    with client.session_transaction() as session:
+        assert ('message', 'The artist already has a show at that time') in session['_flashes']
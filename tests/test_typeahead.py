@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+
+import typeahead
+from conftest import artist_form, venue_form
+from instrumentation import assert_max_queries
+from typeahead import name_keys, names, normalize
+
+
+def _suggest(client, q, kind=None):
+    url = '/typeahead?q=' + q + ('&type=' + kind if kind else '')
+    return [(s['type'], s['name']) for s in client.get(url).get_json()['data']]
+
+
+def test_keys():
+    assert normalize('  Café  Wha?!') == 'cafe wha'
+    assert name_keys('The Wild Sax-Band') == ['the wild sax band', 'wild sax band', 'sax band', 'band']
+    assert name_keys('') == []
+
+
+def test_word_prefixes(client, data):
+    assert _suggest(client, 'sax') == [('artist', 'The Wild Sax Band')]
+    assert _suggest(client, 'WILD S') == [('artist', 'The Wild Sax Band')]
+    assert _suggest(client, 'ild') == []
+    assert _suggest(client, '  ') == []
+    # loaded once, then answered from memory
+    assert_max_queries(client, '/typeahead?q=the', 0)
+
+
+def test_ranking(client, data):
+    # equal upcoming show counts rank by name; more upcoming shows rank first
+    assert _suggest(client, 'the') == [('venue', 'The Dueling Pianos Bar'), ('venue', 'The Musical Hop'),
+                                       ('artist', 'The Wild Sax Band')]
+    friday = datetime.utcnow() + timedelta(days=(4 - datetime.utcnow().weekday()) % 7 + 70)
+    client.post('/shows/create', data={'artist_id': data['artists'][2], 'venue_id': data['venues'][0],
+                                       'start_time': str(friday.replace(hour=21, minute=30, microsecond=0))})
+    assert _suggest(client, 'the') == [('venue', 'The Musical Hop'), ('artist', 'The Wild Sax Band'),
+                                       ('venue', 'The Dueling Pianos Bar')]
+    assert _suggest(client, 'the', 'artist') == [('artist', 'The Wild Sax Band')]
+    assert client.get('/typeahead?q=the&type=show').status_code == 400
+
+
+def test_common_prefix_walks_the_ranking(client, data, monkeypatch):
+    expected = _suggest(client, 't')
+    monkeypatch.setattr(typeahead, 'RANGE_KEYS', 0)
+    assert _suggest(client, 't') == expected
+    monkeypatch.setattr(names, 'limit', 2)
+    assert _suggest(client, 't') == expected[:2]
+
+
+def test_writes_update_the_index(client, data):
+    _suggest(client, 'x')
+    client.post('/venues/create', data=venue_form())
+    client.post('/artists/{}/edit'.format(data['artists'][0]), data=artist_form(name='Guns N Roses'))
+    assert _suggest(client, 'blue') == [('venue', 'The Blue Cellar')]
+    assert _suggest(client, 'guns') == [('artist', 'Guns N Roses')]
+    client.delete('/venues/{}'.format(data['venues'][1]))
+    assert _suggest(client, 'park') == []
+
+
+def test_index_failure_keeps_the_listing(client, data, monkeypatch):
+    def fail(*args):
+        raise RuntimeError('index busy')
+    monkeypatch.setattr(names, 'put', fail)
+    response = client.post('/venues/create', data=venue_form(), follow_redirects=True)
+    assert b'The Blue Cellar was successfully listed' in response.data
+    assert b'could not be listed' not in response.data
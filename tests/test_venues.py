@@ -0,0 +1,39 @@
+from datetime import datetime
+
+from config import db
+from instrumentation import assert_max_queries
+from models.Venue import Venue
+
+
+def _areas(client, query=''):
+    # the /venues directory page, which has to be a single query
+    response = assert_max_queries(client, '/venues' + query, 1)
+    assert response.status_code == 200
+    return response.data.decode()
+
+
+def test_directory_grouped_by_area(client, data):
+    page = _areas(client)
+    # areas by state, then city, venues by id within them
+    assert page.index('The Musical Hop') < page.index('Park Square Live Music &amp; Coffee') \
+        < page.index('New York') < page.index('The Dueling Pianos Bar')
+
+
+def test_area_filters(client, data):
+    page = _areas(client, '?state=ca')
+    assert 'The Musical Hop' in page and 'The Dueling Pianos Bar' not in page
+    page = _areas(client, '?city=new york')
+    assert 'The Dueling Pianos Bar' in page and 'The Musical Hop' not in page
+
+
+def test_filters_match_literally(client, data):
+    # LIKE wildcards in the filters are plain characters
+    for query in ('?state=C_', '?state=%', '?city=San%', '?city=_'):
+        page = _areas(client, query)
+        assert 'The Musical Hop' not in page and 'The Dueling Pianos Bar' not in page, query
+
+
+def test_archived_hidden(client, data):
+    db.session.get(Venue, data['venues'][2]).archived_at = datetime.utcnow()
+    db.session.commit()
+    assert 'The Dueling Pianos Bar' not in _areas(client)
@@ -0,0 +1,154 @@
+import json
+from bisect import bisect_right, insort
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+
+import click
+from flask import Blueprint, abort, current_app, jsonify, request
+from flask.cli import AppGroup
+
+from config import db
+from counters import count_shows
+from importer import read_rows, validate_rows
+from models.Artist import Artist
+from models.Show import Show
+from models.Venue import Venue
+from queries import invalidate_pages
+from typeahead import names
+
+# ----------------------------------------------------------------------------#
+# Bulk show booking: POST /shows/bulk and `flask tours book FILE`.
+#
+# A tour is a list of (artist_id, venue_id, start_time) rows checked as one
+# batch: the rows are validated like `flask import shows` (the artists and
+# venues must exist, the artist must be available, three queries for the
+# whole batch), then the existing shows of the batch's artists and venues
+# around its dates are read with two more queries and every row is checked
+# against them and against the rows before it with a bisect. An artist or a
+# venue is double booked when two of its shows start less than
+# SHOW_LENGTH_MINUTES apart. The accepted rows are inserted in a single
+# transaction together with their show counters, and the answer says per
+# row whether it was accepted or why not.
+# ----------------------------------------------------------------------------#
+
+tours = Blueprint('tours', __name__)
+
+# (Show column, what a double booking of it is called)
+BOOKED = [(Show.artist_id, "the artist already has a show at that time"),
+          (Show.venue_id, "the venue already has a show at that time")]
+
+
+def _lock(model, ids):
+    # the rows of model with ids, locked until the end of the transaction on PostgreSQL (in id order, so
+    # concurrent bookings can't deadlock), so no other booking lands between the checks and the insert
+    db.session.query(model.id).filter(model.id.in_(sorted(ids))).order_by(model.id).with_for_update().all()
+
+
+def booked_times(column, ids, earliest, latest):
+    # {id: sorted start times} of the existing shows of the ids of column between earliest and latest
+    times = defaultdict(list)
+    for key, start in db.session.query(column, Show.start_time) \
+            .filter(column.in_(ids), Show.start_time > earliest, Show.start_time < latest):
+        times[key].append(start)
+    for starts in times.values():
+        starts.sort()
+    return times
+
+
+def _clashes(starts, start, length):
+    i = bisect_right(starts, start - length)
+    return i < len(starts) and starts[i] < start + length
+
+
+def check_bookings(accepted, length):
+    # split validated (line, row, record) into those that don't double book anybody and (line, row, errors)
+    # rejects. A row is checked against the shows in the database and the rows accepted before it.
+    if not accepted:
+        return [], []
+    starts = [r['start_time'] for _, _, r in accepted]
+    earliest, latest = min(starts) - length, max(starts) + length
+    booked = [(column, message, booked_times(column, set(r[column.key] for _, _, r in accepted), earliest, latest))
+              for column, message in BOOKED]
+    ok, rejected = [], []
+    for line, row, r in accepted:
+        errors = [message for column, message, times in booked
+                  if _clashes(times[r[column.key]], r['start_time'], length)]
+        if errors:
+            rejected.append((line, row, {'start_time': errors}))
+            continue
+        for column, _, times in booked:
+            insort(times[r[column.key]], r['start_time'])
+        ok.append((line, row, r))
+    return ok, rejected
+
+
+def double_bookings(record):
+    # why a single show (artist_id, venue_id, start_time) would double book its artist or venue, if it would
+    length = timedelta(minutes=current_app.config['SHOW_LENGTH_MINUTES'])
+    rejected = check_bookings([(None, None, record)], length)[1]
+    return rejected[0][2]['start_time'] if rejected else []
+
+
+def book_shows(rows):
+    # insert the rows of (line, row) that pass every check in one transaction.
+    # Returns ((line, record) accepted, (line, row, errors) rejected).
+    length = timedelta(minutes=current_app.config['SHOW_LENGTH_MINUTES'])
+    try:
+        accepted, rejected = validate_rows('shows', rows)
+        if accepted:
+            _lock(Artist, set(r['artist_id'] for _, _, r in accepted))
+            _lock(Venue, set(r['venue_id'] for _, _, r in accepted))
+        accepted, double_booked = check_bookings(accepted, length)
+        rejected += double_booked
+        records = [r for _, _, r in accepted]
+        if records:
+            db.session.execute(Show.__table__.insert(), records)
+            # a Core insert, the ORM events don't count these shows
+            count_shows(db.session.connection(), records)
+        db.session.commit()
+    except:
+        db.session.rollback()
+        raise
+    finally:
+        db.session.close()
+    if records:
+        invalidate_pages(set(r['artist_id'] for r in records), set(r['venue_id'] for r in records))
+        # typeahead ranks by upcoming shows
+        now = datetime.utcnow()
+        for model, key in [(Artist, 'artist_id'), (Venue, 'venue_id')]:
+            for entity_id, delta in Counter(r[key] for r in records if r['start_time'] > now).items():
+                names.count(model, entity_id, delta)
+    return [(line, r) for line, _, r in accepted], sorted(rejected, key=lambda reject: reject[0])
+
+
+def report(accepted, rejected):
+    rows = [{"row": line, "status": "accepted"} for line, _ in accepted] + \
+           [{"row": line, "status": "rejected", "errors": errors} for line, _, errors in rejected]
+    return {"accepted": len(accepted), "rejected": len(rejected),
+            "rows": sorted(rows, key=lambda row: row["row"])}
+
+
+@tours.route('/shows/bulk', methods=['POST'])
+def book_tour():
+    # {"shows": [{"artist_id": 1, "venue_id": 2, "start_time": "2026-11-06 20:30:00"}, ...]} or just the
+    # list, rows numbered from 0 in the report
+    data = request.get_json(silent=True)
+    shows = data.get('shows') if isinstance(data, dict) else data
+    if not isinstance(shows, list) or len(shows) > current_app.config['TOUR_MAX_SHOWS']:
+        abort(400)
+    return jsonify(report(*book_shows(list(enumerate(shows)))))
+
+
+tours_command = AppGroup('tours', help='Book many shows at once.')
+
+
+@tours_command.command('book')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'ndjson']), help='Defaults to the file extension.')
+def book_command(path, fmt):
+    """Book the shows of a CSV or NDJSON file of artist_id, venue_id, start_time in one transaction."""
+    fmt = fmt or ('csv' if path.lower().endswith('.csv') else 'ndjson')
+    accepted, rejected = book_shows(list(read_rows(path, fmt)))
+    for line, row, errors in rejected:
+        click.echo(json.dumps({'line': line, 'errors': errors, 'row': row}))
+    click.echo('{} shows booked, {} rejected'.format(len(accepted), len(rejected)), err=True)
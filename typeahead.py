@@ -0,0 +1,197 @@
+import heapq
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, insort
+
+from flask import Blueprint, abort, jsonify, request
+from sqlalchemy import select
+
+from config import app, db
+from models.Artist import Artist
+from models.Venue import Venue
+
+# ----------------------------------------------------------------------------#
+# Typeahead over artist and venue names: /typeahead?q=.
+#
+# Each worker keeps a sorted list of (key, kind, id) where the keys of a name
+# are its normalized form (lower case, accents and punctuation dropped) from
+# every word on: "the wild sax band", "wild sax band", "sax band", "band".
+# A query is two bisects for the keys starting with it, so "sax" or "wild s"
+# both find The Wild Sax Band, and answers never touch the database. Matches
+# are ranked by upcoming show count and capped at TYPEAHEAD_LIMIT; a prefix
+# matching many keys (one or two letters) walks the names in rank order and
+# stops at the first TYPEAHEAD_LIMIT that match.
+# The index is loaded on a worker's first query, kept up to date by the
+# create, edit and delete routes of that worker, and reloaded in the
+# background every TYPEAHEAD_REFRESH seconds to pick up the other workers'
+# writes, imports and rolled show counters.
+# ----------------------------------------------------------------------------#
+
+MODELS = {'artist': Artist, 'venue': Venue}
+NON_WORD = re.compile(r'[\W_]+', re.UNICODE)
+# a prefix matching more keys than this is answered by walking the names in rank order instead
+RANGE_KEYS = 1024
+
+typeahead = Blueprint('typeahead', __name__)
+
+
+def normalize(text):
+    # "Café  Wha?" -> "cafe wha"
+    text = text or ''
+    if not text.isascii():
+        text = ''.join(c for c in unicodedata.normalize('NFKD', text) if not unicodedata.combining(c))
+    return NON_WORD.sub(' ', text.lower()).strip()
+
+
+def name_keys(name):
+    # the normalized name from each of its words on
+    words = normalize(name).split()
+    return [' '.join(words[i:]) for i in range(len(words))]
+
+
+class Entry(object):
+    __slots__ = ('kind', 'id', 'name', 'count', 'keys')
+
+    def __init__(self, kind, entity_id, name, count):
+        self.kind, self.id, self.name, self.count = kind, entity_id, name, count
+        self.keys = name_keys(name)
+
+    @property
+    def rank(self):
+        # most upcoming shows first, then by name
+        return -self.count, self.keys[0] if self.keys else '', self.kind, self.id
+
+
+class NameIndex(object):
+
+    def __init__(self, limit=10, refresh=300):
+        self.limit = limit
+        self.refresh = refresh
+        # (key, kind, id), sorted
+        self.keys = []
+        # kind -> Entry.rank of its names, sorted
+        self.ranked = {kind: [] for kind in MODELS}
+        # (kind, id) -> Entry
+        self.entries = {}
+        self.loaded_at = None
+        self._lock = threading.Lock()
+        self._loading = threading.Lock()
+
+    def load(self):
+        # read every artist and venue name, swapping the new index in at once
+        keys, ranked, entries = [], {}, {}
+        for kind, model in MODELS.items():
+            ranked[kind] = []
+            for row in db.session.execute(select([model.id, model.name, model.upcoming_shows_count])
+                                          .where(model.archived_at.is_(None))):
+                entry = entries[kind, row.id] = Entry(kind, row.id, row.name, row.upcoming_shows_count)
+                keys.extend((key, kind, row.id) for key in entry.keys)
+                ranked[kind].append(entry.rank)
+            ranked[kind].sort()
+        keys.sort()
+        with self._lock:
+            self.keys, self.ranked, self.entries = keys, ranked, entries
+            self.loaded_at = time.monotonic()
+
+    def _fresh(self):
+        loaded_at = self.loaded_at
+        if loaded_at is not None and time.monotonic() - loaded_at <= self.refresh:
+            return
+        if not self._loading.acquire(loaded_at is None):
+            return
+        if loaded_at is not None:
+            # a reload runs in the background, answers come from the current index meanwhile
+            threading.Thread(target=self._reload, daemon=True).start()
+            return
+        try:
+            if self.loaded_at is None:
+                self.load()
+        finally:
+            self._loading.release()
+
+    def _reload(self):
+        try:
+            with app.app_context():
+                self.load()
+        finally:
+            self._loading.release()
+
+    @staticmethod
+    def _discard(items, item):
+        i = bisect_left(items, item)
+        if i < len(items) and items[i] == item:
+            del items[i]
+
+    def _remove(self, kind, entity_id):
+        entry = self.entries.pop((kind, entity_id), None)
+        if entry is not None:
+            for key in entry.keys:
+                self._discard(self.keys, (key, kind, entity_id))
+            self._discard(self.ranked[kind], entry.rank)
+        return entry
+
+    def _add(self, entry):
+        self.entries[entry.kind, entry.id] = entry
+        for key in entry.keys:
+            insort(self.keys, (key, entry.kind, entry.id))
+        insort(self.ranked[entry.kind], entry.rank)
+
+    def put(self, model, entity):
+        # a created or renamed artist or venue
+        if self.loaded_at is None:
+            # the first search loads it
+            return
+        kind = model.__name__.lower()
+        with self._lock:
+            self._remove(kind, entity.id)
+            self._add(Entry(kind, entity.id, entity.name, entity.upcoming_shows_count))
+
+    def remove(self, model, entity_id):
+        with self._lock:
+            self._remove(model.__name__.lower(), entity_id)
+
+    def count(self, model, entity_id, delta):
+        # a show was listed for (1) or removed from (-1) an artist's or venue's upcoming shows
+        kind = model.__name__.lower()
+        with self._lock:
+            entry = self._remove(kind, entity_id)
+            if entry is not None:
+                entry.count += delta
+                self._add(entry)
+
+    def search(self, q, kind=None):
+        # up to limit {type, id, name, upcoming_shows_count} whose name has a word starting with q
+        self._fresh()
+        prefix = normalize(q)
+        if not prefix:
+            return []
+        keys, entries = self.keys, self.entries
+        lo = bisect_left(keys, (prefix,))
+        hi = bisect_left(keys, (prefix + '\U0010ffff',), lo)
+        if hi - lo <= RANGE_KEYS:
+            matches = {entries.get((k, i)) for _, k, i in keys[lo:hi] if kind is None or k == kind}
+            found = heapq.nsmallest(self.limit, [e for e in matches if e is not None], key=lambda e: e.rank)
+        else:
+            # a short or common prefix: most names match, the best ranked ones come within a few steps
+            ranked = self.ranked[kind] if kind else heapq.merge(*self.ranked.values())
+            found = []
+            for _, _, k, i in ranked:
+                entry = entries.get((k, i))
+                if entry is not None and any(key.startswith(prefix) for key in entry.keys):
+                    found.append(entry)
+                    if len(found) == self.limit:
+                        break
+        return [{"type": e.kind, "id": e.id, "name": e.name, "upcoming_shows_count": e.count} for e in found]
+
+
+names = NameIndex(app.config['TYPEAHEAD_LIMIT'], app.config['TYPEAHEAD_REFRESH'])
+
+
+@typeahead.route('/typeahead')
+def suggest():
+    kind = request.args.get('type') or None
+    if kind is not None and kind not in MODELS:
+        abort(400)
+    return jsonify(data=names.search(request.args.get('q', ''), kind))